@@ -1,5 +1,16 @@
 from django.contrib import admin
-from .models import Feedback, Blogs, ContactMessage, Profile, Comment
+from .models import Feedback, Blogs, ContactMessage, Profile, Comment, Tag, UploadJob
+from . import exporter
+from .search import filter_blogs
+
+
+def export_action(name, fmt):
+    """Admin action streaming the selected rows through app1/exporter.py."""
+    def action(modeladmin, request, queryset):
+        return exporter.response(name, fmt, queryset=queryset)
+    action.__name__ = f'export_{fmt}'
+    action.short_description = f'Export selected as {fmt.upper()}'
+    return action
 
 
 @admin.register(Feedback)
@@ -8,14 +19,29 @@ class FeedbackAdmin(admin.ModelAdmin):
     search_fields = ('name', 'email', 'message')
     list_filter = ('created_at',)
     ordering = ('-created_at',)
+    actions = [export_action('feedback', 'ndjson'), export_action('feedback', 'csv')]
 
 
 @admin.register(Blogs)
 class BlogsAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'created_at')
-    search_fields = ('title', 'author__username', 'content')  # merged both search_fields
+    search_fields = ('title',)  # enables the search box; matching goes through app1/search.py
     list_filter = ('created_at',)
     ordering = ('-created_at',)
+    autocomplete_fields = ('tags',)
+    actions = [export_action('blogs', 'ndjson'), export_action('blogs', 'csv')]
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return filter_blogs(queryset, search_term), False
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
 
 
 @admin.register(Comment)
@@ -32,8 +58,17 @@ class ContactMessageAdmin(admin.ModelAdmin):
     search_fields = ('name', 'email', 'message')
     list_filter = ('created_at',)
     ordering = ('-created_at',)
+    actions = [export_action('contact_messages', 'ndjson'), export_action('contact_messages', 'csv')]
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ("user",)
+
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'original_name', 'status', 'attempts', 'next_attempt_at', 'created_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('idempotency_key', 'original_name')
+    ordering = ('-created_at',)
@@ -0,0 +1,310 @@
+"""
+Plumbing for the AI assistant endpoint.
+
+* Chat clients share a small async interface (`complete()` / `stream()`), so
+  the OpenAI client can be swapped for `FakeChatClient` via
+  settings.AI_CLIENT_CLASS and the whole path load-tested offline.
+* `ResponseCache` is an in-process TTL + LRU map keyed by a hash of the
+  model and prompt, so identical prompts are answered without a round trip.
+* `ConcurrencyLimiter` caps in-flight completions per user.
+* `CircuitBreaker` fails fast after repeated upstream errors or timeouts
+  instead of tying up workers waiting on a provider that is down.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SYSTEM_PROMPT = "You are a helpful AI assistant."
+
+
+class AIUnavailable(Exception):
+    """Raised when the circuit breaker is open."""
+
+
+class TooManyRequests(Exception):
+    """Raised when a user already has the maximum number of requests in flight."""
+
+
+def build_messages(user_text):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_text},
+    ]
+
+
+# ---------------- Clients ----------------
+class OpenAIChatClient:
+    def __init__(self, model, timeout):
+        self.model = model
+        self.timeout = timeout
+        # httpx async clients are bound to the event loop that created them;
+        # under WSGI every request gets its own loop, so keep one per loop.
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY, timeout=self.timeout, max_retries=0
+            )
+            self._clients[loop] = client
+        return client
+
+    async def complete(self, messages):
+        response = await self._client().chat.completions.create(
+            model=self.model, messages=messages
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, messages):
+        response = await self._client().chat.completions.create(
+            model=self.model, messages=messages, stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class FakeChatClient:
+    """Deterministic, offline stand-in for load tests and local development."""
+
+    def __init__(self, model, timeout, latency=None, chunk_size=16):
+        self.model = model
+        self.timeout = timeout
+        self.latency = getattr(settings, "AI_FAKE_LATENCY", 0.05) if latency is None else latency
+        self.chunk_size = chunk_size
+
+    def _reply(self, messages):
+        prompt = messages[-1]["content"]
+        return (
+            f"You asked: {prompt}\n\n"
+            "```python\nprint('hello from the fake client')\n```\n"
+        )
+
+    async def complete(self, messages):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+
+    async def stream(self, messages):
+        reply = self._reply(messages)
+        chunks = [reply[i:i + self.chunk_size] for i in range(0, len(reply), self.chunk_size)]
+        for chunk in chunks:
+            await asyncio.sleep(self.latency / max(1, len(chunks)))
+            yield chunk
+
+
+# ---------------- Response cache ----------------
+class ResponseCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model, user_text):
+        return hashlib.sha256(f"{model}\0{user_text}".encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ---------------- Concurrency limit ----------------
+class ConcurrencyLimiter:
+    def __init__(self, limit):
+        self.limit = limit
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        with self._lock:
+            if self._in_flight.get(key, 0) >= self.limit:
+                raise TooManyRequests(key)
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def release(self, key):
+        with self._lock:
+            remaining = self._in_flight.get(key, 1) - 1
+            if remaining > 0:
+                self._in_flight[key] = remaining
+            else:
+                self._in_flight.pop(key, None)
+
+
+# ---------------- Circuit breaker ----------------
+class CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive failures; while open every
+    call fails fast with AIUnavailable. After `reset_after` seconds one trial
+    call is let through (half-open): success closes the circuit, failure
+    re-opens it.
+    """
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_after or self._trial_running:
+                raise AIUnavailable("AI assistant is temporarily unavailable")
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+# ---------------- Service ----------------
+class AssistantService:
+    def __init__(self):
+        self.model = getattr(settings, "AI_MODEL", "gpt-4o-mini")
+        self.timeout = getattr(settings, "AI_TIMEOUT", 30)
+        client_class = import_string(
+            getattr(settings, "AI_CLIENT_CLASS", "app1.ai.OpenAIChatClient")
+        )
+        self.client = client_class(model=self.model, timeout=self.timeout)
+        self.cache = ResponseCache(
+            max_entries=getattr(settings, "AI_CACHE_SIZE", 512),
+            ttl=getattr(settings, "AI_CACHE_TTL", 60 * 60),
+        )
+        self.limiter = ConcurrencyLimiter(getattr(settings, "AI_MAX_CONCURRENT_PER_USER", 2))
+        self.breaker = CircuitBreaker(
+            threshold=getattr(settings, "AI_BREAKER_THRESHOLD", 5),
+            reset_after=getattr(settings, "AI_BREAKER_RESET", 30),
+        )
+
+    async def complete(self, user_key, user_text):
+        """Return the raw Markdown answer for `user_text`."""
+        cache_key = self.cache.key(self.model, user_text)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        self.limiter.acquire(user_key)
+        try:
+            self.breaker.before_call()
+            try:
+                answer = await asyncio.wait_for(
+                    self.client.complete(build_messages(user_text)), timeout=self.timeout
+                )
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+        finally:
+            self.limiter.release(user_key)
+
+        self.cache.set(cache_key, answer)
+        return answer
+
+    def open_stream(self, user_key, user_text):
+        """
+        Return an async iterator of Markdown chunks; the joined answer is
+        cached. Limits and the breaker are checked here, before the response
+        starts, so callers can still answer 429/503 instead of a broken stream.
+        """
+        cache_key = self.cache.key(self.model, user_text)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return _single(cached)
+
+        self.limiter.acquire(user_key)
+        try:
+            self.breaker.before_call()
+        except AIUnavailable:
+            self.limiter.release(user_key)
+            raise
+        return self._stream(user_key, user_text, cache_key)
+
+    async def _stream(self, user_key, user_text, cache_key):
+        try:
+            parts = []
+            deadline = time.monotonic() + self.timeout
+            iterator = self.client.stream(build_messages(user_text)).__aiter__()
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    parts.append(chunk)
+                    yield chunk
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            self.cache.set(cache_key, "".join(parts))
+        finally:
+            self.limiter.release(user_key)
+
+
+async def _single(value):
+    yield value
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AssistantService()
+    return _service
+
+
+def reset_service():
+    """Drop the shared service so the next call re-reads settings (tests)."""
+    global _service
+    with _service_lock:
+        _service = None
@@ -0,0 +1,253 @@
+"""
+Front-end asset bundles.
+
+Third-party CSS/JS is self-hosted. `python manage.py build_assets --vendor`
+downloads each VENDOR file into static/vendor/, along with the fonts its CSS
+points at, and records their sha256 in static/vendor/lock.json. Commit that
+directory. `build_assets` then concatenates each BUNDLES entry from its parts
+(vendored files and our own static/css, static/js), minifies it and writes
+static/dist/<bundle>.
+
+collectstatic hands everything to StaticStorage. It gives each file a
+content-hashed name and writes .gz next to it, plus .br when the `brotli`
+package is installed. WhiteNoise serves the hashed names with a one-year
+immutable Cache-Control and picks the pre-compressed variant the browser accepts.
+
+Templates include bundles with {% stylesheet %} and {% javascript %}
+(templatetags/assets.py). Until a bundle has been built, those tags emit its
+parts instead: the CDN URL for a vendor file that hasn't been downloaded, and
+the static file otherwise. A fresh checkout therefore works without the pipeline.
+"""
+import hashlib
+import json
+import posixpath
+import re
+import urllib.request
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+VENDOR = {
+    'bootstrap.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css',
+    'bootstrap.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js',
+    'fontawesome.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css',
+    'inter.css': 'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap',
+    'highlight.css': 'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github-dark.min.css',
+    'highlight.js': 'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js',
+    'aos.css': 'https://cdnjs.cloudflare.com/ajax/libs/aos/2.3.4/aos.css',
+    'aos.js': 'https://cdnjs.cloudflare.com/ajax/libs/aos/2.3.4/aos.js',
+    'ckeditor.js': 'https://cdn.ckeditor.com/ckeditor5/41.2.1/super-build/ckeditor.js',
+}
+
+# bundle name -> parts in order, as paths under static/ ('vendor/<name>' for VENDOR files)
+BUNDLES = {
+    'base.css': ['vendor/bootstrap.css', 'vendor/fontawesome.css', 'vendor/inter.css',
+                 'vendor/highlight.css', 'vendor/aos.css', 'css/base.css'],
+    'base.js': ['vendor/bootstrap.js', 'vendor/aos.js', 'vendor/highlight.js', 'js/base.js'],
+    'homepage.css': ['css/homepage.css'],
+    'homepage.js': ['js/homepage.js'],
+    'blog_detail.css': ['css/blog_detail.css'],
+    'blog_detail.js': ['js/blog_detail.js'],
+    # CKEditor 5 super-build, only on blog_page and blog_edit
+    'editor.js': ['vendor/ckeditor.js'],
+}
+
+VENDOR_DIR = 'vendor'
+DIST_DIR = 'dist'
+# Google Fonts serves woff2 only to browsers it recognises
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_CSS_COMMENT_OR_STRING = re.compile(r'(/\*.*?\*/)|("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')', re.S)
+_CSS_PUNCTUATION = re.compile(r' ?([{};,]) ?')
+_SOURCE_MAP = re.compile(r'^\s*(?://[#@] sourceMappingURL=.*|/\*[#@] sourceMappingURL=.*?\*/)\s*$', re.M)
+
+
+def source_root():
+    return Path(settings.STATICFILES_DIRS[0])
+
+
+def vendor_name(part):
+    """The VENDOR key of a bundle part, or None for our own files."""
+    prefix = VENDOR_DIR + '/'
+    return part[len(prefix):] if part.startswith(prefix) else None
+
+
+def bundle_path(name):
+    return f'{DIST_DIR}/{name}'
+
+
+# ---------------- Vendoring ----------------
+def _fetch(url):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.read()
+
+
+def _is_file(ref):
+    return not ref.startswith(('data:', '#'))
+
+
+def vendor(name, refresh=False):
+    """
+    Download VENDOR[name] into static/vendor/, and for a stylesheet every
+    font or image it references into static/vendor/<stem>/, rewriting its
+    url()s to the local copies. Returns {path: sha256} of the files written.
+    """
+    root = source_root() / VENDOR_DIR
+    target = root / name
+    if target.exists() and not refresh:
+        return {}
+    url = VENDOR[name]
+    # the .map files aren't vendored, and collectstatic refuses dangling references
+    text = _SOURCE_MAP.sub('', _fetch(url).decode('utf-8'))
+    written = {}
+    if name.endswith('.css'):
+        stem = name.rsplit('.', 1)[0]
+        local = {}
+        for _, ref in _CSS_URL.findall(text):
+            if not _is_file(ref) or ref in local:
+                continue
+            absolute = urljoin(url, ref)
+            filename = posixpath.basename(urlsplit(absolute).path)
+            (root / stem).mkdir(parents=True, exist_ok=True)
+            payload = _fetch(absolute)
+            (root / stem / filename).write_bytes(payload)
+            written[f'{VENDOR_DIR}/{stem}/{filename}'] = hashlib.sha256(payload).hexdigest()
+            local[ref] = f'{stem}/{filename}'
+        text = _CSS_URL.sub(lambda m: f'url({local[m.group(2)]})' if m.group(2) in local else m.group(0), text)
+    data = text.encode('utf-8')
+    root.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(data)
+    written[f'{VENDOR_DIR}/{name}'] = hashlib.sha256(data).hexdigest()
+    return written
+
+
+def lock_path():
+    return source_root() / VENDOR_DIR / 'lock.json'
+
+
+def load_lock():
+    try:
+        with open(lock_path()) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_lock(lock):
+    with open(lock_path(), 'w') as fh:
+        json.dump(lock, fh, indent=1, sort_keys=True)
+
+
+def verify_lock(lock):
+    """Paths whose vendored content no longer matches the lock file."""
+    root = source_root()
+    return [path for path, digest in sorted(lock.items())
+            if not (root / path).exists() or hashlib.sha256((root / path).read_bytes()).hexdigest() != digest]
+
+
+# ---------------- Bundling ----------------
+def _squeeze_css(css):
+    css = re.sub(r'\s+', ' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    return css.replace(': ', ':').replace(';}', '}')
+
+
+def minify_css(css):
+    """Drop comments (keeping /*! licences */) and insignificant whitespace, leaving strings alone."""
+    if rcssmin is not None:
+        return rcssmin.cssmin(css, keep_bang_comments=True)
+
+    def pieces(text, handle_plain, handle_comment):
+        out, pos = [], 0
+        for match in _CSS_COMMENT_OR_STRING.finditer(text):
+            out.append(handle_plain(text[pos:match.start()]))
+            comment, string = match.groups()
+            out.append(handle_comment(comment) if comment else string)
+            pos = match.end()
+        out.append(handle_plain(text[pos:]))
+        return ''.join(out)
+
+    without_comments = pieces(css, lambda s: s, lambda c: c if c.startswith('/*!') else ' ')
+    return pieces(without_comments, _squeeze_css, lambda c: c).strip()
+
+
+def minify_js(js):
+    """
+    rjsmin when it is installed. Otherwise only blank lines and trailing
+    whitespace go; anything cleverer needs a real tokenizer, and gzip/brotli
+    take care of the indentation.
+    """
+    if rjsmin is not None:
+        return rjsmin.jsmin(js, keep_bang_comments=True)
+    return '\n'.join(line.rstrip() for line in js.splitlines() if line.strip())
+
+
+def rebase_css_urls(css, part):
+    """Rewrite `part`'s relative url()s so they resolve from static/dist/."""
+    base = posixpath.dirname(part)
+
+    def rebase(match):
+        ref = match.group(2)
+        if not _is_file(ref) or urlsplit(ref).scheme or ref.startswith('/'):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(base, ref))
+        return f'url("{posixpath.relpath(target, DIST_DIR)}")'
+
+    return _CSS_URL.sub(rebase, css)
+
+
+class MissingPart(Exception):
+    pass
+
+
+def build(name):
+    """Concatenate and minify bundle `name` into static/dist/; returns (source bytes, bundle bytes)."""
+    root = source_root()
+    sources = []
+    for part in BUNDLES[name]:
+        path = root / part
+        if not path.exists():
+            hint = " (run build_assets --vendor)" if vendor_name(part) else ""
+            raise MissingPart(f"{name}: {part} not found{hint}")
+        text = path.read_text(encoding='utf-8')
+        if name.endswith('.css'):
+            text = rebase_css_urls(text, part)
+        sources.append(text)
+
+    if name.endswith('.css'):
+        output = '\n'.join(minify_css(text) for text in sources)
+    else:
+        # a part without a trailing semicolon must not run into the next one
+        output = '\n;'.join(minify_js(text) for text in sources)
+    target = root / bundle_path(name)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(output + '\n', encoding='utf-8')
+    return sum(len(text.encode()) for text in sources), target.stat().st_size
+
+
+# ---------------- Serving ----------------
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed, pre-compressed names once collectstatic has written the manifest;
+    plain names before that (tests, a checkout nobody has collected yet)
+    rather than a "missing manifest entry" error on every page.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
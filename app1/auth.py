@@ -0,0 +1,32 @@
+"""
+Authentication backend that keeps request.user off the database.
+
+AuthenticationMiddleware resolves request.user on every request with a
+session by calling the backend's get_user(), which is one query. Here that
+read goes through the cache under the user's scope (app1/cache.py), which
+the User signals bump on every save except a last_login update. A password
+change therefore invalidates the entry at once, and with it the session hash
+it is checked against. Entries also expire after AUTH_USER_CACHE_SECONDS, which
+bounds how long a per-process cache in another worker can lag.
+
+Logging in is unchanged: authenticate() still checks the password hash.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache as django_cache
+
+from . import cache
+
+TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_SECONDS', 60)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = cache.make_key('authuser', cache.user_scope(user_id))
+        user = django_cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            django_cache.set(key, user, TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
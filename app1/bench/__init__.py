@@ -0,0 +1,27 @@
+"""
+Load-testing and benchmark suite for the hot endpoints.
+
+    python -m app1.bench seed --blogs 5000 --users 500
+    python -m app1.bench run --mode inprocess --concurrency 8 --duration 30
+    python -m app1.bench run --mode gunicorn --workers 3 --mix home=3,blog_detail=5,toggle_like=1
+    python -m app1.bench run --mix blog_detail=1 --env VIEW_COUNTER_ENABLED=False
+    python -m app1.bench run --mix home=1 --auth-ratio 1 --env SESSION_MODE=cached_db
+    python -m app1.bench compare
+
+The suite runs against its own SQLite database in bench-results/ (override
+with BENCH_DATABASE_URL), with the AI client and the upload storage backend
+replaced by app1.ai.FakeChatClient and app1.uploads.StubStorageBackend, so
+no OpenAI or Cloudinary credentials are needed and nothing leaves the machine.
+SQLite takes one writer at a time, so toggle_like/add_comment under
+concurrency show up as `database is locked` 500s there; point
+BENCH_DATABASE_URL at PostgreSQL for write numbers that mean something.
+
+`run` drives a weighted mix of endpoints at fixed concurrency, either calling
+`project1.wsgi.application` directly from worker threads (inprocess) or over
+HTTP against a local `gunicorn project1.wsgi` (gunicorn), and reports
+p50/p95/p99 latency, RPS and peak RSS per worker. Each run is saved as JSON
+and appended to bench-results/history.ndjson; `compare` prints the trend.
+`--env KEY=VALUE` sets a setting for the app under test (it is read from the
+environment like any deployment's); runs are only compared with runs that
+used the same overrides.
+"""
@@ -0,0 +1,199 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import app1.bench
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+RESULTS_DIR = BASE_DIR / 'bench-results'
+
+# Must be in place before Django reads its settings. Real credentials are never
+# needed: the AI client and upload backend are stubbed, and the database is the
+# benchmark's own.
+BENCH_ENV = {
+    'DATABASE_URL': os.environ.get('BENCH_DATABASE_URL', f"sqlite:///{RESULTS_DIR / 'bench.sqlite3'}"),
+    'AI_CLIENT_CLASS': 'app1.ai.FakeChatClient',
+    'UPLOAD_STORAGE_BACKEND': 'app1.uploads.StubStorageBackend',
+}
+BENCH_DEFAULTS = {
+    'DJANGO_SETTINGS_MODULE': 'project1.settings',
+    'SECRET_KEY': 'benchmark-only',
+    'OPENAI_API_KEY': 'unused',
+    'DEBUG': 'False',
+    'ALLOWED_HOSTS': 'localhost,127.0.0.1',
+    'APP1_REQUEST_LOG_LEVEL': 'WARNING',
+}
+
+
+def configure_environment(overrides=()):
+    RESULTS_DIR.mkdir(exist_ok=True)
+    os.environ.update(BENCH_ENV)
+    for key, value in BENCH_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ.update(overrides)
+
+
+def parse_env(pairs):
+    overrides = {}
+    for pair in pairs or ():
+        key, sep, value = pair.partition('=')
+        if not sep or not key:
+            sys.exit(f"--env expects KEY=VALUE, got {pair!r}")
+        overrides[key] = value
+    return overrides
+
+
+def cmd_seed(args):
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+
+    from app1.bench.seed import seed_dataset
+    from app1.models import Blogs
+
+    call_command('migrate', verbosity=0)
+    if Blogs.objects.exists() or User.objects.exists():
+        if not args.force:
+            sys.exit("The benchmark database already has data; pass --force to wipe it and reseed.")
+        call_command('flush', interactive=False, verbosity=0)
+    started = time.perf_counter()
+    seed_dataset(users=args.users, blogs=args.blogs, comments=args.comments, likes=args.likes,
+                 follows=args.follows)
+    print(f"Seeded {args.users} users, {args.blogs} blogs, {args.comments} comments, "
+          f"~{args.likes} likes, ~{args.follows} follows in {time.perf_counter() - started:.1f}s")
+
+
+def _dataset():
+    from django.contrib.auth.models import User
+
+    from app1.models import Blogs
+
+    # comments grow with every add_comment run, so only the seeded tables identify a dataset
+    return f"{User.objects.count()}u/{Blogs.objects.count()}b"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"gunicorn exited with status {process.returncode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"gunicorn didn't start listening on port {port} within {timeout}s")
+
+
+def cmd_run(args):
+    from app1.bench import load, results
+
+    mix = load.parse_mix(args.mix)
+    config = {
+        'mode': args.mode, 'mix': args.mix, 'concurrency': args.concurrency, 'duration': args.duration,
+        'warmup': args.warmup, 'auth_ratio': args.auth_ratio, 'dataset': _dataset(),
+        'database': os.environ['DATABASE_URL'].split(':', 1)[0],
+        'workers': args.workers if args.mode == 'gunicorn' else None,
+        'threads': args.threads if args.mode == 'gunicorn' else None,
+        'env': args.env,
+    }
+    print(f"{args.mode}: {args.concurrency} virtual users for {args.duration}s "
+          f"(+{args.warmup}s warm-up) against {config['dataset']}", file=sys.stderr)
+
+    if args.mode == 'inprocess':
+        from project1.wsgi import application
+
+        outcome = load.drive(
+            load.WSGITransport(application), mix, args.concurrency, args.duration,
+            warmup=args.warmup, auth_ratio=args.auth_ratio, sample_memory=load.process_memory,
+        )
+    else:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'project1.wsgi', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning'],
+            cwd=BASE_DIR, env=os.environ.copy(),
+        )
+        try:
+            _wait_for_port(port, server)
+            outcome = load.drive(
+                load.HTTPTransport('127.0.0.1', port), mix, args.concurrency, args.duration,
+                warmup=args.warmup, auth_ratio=args.auth_ratio, sample_memory=load.worker_memory(server.pid),
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    summary = results.summarize(*outcome)
+    print(results.format_summary(summary))
+    if not args.no_save:
+        path = results.save(args.results_dir, config, summary)
+        print(f"Saved {path}", file=sys.stderr)
+
+
+def cmd_compare(args):
+    from app1.bench import results
+
+    print(results.format_trend(results.load_history(args.results_dir), last=args.last))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m app1.bench', description=app1.bench.__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--results-dir', default=RESULTS_DIR, type=Path)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    seed = sub.add_parser('seed', help="create the benchmark database and fill it")
+    seed.add_argument('--users', type=int, default=500)
+    seed.add_argument('--blogs', type=int, default=5000)
+    seed.add_argument('--comments', type=int, default=20000)
+    seed.add_argument('--likes', type=int, default=20000)
+    seed.add_argument('--follows', type=int, default=10000)
+    seed.add_argument('--force', action='store_true', help="wipe an existing dataset first")
+    seed.set_defaults(func=cmd_seed)
+
+    run = sub.add_parser('run', help="drive the endpoints and record the results")
+    run.add_argument('--mode', choices=('inprocess', 'gunicorn'), default='inprocess')
+    run.add_argument('--mix', default=None,
+                     help="comma-separated endpoint=weight (default: a read-heavy mix of all six)")
+    run.add_argument('--concurrency', type=int, default=8, help="virtual users")
+    run.add_argument('--duration', type=float, default=30, help="measured seconds")
+    run.add_argument('--warmup', type=float, default=3, help="seconds run but not measured")
+    run.add_argument('--auth-ratio', type=float, default=0.5,
+                     help="fraction of virtual users that are logged in")
+    run.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    run.add_argument('--threads', type=int, default=1, help="gunicorn threads per worker")
+    run.add_argument('--env', action='append', metavar='KEY=VALUE',
+                     help="a setting for the app under test, e.g. VIEW_COUNTER_ENABLED=False (repeatable)")
+    run.add_argument('--no-save', action='store_true', help="don't record the run in the history")
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser('compare', help="show the trend of runs like the latest one")
+    compare.add_argument('--last', type=int, default=10)
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.env = parse_env(getattr(args, 'env', None))
+    configure_environment(args.env)
+    import django
+
+    django.setup()
+    if args.command == 'run' and args.mix is None:
+        from app1.bench.load import DEFAULT_MIX
+
+        args.mix = DEFAULT_MIX
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Fixed-concurrency load generator.
+
+Each virtual user is a thread that picks endpoints from a weighted mix and
+issues them back to back until the deadline; latency is measured around the
+full request, including reading the body. A virtual user is either anonymous
+or logged in through a session created up front (sessionid + csrftoken
+cookies), and anonymous users only draw from the endpoints that don't need a
+login.
+"""
+import http.client
+import io
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from app1.models import Blogs
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    login_required: bool = False
+
+
+ENDPOINTS = {e.name: e for e in (
+    Endpoint('home', 'GET'),
+    Endpoint('all_blogs', 'GET'),
+    Endpoint('blog_detail', 'GET'),
+    Endpoint('load_more_blogs', 'GET'),
+    Endpoint('toggle_like', 'POST', login_required=True),
+    Endpoint('add_comment', 'POST', login_required=True),
+)}
+DEFAULT_MIX = 'home=3,all_blogs=2,blog_detail=5,load_more_blogs=2,toggle_like=1,add_comment=1'
+
+
+def parse_mix(text):
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("the mix has no endpoint with a positive weight")
+    return mix
+
+
+class Targets:
+    """Blog ids to request, skewed towards the newest posts."""
+
+    def __init__(self, sample=500):
+        self.blog_ids = list(Blogs.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:sample])
+        if not self.blog_ids:
+            raise RuntimeError("no blogs to request; run `python -m app1.bench seed` first")
+
+    def blog_id(self, rng):
+        # roughly Zipf: a few posts get most of the traffic
+        return self.blog_ids[min(int(rng.paretovariate(1.2)) - 1, len(self.blog_ids) - 1)]
+
+    def request(self, name, rng):
+        """(method, path, form data) for one hit on endpoint `name`."""
+        if name == 'home':
+            return 'GET', reverse('home'), None
+        if name == 'all_blogs':
+            return 'GET', reverse('all_blogs'), None
+        if name == 'load_more_blogs':
+            return 'GET', reverse('load_more_blogs'), None
+        if name == 'blog_detail':
+            return 'GET', reverse('blog_detail', args=[self.blog_id(rng)]), None
+        if name == 'toggle_like':
+            return 'POST', reverse('blog_like', args=[self.blog_id(rng)]), {}
+        if name == 'add_comment':
+            return 'POST', reverse('add_comment', args=[self.blog_id(rng)]), {'content': f"Benchmark comment {rng.random():.6f}"}
+        raise KeyError(name)
+
+
+def login_cookies(user):
+    """Cookies for an authenticated session of `user`, without going through the login view."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()  # signed cookies only get their key (the cookie value) here
+    # an unmasked CSRF secret is accepted both as the cookie and as the header
+    return {settings.SESSION_COOKIE_NAME: session.session_key, settings.CSRF_COOKIE_NAME: secrets.token_hex(16)}
+
+
+# ---------------- Transports ----------------
+class WSGITransport:
+    """Calls the WSGI application directly, in this process."""
+
+    def __init__(self, application, host='localhost'):
+        self.application = application
+        self.host = host
+
+    def __call__(self, method, path, body, headers):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': self.host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(body or b''),
+            'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+            'wsgi.run_once': False, 'CONTENT_LENGTH': str(len(body or b'')),
+        }
+        for key, value in headers.items():
+            key = key.upper().replace('-', '_')
+            environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+        status = []
+        result = self.application(environ, lambda s, h, exc_info=None: status.append(s))
+        try:
+            size = sum(len(chunk) for chunk in result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(status[0].split()[0]), size
+
+
+class HTTPTransport:
+    """One keep-alive connection per virtual user to a running server."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self._local = threading.local()
+
+    def __call__(self, method, path, body, headers):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            size = len(response.read())
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+        return response.status, size
+
+
+# ---------------- Driver ----------------
+def _virtual_user(transport, targets, mix, cookies, deadline, warmup_until, seed, results):
+    rng = random.Random(seed)
+    if cookies is None:
+        mix = {name: w for name, w in mix.items() if not ENDPOINTS[name].login_required}
+    names, weights = list(mix), list(mix.values())
+    if not any(weights):
+        return
+    base_headers = {'Host': 'localhost'}
+    if cookies:
+        base_headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in cookies.items())
+        base_headers['X-CSRFToken'] = cookies[settings.CSRF_COOKIE_NAME]
+
+    while (now := time.perf_counter()) < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, data = targets.request(name, rng)
+        headers = dict(base_headers)
+        body = None
+        if method == 'POST':
+            body = urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['X-Requested-With'] = 'XMLHttpRequest'
+        try:
+            status, size = transport(method, path, body, headers)
+        except Exception as exc:
+            status, size = type(exc).__name__, 0
+        elapsed = time.perf_counter() - now
+        if now >= warmup_until:
+            results[name].append((elapsed, status, size))
+
+
+def drive(transport, mix, concurrency, duration, warmup=0.0, auth_ratio=0.5, seed=1, sample_memory=None):
+    """Run the load; returns {endpoint: [(seconds, status, bytes), ...]}, the
+    measured wall time, and the peak memory samples from `sample_memory()`."""
+    targets = Targets()
+    logged_in = round(concurrency * auth_ratio)
+    users = list(User.objects.filter(is_staff=False).order_by('pk')[:logged_in])
+    cookies = [login_cookies(u) for u in users] + [None] * (concurrency - len(users))
+
+    per_thread = [defaultdict(list) for _ in range(concurrency)]
+    start = time.perf_counter()
+    warmup_until = start + warmup
+    deadline = warmup_until + duration
+    threads = [
+        threading.Thread(target=_virtual_user, daemon=True, args=(
+            transport, targets, mix, cookies[i], deadline, warmup_until, seed + i, per_thread[i]))
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+
+    peak = {}
+    while any(t.is_alive() for t in threads):
+        if sample_memory is not None:
+            for worker, rss in sample_memory().items():
+                peak[worker] = max(peak.get(worker, 0), rss)
+        for t in threads:
+            t.join(timeout=0.25)
+    wall = time.perf_counter() - warmup_until
+
+    merged = defaultdict(list)
+    for results in per_thread:
+        for name, hits in results.items():
+            merged[name].extend(hits)
+    return merged, wall, peak
+
+
+# ---------------- Memory ----------------
+def rss_mb(pid='self'):
+    """Resident set size of `pid` in MiB, from /proc (Linux); None elsewhere."""
+    try:
+        with open(f'/proc/{pid}/status') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as fh:
+            return [int(p) for p in fh.read().split()]
+    except OSError:
+        return []
+
+
+def process_memory():
+    rss = rss_mb()
+    return {} if rss is None else {f'pid-{os.getpid()}': rss}
+
+
+def worker_memory(master_pid):
+    def sample():
+        return {f'pid-{pid}': rss for pid in child_pids(master_pid) if (rss := rss_mb(pid)) is not None}
+    return sample
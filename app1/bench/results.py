@@ -0,0 +1,129 @@
+"""Summaries of a run, and the on-disk history runs are compared against."""
+import json
+import math
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _latency(hits, wall):
+    latencies = sorted(seconds for seconds, _, _ in hits)
+    errors = sum(1 for _, status, _ in hits if not isinstance(status, int) or status >= 500)
+    summary = {
+        'requests': len(hits),
+        'errors': errors,
+        'rps': round(len(hits) / wall, 1) if wall else 0.0,
+        'mean_bytes': round(sum(size for _, _, size in hits) / len(hits)) if hits else 0,
+    }
+    for pct in PERCENTILES:
+        value = percentile(latencies, pct)
+        summary[f'p{pct}_ms'] = None if value is None else round(value * 1000, 2)
+    return summary
+
+
+def summarize(results, wall, memory):
+    everything = [hit for hits in results.values() for hit in hits]
+    statuses = {}
+    for _, status, _ in everything:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'total': {**_latency(everything, wall), 'statuses': statuses},
+        'endpoints': {name: _latency(hits, wall) for name, hits in sorted(results.items())},
+        'memory_mb': {worker: round(rss, 1) for worker, rss in sorted(memory.items())},
+        'wall_seconds': round(wall, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save(results_dir, config, summary):
+    """Write the run to <results_dir>/<timestamp>-<mode>.json and append it to history.ndjson."""
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    now = timezone.now()
+    record = {
+        'timestamp': now.isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'config': config,
+        **summary,
+    }
+    path = results_dir / f"{now:%Y%m%d-%H%M%S}-{config['mode']}.json"
+    path.write_text(json.dumps(record, indent=2, sort_keys=True) + '\n')
+    with open(results_dir / 'history.ndjson', 'a') as fh:
+        fh.write(json.dumps(record, sort_keys=True) + '\n')
+    return path
+
+
+def load_history(results_dir):
+    path = Path(results_dir) / 'history.ndjson'
+    if not path.exists():
+        return []
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def comparable(record, other):
+    """Runs are only compared with runs of the same mode, mix, concurrency, settings and dataset."""
+    keys = ('mode', 'mix', 'concurrency', 'workers', 'threads', 'dataset', 'env')
+    return all(record['config'].get(k) == other['config'].get(k) for k in keys)
+
+
+def format_summary(summary):
+    lines = [f"{'endpoint':<16} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    rows = [*summary['endpoints'].items(), ('TOTAL', summary['total'])]
+    for name, s in rows:
+        lines.append(
+            f"{name:<16} {s['requests']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+            + ' '.join(f"{s[f'p{p}_ms'] if s[f'p{p}_ms'] is not None else '-':>8}" for p in PERCENTILES)
+        )
+    if summary['memory_mb']:
+        lines.append("peak RSS: " + ', '.join(f"{w} {mb:.0f} MiB" for w, mb in summary['memory_mb'].items()))
+    return '\n'.join(lines)
+
+
+def _delta(new, old):
+    if new is None or not old:
+        return ''
+    return f" ({(new - old) / old * 100:+.0f}%)"
+
+
+def format_trend(history, last=10):
+    """One line per run of the newest run's kind, oldest first, with changes against the run before."""
+    if not history:
+        return "No runs recorded yet."
+    latest = history[-1]
+    runs = [r for r in history if comparable(r, latest)][-last:]
+    c = latest['config']
+    lines = [f"mode={c['mode']} concurrency={c['concurrency']} mix={c['mix']} dataset={c['dataset']}",
+             f"{'when':<25} {'rev':<9} {'rps':>16} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16} {'peak MiB':>9}"]
+    previous = None
+    for run in runs:
+        t = run['total']
+        p = previous['total'] if previous else {}
+        peak = max(run['memory_mb'].values(), default=0)
+        cells = [f"{t['rps']}{_delta(t['rps'], p.get('rps'))}"]
+        cells += [f"{t[f'p{q}_ms']}{_delta(t[f'p{q}_ms'], p.get(f'p{q}_ms'))}" for q in PERCENTILES]
+        lines.append(f"{run['timestamp']:<25} {run['revision'] or '-':<9} "
+                     + ' '.join(f"{cell:>16}" for cell in cells) + f" {peak:>9.0f}")
+        previous = run
+    return '\n'.join(lines)
@@ -0,0 +1,56 @@
+import random
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from app1 import feeds
+from app1.models import Blogs, Comment, Follow, Profile
+from app1.search import get_backend
+
+WORDS = "django query cache index page blog reader writer story idea code".split()
+
+
+def seed_dataset(users=300, blogs=2000, comments=5000, likes=5000, follows=3000, seed=7):
+    """Bulk-create a realistically sized dataset (signals don't fire, so
+    counters, search index and profiles are filled in explicitly).
+
+    Comments go to the 200 newest-created posts and likes to the first 500,
+    so a few posts are busy and most are quiet, as on the real site. Follows
+    go to the first tenth of the users, so a few authors are popular.
+    """
+    rng = random.Random(seed)
+
+    people = User.objects.bulk_create([
+        User(username=f"reader{i}", first_name=f"First{i}", last_name=f"Last{i}")
+        for i in range(users)
+    ], batch_size=1000)
+    Profile.objects.bulk_create([Profile(user=u) for u in people], batch_size=1000)
+
+    posts = []
+    for i in range(blogs):
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 400)))
+        blog = Blogs(title=f"Post {i} {rng.choice(WORDS)}", content=f"<p>{body}</p>",
+                     author=rng.choice(people))
+        blog.refresh_text_fields()
+        posts.append(blog)
+    posts = Blogs.objects.bulk_create(posts, batch_size=500)
+
+    busy = posts[:200]
+    Comment.objects.bulk_create([
+        Comment(blog=rng.choice(busy), user=rng.choice(people), content="Nice post")
+        for _ in range(comments)
+    ], batch_size=1000)
+    pairs = {(rng.choice(posts[:500]).id, rng.choice(people).id) for _ in range(likes)}
+    Blogs.likes.through.objects.bulk_create(
+        [Blogs.likes.through(blogs_id=b, user_id=u) for b, u in pairs], batch_size=1000
+    )
+    # a handful of popular authors get most of the follows
+    edges = {(rng.choice(people).id, rng.choice(people[:max(1, users // 10)]).id) for _ in range(follows)}
+    Follow.objects.bulk_create(
+        [Follow(follower_id=f, author_id=a) for f, a in edges if f != a], batch_size=1000
+    )
+    call_command("rebuild_counters", stdout=StringIO())
+    feeds.rebuild()
+    get_backend().rebuild()
+    return people, posts
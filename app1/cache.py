@@ -0,0 +1,101 @@
+"""
+Versioned cache keys for pages and template fragments.
+
+Nothing is ever deleted from the cache. Instead every cacheable thing
+belongs to a *scope* ("blogs", "blog:<id>", "comments:<id>", "user:<id>") that has a
+version number in the cache, and that version is part of every key built for
+the scope. The signals in app1/signals.py bump the version when the
+underlying rows change, so the old entries can never be read again; they just
+age out of the backend.
+
+A missing version (never set, or evicted) is re-seeded from the clock rather
+than restarting at 1, so an evicted counter can't bring back old entries.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .pagination import KeysetPage
+
+TIMEOUT = getattr(settings, 'APP1_CACHE_TIMEOUT', 60 * 60)
+
+LIST_SCOPE = 'blogs'
+
+
+def blog_scope(blog_id):
+    return f'blog:{blog_id}'
+
+
+def comments_scope(blog_id):
+    return f'comments:{blog_id}'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def _version_key(scope):
+    return f'app1:v:{scope}'
+
+
+def get_versions(scopes):
+    """Return {scope: version} for all scopes in one cache round trip."""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, scope in keys.items():
+        if scope not in versions:
+            seed = time.time_ns()
+            # another process may have seeded it first; whichever wins is used
+            if not cache.add(key, seed, timeout=None):
+                seed = cache.get(key, seed)
+            versions[scope] = seed
+    return versions
+
+
+def get_version(scope):
+    return get_versions([scope])[scope]
+
+
+def bump(*scopes):
+    """Invalidate everything cached under `scopes`."""
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def make_key(name, scope, *parts):
+    version = get_version(scope)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'app1:{name}:{scope}:{version}:{suffix}'
+
+
+def attach_versions(blogs):
+    """
+    Set `blog.cache_version` on each blog so templates can key per-card
+    fragments with `{% cache ... blog.id blog.cache_version %}`.
+    """
+    blogs = list(blogs)
+    versions = get_versions([blog_scope(blog.pk) for blog in blogs])
+    for blog in blogs:
+        blog.cache_version = versions[blog_scope(blog.pk)]
+    return blogs
+
+
+def cached_page(paginator, cursor, name, scope=LIST_SCOPE):
+    """
+    KeysetPaginator.page(cursor), memoized under `scope` (the listing scope
+    by default) so warm listing requests skip the database entirely.
+    """
+    key = make_key(name, scope, paginator.per_page, cursor or '')
+    hit = cache.get(key)
+    if hit is not None:
+        rows, next_cursor, previous_cursor = hit
+        return KeysetPage(rows, paginator, next_cursor, previous_cursor)
+    page = paginator.page(cursor)
+    cache.set(key, (page.object_list, page.next_cursor, page.previous_cursor), TIMEOUT)
+    return page
@@ -0,0 +1,80 @@
+"""
+Conditional GET for blog_detail, all_blogs and load_more_blogs.
+
+Each of these pages is fully described by a few cheap versions:
+- Blogs.updated_at: one post's, or the newest of them for a listing.
+- The scope versions in app1/cache.py, which are read from the cache, not
+  the database.
+- For a logged-in viewer, who they are and their own state on the page.
+
+The view hashes these into an ETag before rendering anything. A browser
+that already has that version gets an empty 304 after the single query that
+reads updated_at, and no template is rendered.
+
+Pages for anonymous visitors contain nothing per-visitor, so they are
+`public, max-age=0, must-revalidate`: shared caches may keep them, but must
+check back every time. Logged-in pages carry CSRF tokens and the viewer's
+likes, so they are `private` and send no Last-Modified: a post's timestamp
+doesn't cover the viewer's own state. Both vary on Cookie. A request with
+flash messages waiting is always rendered: a 304 would leave them queued for
+whatever page comes next. The load_more_blogs
+fragment is the same for everyone and is public without Vary.
+"""
+import hashlib
+
+from django.contrib import messages
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import cache
+
+
+def page_etag(request, scopes, *parts, per_viewer=True):
+    """
+    (etag, versions) for a page built from `scopes` (see app1/cache.py) and
+    `parts`. The versions come back so the view can key its fragments without
+    another cache round trip. per_viewer=False is for fragments that look the
+    same to everyone; then the session and user aren't loaded at all.
+    """
+    scopes = list(scopes)
+    user = request.user if per_viewer else None
+    if user is None:
+        viewer = ()
+    elif user.is_authenticated:
+        # the navigation card, and the CSRF secret behind the tokens the
+        # forms embed (get_token() creates it now if this is the first page)
+        scopes.append(cache.user_scope(user.pk))
+        get_token(request)
+        viewer = (user.pk, user.is_staff, request.META['CSRF_COOKIE'])
+    else:
+        viewer = ('anon',)
+    versions = cache.get_versions(scopes)
+    key = '|'.join(str(part) for part in (*parts, *viewer, *(versions[scope] for scope in scopes)))
+    return f'"{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()}"', versions
+
+
+def respond(request, etag, last_modified, render, per_viewer=True):
+    """
+    A 304 if the request's validators match `etag`/`last_modified`,
+    otherwise render(); either way with the validators and caching headers.
+    """
+    private = per_viewer and request.user.is_authenticated
+    if private:
+        last_modified = None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    # len() reads the storage without marking the messages as shown
+    pending = per_viewer and len(messages.get_messages(request))
+    response = None if pending else get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+    response.headers['ETag'] = etag
+    if timestamp is not None:
+        response.headers['Last-Modified'] = http_date(timestamp)
+    if private:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    if per_viewer:
+        patch_vary_headers(response, ('Cookie',))
+    return response
@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import usercards
+
+
+def user_card(request):
+    """`user_card` for base.html; only looked up when a template uses it."""
+    return {'user_card': SimpleLazyObject(lambda: usercards.for_request(request))}
@@ -0,0 +1,133 @@
+"""
+Streaming export of blogs, comments, feedback, contact messages and
+engagement (likes/bookmarks).
+
+Rows are read with `.values_list(...).iterator()` (a server-side cursor on
+PostgreSQL, chunked fetches elsewhere) and turned into bytes one row at a
+time, so exporting a large table takes constant memory whether the output
+goes to a StreamingResponse (admin actions, streamed under ASGI too, see
+app1/streaming.py) or a file (`manage.py export_data`).
+
+NDJSON lines use the dumpdata record shape, {"model", "pk", "fields"}, so an
+export can be fed straight back to `manage.py import_data`. CSV has a header
+row of `pk` plus the field names. Either can be gzipped on the fly.
+"""
+import csv
+import zlib
+from dataclasses import dataclass
+
+from cloudinary.models import CloudinaryField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Blogs, Comment, ContactMessage, Feedback
+from .streaming import StreamingResponse
+
+CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    label: str                   # dumpdata model label
+    model: type
+    fields: tuple                # FKs by attname, exported under their field name
+    incremental: bool = True     # has created_at, so `since` applies
+
+    def queryset(self):
+        return self.model._default_manager.order_by('pk')
+
+
+EXPORTS = {
+    'blogs': ExportSpec('app1.blogs', Blogs, ('title', 'content', 'author_id', 'image', 'created_at')),
+    'comments': ExportSpec('app1.comment', Comment, ('blog_id', 'user_id', 'parent_id', 'content', 'created_at')),
+    'feedback': ExportSpec('app1.feedback', Feedback, ('name', 'email', 'message', 'created_at')),
+    'contact_messages': ExportSpec('app1.contactmessage', ContactMessage, ('name', 'email', 'message', 'created_at')),
+    'likes': ExportSpec('app1.blogs_likes', Blogs.likes.through, ('blogs_id', 'user_id'), incremental=False),
+    'bookmarks': ExportSpec('app1.blogs_bookmarks', Blogs.bookmarks.through, ('blogs_id', 'user_id'), incremental=False),
+}
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _names(spec):
+    return [name[:-3] if name.endswith('_id') else name for name in spec.fields]
+
+
+def rows(spec, queryset=None, since=None):
+    """(pk, values) tuples for `spec`, oldest first, read lazily."""
+    queryset = spec.queryset() if queryset is None else queryset.order_by('pk')
+    if since is not None:
+        if not spec.incremental:
+            raise ValueError(f"{spec.label} has no timestamp; incremental export isn't possible")
+        queryset = queryset.filter(created_at__gte=since)
+    return _iter_rows(spec, queryset)
+
+
+def _iter_rows(spec, queryset):
+    # CloudinaryField hands back CloudinaryResource objects; export the stored string
+    fields = [spec.model._meta.get_field(name) for name in spec.fields]
+    prep = [f.get_prep_value if isinstance(f, CloudinaryField) else None for f in fields]
+    for row in queryset.values_list('pk', *spec.fields).iterator(chunk_size=CHUNK_SIZE):
+        values = row[1:]
+        if any(prep):
+            values = tuple(p(v) if p and v else v for p, v in zip(prep, values))
+        yield row[0], values
+
+
+class _Echo:
+    """csv.writer target that hands back the formatted line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(spec, records):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    names = _names(spec)
+    for pk, values in records:
+        yield encoder.encode({'model': spec.label, 'pk': pk, 'fields': dict(zip(names, values))}) + '\n'
+
+
+def csv_lines(spec, records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['pk', *_names(spec)])
+    for pk, values in records:
+        yield writer.writerow([pk, *(v.isoformat() if hasattr(v, 'isoformat') else v for v in values)])
+
+
+def encode(lines, gzip=False, buffer_size=64 * 1024):
+    """Join text lines into ~buffer_size byte chunks, gzip-compressed if asked."""
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # 31 = gzip container
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            chunk = b''.join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b''.join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def stream(name, fmt='ndjson', since=None, gzip=False, queryset=None):
+    """Bytes of the export `name` in `fmt`, produced lazily."""
+    spec = EXPORTS[name]
+    records = rows(spec, queryset=queryset, since=since)
+    lines = ndjson_lines(spec, records) if fmt == 'ndjson' else csv_lines(spec, records)
+    return encode(lines, gzip=gzip)
+
+
+def response(name, fmt='ndjson', since=None, gzip=False, queryset=None):
+    filename = f"{name}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}" + ('.gz' if gzip else '')
+    resp = StreamingResponse(
+        stream(name, fmt, since=since, gzip=gzip, queryset=queryset),
+        content_type='application/gzip' if gzip else FORMATS[fmt],
+    )
+    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return resp
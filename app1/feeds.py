@@ -0,0 +1,205 @@
+"""
+Personalised "following" timelines.
+
+Publishing a post writes one FeedEntry row per follower of its author (fan-out
+on write), so reading a feed is one range scan of the reader's own rows, however
+many authors they follow. Each feed is capped at FEED_MAX_LENGTH entries and
+trimmed as it is written.
+
+Authors with FEED_FANOUT_MAX_FOLLOWERS or more followers are not fanned out,
+because one post would mean that many inserts. Their posts are read from Blogs
+at request time (fan-out on read) and merged into the page. That costs one
+more indexed query, and only while such authors exist at all. When an author
+drops back under the threshold, their recent posts are copied into every
+follower's feed so what was merged at read time doesn't disappear.
+
+bulk imports fire no signals; Importer.finish rebuilds the feeds of the
+followers of every author it imported posts for.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Blogs, BlogsQuerySet, FeedEntry, Follow, Profile
+from .pagination import InvalidCursor, KeysetPage, decode_cursor, encode_cursor
+
+MAX_LENGTH = getattr(settings, 'FEED_MAX_LENGTH', 500)
+FANOUT_MAX_FOLLOWERS = getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 1000)
+BACKFILL = getattr(settings, 'FEED_BACKFILL', 20)
+BATCH_SIZE = 500
+
+HOT_AUTHORS_KEY = 'app1:feed:hot-authors'
+HOT_AUTHORS_TIMEOUT = 5 * 60
+
+
+# ---------------- Writes ----------------
+def hot_authors():
+    """Ids of the authors whose posts are merged at read time rather than fanned out."""
+    ids = cache.get(HOT_AUTHORS_KEY)
+    if ids is None:
+        ids = list(Profile.objects.filter(followers_count__gte=FANOUT_MAX_FOLLOWERS)
+                   .values_list('user_id', flat=True))
+        cache.set(HOT_AUTHORS_KEY, ids, HOT_AUTHORS_TIMEOUT)
+    return ids
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def trim(user_ids):
+    """Drop everything past the newest MAX_LENGTH entries of each feed in `user_ids`."""
+    ranked = (
+        FeedEntry.objects.filter(user_id__in=user_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=F('user_id'),
+                              order_by=[F('created_at').desc(), F('blog_id').desc()]))
+        .filter(rank__gt=MAX_LENGTH)
+        .values_list('pk', flat=True)
+    )
+    stale = list(ranked)
+    if stale:
+        FeedEntry.objects.filter(pk__in=stale).delete()
+
+
+def fan_out(blog):
+    """Push a new post into its author's followers' feeds (unless the author is hot)."""
+    if blog.author_id in hot_authors():
+        return
+    followers = (Follow.objects.filter(author_id=blog.author_id)
+                 .values_list('follower_id', flat=True).iterator(chunk_size=BATCH_SIZE))
+    for batch in _chunks(followers, BATCH_SIZE):
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user_id=user_id, blog_id=blog.pk, author_id=blog.author_id, created_at=blog.created_at)
+            for user_id in batch
+        ], ignore_conflicts=True)
+        trim(batch)
+
+
+def backfill(author_id, user_ids):
+    """Copy `author_id`'s newest BACKFILL posts into the feeds of `user_ids`."""
+    recent = list(Blogs.objects.filter(author_id=author_id).order_by('-created_at', '-id')
+                  .values_list('pk', 'created_at')[:BACKFILL])
+    if not recent:
+        return
+    for batch in _chunks(user_ids, BATCH_SIZE):
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user_id=user_id, blog_id=pk, author_id=author_id, created_at=created_at)
+            for user_id in batch for pk, created_at in recent
+        ], ignore_conflicts=True, batch_size=BATCH_SIZE)
+        trim(batch)
+
+
+def toggle_follow(follower, author_id):
+    """
+    Follow/unfollow `author_id` for `follower`, keeping Profile.followers_count
+    and the follower's feed in step. Returns (is_following, followers_count).
+    """
+    link = Follow.objects.filter(follower_id=follower.pk, author_id=author_id)
+    with transaction.atomic():
+        # lock the author's profile so concurrent toggles serialize on the counter;
+        # users created outside the signals (createsuperuser --noinput, raw SQL) may have none yet
+        profile, _ = Profile.objects.select_for_update().only('id').get_or_create(user_id=author_id)
+        if link.delete()[0]:
+            Profile.objects.filter(pk=profile.pk).update(followers_count=F('followers_count') - 1)
+            FeedEntry.objects.filter(user_id=follower.pk, author_id=author_id).delete()
+            is_following = False
+        else:
+            Follow.objects.create(follower_id=follower.pk, author_id=author_id)
+            Profile.objects.filter(pk=profile.pk).update(followers_count=F('followers_count') + 1)
+            is_following = True
+        count = Profile.objects.filter(pk=profile.pk).values_list('followers_count', flat=True).get()
+
+    was_hot = author_id in hot_authors()
+    if (count >= FANOUT_MAX_FOLLOWERS) != was_hot:
+        cache.delete(HOT_AUTHORS_KEY)
+    if was_hot and count < FANOUT_MAX_FOLLOWERS:
+        # no longer merged at read time: their posts were never fanned out
+        followers = Follow.objects.filter(author_id=author_id).values_list('follower_id', flat=True)
+        backfill(author_id, followers.iterator(chunk_size=BATCH_SIZE))
+    elif is_following and count < FANOUT_MAX_FOLLOWERS:
+        # seed the feed with the author's recent posts so it isn't empty until they write again
+        backfill(author_id, [follower.pk])
+    return is_following, count
+
+
+def rebuild(user_ids=None):
+    """
+    Recompute feeds from Follow and Blogs, e.g. after a bulk import (which
+    fires no signals). Returns the number of feeds rebuilt.
+    """
+    cache.delete(HOT_AUTHORS_KEY)
+    hot = hot_authors()
+    followers = Follow.objects.order_by().values_list('follower_id', flat=True).distinct()
+    if user_ids is not None:
+        followers = followers.filter(follower_id__in=user_ids)
+    rebuilt = 0
+    for batch in _chunks(followers.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+        with transaction.atomic():
+            FeedEntry.objects.filter(user_id__in=batch).delete()
+            for user_id in batch:
+                posts = (
+                    Blogs.objects.filter(author_id__in=Follow.objects.filter(follower_id=user_id)
+                                         .exclude(author_id__in=hot).values('author_id'))
+                    .order_by('-created_at', '-id')
+                    .values_list('pk', 'author_id', 'created_at')[:MAX_LENGTH]
+                )
+                FeedEntry.objects.bulk_create([
+                    FeedEntry(user_id=user_id, blog_id=pk, author_id=author_id, created_at=created_at)
+                    for pk, author_id, created_at in posts
+                ], batch_size=BATCH_SIZE)
+        rebuilt += len(batch)
+    return rebuilt
+
+
+# ---------------- Reads ----------------
+def _after(position, created_field, id_field):
+    created_at, pk, _ = position
+    return Q(**{f'{created_field}__lt': created_at}) | Q(**{created_field: created_at, f'{id_field}__lt': pk})
+
+
+def feed_page(user, cursor=None, per_page=None):
+    """
+    One newest-first page of `user`'s feed as a KeysetPage of blog cards.
+    Only "next" cursors are issued: a timeline is read forwards.
+    """
+    per_page = per_page or getattr(settings, 'BLOGS_PAGE_SIZE', 12)
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursor:
+            position = None
+
+    entries = (
+        FeedEntry.objects.filter(user_id=user.pk)
+        .select_related('blog__author')
+        .only('created_at', 'blog_id', *(f'blog__{f}' for f in BlogsQuerySet.CARD_FIELDS))
+        .order_by('-created_at', '-blog_id')
+    )
+    if position:
+        entries = entries.filter(_after(position, 'created_at', 'blog_id'))
+    blogs = {entry.blog_id: entry.blog for entry in entries[:per_page + 1]}
+
+    hot = hot_authors()
+    if hot:
+        merged = (
+            Blogs.objects.cards()
+            .filter(author_id__in=Follow.objects.filter(follower_id=user.pk, author_id__in=hot)
+                    .values('author_id'))
+            .order_by('-created_at', '-id')
+        )
+        if position:
+            merged = merged.filter(_after(position, 'created_at', 'id'))
+        for blog in merged[:per_page + 1]:
+            blogs.setdefault(blog.pk, blog)
+
+    rows = sorted(blogs.values(), key=lambda b: (b.created_at, b.pk), reverse=True)
+    has_next, rows = len(rows) > per_page, rows[:per_page]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk) if has_next else None
+    return KeysetPage(rows, None, next_cursor=next_cursor)
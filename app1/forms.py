@@ -1,13 +1,35 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import Blogs, Feedback, ContactMessage, Profile
+from django.core.files.uploadedfile import UploadedFile
+from . import uploads
+from .models import Blogs, Feedback, ContactMessage, Profile, Tag
 from django.utils.html import strip_tags
 import re
-import bleach
+
+
+def _image_only(value):
+    """Reject a newly uploaded file that isn't an image the upload queue accepts."""
+    if isinstance(value, UploadedFile):
+        try:
+            uploads.check_image(value)
+        except uploads.NotAnImage as exc:
+            raise forms.ValidationError(str(exc))
+    return value
 
 
 class BlogsForms(forms.ModelForm):  # Keep original name so views don't break
+    MAX_TAGS = 8
+
+    tags = forms.CharField(
+        required=False,
+        help_text="Comma-separated, up to 8.",
+        widget=forms.TextInput(attrs={
+            'class': 'form-control shadow-sm rounded-3 border-0',
+            'placeholder': 'e.g. django, performance',
+        }),
+    )
+
     class Meta:
         model = Blogs
         fields = ['title', 'content', 'image']  # author excluded, handled in view
@@ -32,6 +54,27 @@ class BlogsForms(forms.ModelForm):  # Keep original name so views don't break
             'content': 'Content'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and not self.is_bound:
+            self.initial['tags'] = ', '.join(t.name for t in self.instance.tags.all())
+
+    def clean_tags(self):
+        names = [n.strip() for n in self.cleaned_data['tags'].split(',') if n.strip()]
+        names = list(dict.fromkeys(names))
+        if len(names) > self.MAX_TAGS:
+            raise forms.ValidationError(f"Use at most {self.MAX_TAGS} tags.")
+        if any(len(n) > 50 for n in names):
+            raise forms.ValidationError("Tags can be at most 50 characters long.")
+        return names
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        self.instance.tags.set(Tag.for_names(self.cleaned_data['tags']))
+
+    def clean_image(self):
+        return _image_only(self.cleaned_data.get('image'))
+
     def clean_content(self):
         raw_html = (self.data.get('content') or '').strip()
         text = strip_tags(raw_html)
@@ -85,6 +128,10 @@ class SignUpForm(UserCreationForm):
         self.fields['password1'].widget.attrs.update({'class': 'form-control', 'placeholder': 'Password'})
         self.fields['password2'].widget.attrs.update({'class': 'form-control', 'placeholder': 'Confirm Password'})
 
+    def clean_image(self):
+        # before the User row exists: enqueue() would reject it after form.save()
+        return _image_only(self.cleaned_data.get('image'))
+
     
 class ProfileForm(forms.ModelForm):
     class Meta:
@@ -94,6 +141,9 @@ class ProfileForm(forms.ModelForm):
             'image': forms.ClearableFileInput(attrs={'class': 'form-control'})
         }
 
+    def clean_image(self):
+        return _image_only(self.cleaned_data.get('image'))
+
     def save(self, commit=True):
         profile = super().save(commit=False)
         if commit:
@@ -0,0 +1,127 @@
+"""
+Responsive image variants.
+
+Every source image is decoded once, EXIF-rotated, stripped of metadata and
+re-encoded as AVIF and WebP at a fixed ladder of widths (never upscaled).
+The outcome is a *variant set*:
+
+    {"width": 2400, "height": 1600,
+     "fallback": "<url of the widest WebP>",
+     "sources": {"image/avif": [[320, "<url>"], ...],
+                 "image/webp": [[320, "<url>"], ...]}}
+
+Uploaded images get their variant set stored on the row (`image_variants` on
+Blogs and Profile, written by the upload worker). Static images get theirs
+from the manifest written by `python manage.py build_image_variants`.
+Templates render both with the tags in templatetags/responsive_images.py, so
+nothing is resized or looked up at request time.
+"""
+import io
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+QUALITY = {'avif': 55, 'webp': 80}
+MIME = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def formats():
+    # AVIF needs a Pillow build with libavif; WebP is always produced
+    return [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+
+
+def mime_type(source):
+    """
+    The MIME type of the image in `source` (path or file object) by its
+    content, not its name, or None if Pillow can't identify and verify it.
+    """
+    try:
+        with Image.open(source) as im:
+            im.verify()
+            return Image.MIME.get(im.format)
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        return None
+
+
+def open_clean(source):
+    """
+    Decode `source` (path or file object) into a metadata-free RGB/RGBA
+    image with EXIF orientation applied. Returns None if it isn't an image.
+    """
+    try:
+        with Image.open(source) as im:
+            im = ImageOps.exif_transpose(im)
+            has_alpha = im.mode in ('RGBA', 'LA') or 'transparency' in im.info
+            image = im.convert('RGBA' if has_alpha else 'RGB')
+    except (UnidentifiedImageError, OSError):
+        return None
+    image.info = {}  # no EXIF/ICC/XMP carried into the encoders
+    return image
+
+
+def ladder(width):
+    """Variant widths for an image `width` pixels wide."""
+    widths = [w for w in WIDTHS if w < width]
+    widths.append(min(width, WIDTHS[-1]))
+    return widths
+
+
+def encode(image, width, fmt):
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    image.save(buf, format=fmt.upper(), quality=QUALITY[fmt])
+    return buf.getvalue()
+
+
+def render_variants(image):
+    """Yield (width, fmt, data) for every width and format."""
+    for fmt in formats():
+        for width in ladder(image.width):
+            yield width, fmt, encode(image, width, fmt)
+
+
+def normalized(image):
+    """Single WebP re-encode, capped at the widest rung (editor uploads)."""
+    return encode(image, min(image.width, WIDTHS[-1]), 'webp')
+
+
+def variant_set(image, entries):
+    """Build a variant set for `image` from (width, fmt, url) triples."""
+    sources = {}
+    for width, fmt, url in sorted(entries):
+        sources.setdefault(MIME[fmt], []).append([width, url])
+    widest = sources.get(MIME['webp']) or next(iter(sources.values()), [])
+    return {
+        'width': image.width,
+        'height': image.height,
+        'fallback': widest[-1][1] if widest else '',
+        'sources': sources,
+    }
+
+
+# ---------------- Static manifest ----------------
+def variants_dir():
+    return getattr(
+        settings, 'IMAGE_VARIANTS_DIR',
+        os.path.join(settings.STATICFILES_DIRS[0], 'images', 'variants'),
+    )
+
+
+def manifest_path():
+    return os.path.join(variants_dir(), 'manifest.json')
+
+
+@lru_cache(maxsize=1)
+def load_manifest():
+    """{static path: variant set}, read once per process."""
+    try:
+        with open(manifest_path()) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
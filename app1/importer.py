@@ -0,0 +1,367 @@
+"""
+Streaming bulk import of dumpdata-style records.
+
+Accepts a `dumpdata` JSON array or NDJSON (one record per line) of
+
+    {"model": "app1.blogs", "pk": 7, "fields": {...}}
+
+for auth.user, app1.blogs, app1.profile, app1.comment, app1.feedback,
+app1.contactmessage and the like/bookmark through tables
+(app1.blogs_likes / app1.blogs_bookmarks, or the `likes`/`bookmarks` lists
+inside a blogs record, as dumpdata writes them).
+
+* The file is parsed one record at a time (`iter_records`), so memory is
+  bounded by the batch size and the largest single record, not the dump.
+* Rows get new primary keys; foreign keys are translated through in-memory
+  {old pk: new pk} maps for users, blogs and top-level comments. A pk
+  missing from the dump is taken to mean an existing row with that pk
+  (re-import into the same DB).
+* Every batch is one transaction inserted with bulk_create. After each batch
+  the byte offset and the id maps are written to a checkpoint file, so an
+  interrupted import resumes from the last committed batch.
+* bulk_create skips save() and signals, so text fields are computed inline
+  and counters, the search index, the related posts, missing profiles, the
+  feeds of the imported authors' followers and cache versions are rebuilt
+  once at the end (`Importer.finish`). Everything finish() needs to know
+  about the batches (new users, authors, touched posts) is in the
+  checkpoint too.
+"""
+import codecs
+import io
+import json
+import os
+import resource
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from . import cache, feeds
+from .models import Blogs, Comment, ContactMessage, Feedback, Follow, Profile
+
+READ_SIZE = 64 * 1024
+MAX_RECORD_BYTES = 32 * 1024 * 1024
+
+# flush order, so every FK target is inserted before the rows pointing at it
+ORDER = (
+    'auth.user', 'app1.blogs', 'app1.profile', 'app1.comment',
+    'app1.blogs_likes', 'app1.blogs_bookmarks', 'app1.feedback', 'app1.contactmessage',
+)
+THROUGH = {'app1.blogs_likes': Blogs.likes.through, 'app1.blogs_bookmarks': Blogs.bookmarks.through}
+PLAIN = {'app1.feedback': Feedback, 'app1.contactmessage': ContactMessage}
+# never taken from a dump: privileges, and columns recomputed on import
+USER_FIELDS = ('username', 'first_name', 'last_name', 'email', 'password',
+               'is_active', 'date_joined', 'last_login')
+BLOG_FIELDS = {f.name for f in Blogs._meta.concrete_fields} - {
+    'id', 'author', 'created_at', 'search_vector',
+    'likes_count', 'bookmarks_count', 'comments_count', *Blogs.TEXT_FIELDS,
+}
+
+
+class ImportFailed(ValueError):
+    """The dump can't be parsed."""
+
+
+def iter_records(fh, offset=0, max_record_bytes=MAX_RECORD_BYTES):
+    """
+    Yield (record, end_offset) from a binary file holding a JSON array or
+    whitespace-separated JSON objects, starting at byte `offset`.
+    """
+    fh.seek(offset)
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    eof = False
+    while True:
+        # skip separators between records: whitespace, '[' ',' of an array
+        skip = 0
+        while skip < len(buf) and buf[skip] in ' \t\r\n[,\ufeff':
+            skip += 1
+        if skip:
+            offset += len(buf[:skip].encode())
+            buf = buf[skip:]
+        if buf.startswith(']'):
+            return
+        if buf:
+            try:
+                record, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ImportFailed(f"malformed record at byte {offset}")
+            else:
+                if end < len(buf) or eof:
+                    offset += len(buf[:end].encode())
+                    buf = buf[end:]
+                    yield record, offset
+                    continue
+        if eof:
+            return
+        chunk = fh.read(READ_SIZE)
+        eof = not chunk
+        buf += utf8.decode(chunk, final=eof)
+        if len(buf) > max_record_bytes:
+            raise ImportFailed(f"record at byte {offset} is larger than {max_record_bytes} bytes")
+
+
+def _timestamp(value):
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def peak_memory_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Importer:
+    def __init__(self, batch_size=1000, checkpoint_path=None):
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.offset = 0
+        self.maps = {'auth.user': {}, 'app1.blogs': {}, 'app1.comment': {}}
+        self.counts = defaultdict(int)   # rows inserted per model
+        self.skipped = defaultdict(int)  # rows dropped (unknown model, dangling FK)
+        self.new_user_ids = []
+        self.blog_authors = set()  # whose followers' feeds finish() rebuilds
+        self.touched_blogs = set()  # posts that got comments or likes; finish() bumps their cache
+        self.buffers = defaultdict(list)
+        self.buffered = 0
+        self.started = None
+        self.records = 0
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self._load_checkpoint()
+        self.resumed_rows = sum(self.counts.values())
+
+    # ---------------- progress ----------------
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        inserted = sum(self.counts.values()) - self.resumed_rows
+        return {
+            'offset': self.offset,
+            'records': self.records,
+            'inserted': dict(self.counts),
+            'skipped': dict(self.skipped),
+            'rows_per_sec': inserted / elapsed,
+            'peak_memory_mb': peak_memory_mb(),
+        }
+
+    # ---------------- checkpoint ----------------
+    def _load_checkpoint(self):
+        with open(self.checkpoint_path) as fh:
+            state = json.load(fh)
+        self.offset = state['offset']
+        self.maps = {label: {int(k): v for k, v in m.items()} for label, m in state['maps'].items()}
+        self.counts.update(state['counts'])
+        self.new_user_ids = state['new_user_ids']
+        self.blog_authors = set(state.get('blog_authors', ()))
+        self.touched_blogs = set(state.get('touched_blogs', ()))
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump({
+                'offset': self.offset,
+                'maps': self.maps,
+                'counts': self.counts,
+                'new_user_ids': self.new_user_ids,
+                'blog_authors': sorted(self.blog_authors),
+                'touched_blogs': sorted(self.touched_blogs),
+            }, fh)
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---------------- main loop ----------------
+    def run(self, fh):
+        """Import from binary file `fh`; yields a stats dict after every batch."""
+        self.started = time.monotonic()
+        for record, end in iter_records(fh, self.offset):
+            self.records += 1
+            label = str(record.get('model', '')).lower()
+            if label in ORDER:
+                self.buffers[label].append(record)
+                self.buffered += 1
+            else:
+                self.skipped[label] += 1
+            self.offset = end
+            if self.buffered >= self.batch_size:
+                self.flush()
+                yield self.stats()
+        self.flush()
+        self.finish()
+        yield self.stats()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        with transaction.atomic():
+            for label in ORDER:
+                records = self.buffers.pop(label, None)
+                if records:
+                    getattr(self, '_insert_' + label.split('.')[1])(records, label)
+        self.buffered = 0
+        self._save_checkpoint()
+
+    def finish(self):
+        """Redo what post_save would have done for the inserted rows."""
+        for i in range(0, len(self.new_user_ids), self.batch_size):
+            chunk = self.new_user_ids[i:i + self.batch_size]
+            missing = User.objects.filter(id__in=chunk, profile__isnull=True).values_list('id', flat=True)
+            Profile.objects.bulk_create([Profile(user_id=uid) for uid in missing], ignore_conflicts=True)
+        call_command('rebuild_counters', stdout=io.StringIO())
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        if self.counts['app1.blogs']:
+            # one full pass beats indexing the imported posts one at a time
+            call_command('build_related', stdout=io.StringIO())
+        followers = (Follow.objects.filter(author_id__in=self.blog_authors)
+                     .order_by().values_list('follower_id', flat=True).distinct())
+        if self.blog_authors:
+            feeds.rebuild(list(followers))
+        cache.bump(cache.LIST_SCOPE, *(cache.blog_scope(pk) for pk in self.touched_blogs))
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # ---------------- FK resolution ----------------
+    def _resolve(self, label, model, old_ids):
+        """Map old pks to new ones; unknown pks fall back to existing rows."""
+        mapping = self.maps[label]
+        unknown = {pk for pk in old_ids if pk is not None and pk not in mapping}
+        if unknown:
+            for pk in model.objects.filter(pk__in=unknown).values_list('pk', flat=True):
+                mapping[pk] = pk
+        return mapping
+
+    def _restore_created_at(self, model, rows):
+        # bulk_create applies auto_now_add; put the dumped timestamps back
+        rows = [(ts, pk) for pk, ts in rows if ts is not None]
+        if rows:
+            column = connection.ops.quote_name(model._meta.get_field('created_at').column)
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"UPDATE {model._meta.db_table} SET {column} = %s WHERE id = %s", rows
+                )
+
+    # ---------------- per-model inserts ----------------
+    def _insert_user(self, records, label):
+        by_name = {r['fields']['username']: r for r in records}
+        existing = dict(User.objects.filter(username__in=by_name).values_list('username', 'id'))
+        new = []
+        for username, record in by_name.items():
+            if username in existing:
+                self.maps[label][record['pk']] = existing[username]
+            else:
+                fields = record['fields']
+                user = User(**{f: fields[f] for f in USER_FIELDS if f in fields})
+                new.append((record['pk'], user))
+        User.objects.bulk_create([user for _, user in new])
+        for old_pk, user in new:
+            self.maps[label][old_pk] = user.id
+            self.new_user_ids.append(user.id)
+        self.counts[label] += len(new)
+
+    def _insert_blogs(self, records, label):
+        users = self._resolve('auth.user', User, {r['fields'].get('author') for r in records})
+        rows = []
+        for record in records:
+            fields = record['fields']
+            author = users.get(fields.get('author'))
+            if author is None:
+                self.skipped[label] += 1
+                continue
+            blog = Blogs(author_id=author, **{k: v for k, v in fields.items() if k in BLOG_FIELDS})
+            blog.refresh_text_fields()
+            rows.append((record, blog))
+            self.blog_authors.add(author)
+        Blogs.objects.bulk_create([blog for _, blog in rows])
+        for record, blog in rows:
+            self.maps[label][record['pk']] = blog.id
+        self.counts[label] += len(rows)
+        self._restore_created_at(Blogs, [(b.id, _timestamp(r['fields'].get('created_at'))) for r, b in rows])
+
+        # dumpdata nests the M2M rows in the blog record
+        for relation in ('likes', 'bookmarks'):
+            self._insert_through([
+                {'fields': {'blogs': record['pk'], 'user': uid}}
+                for record, _ in rows for uid in record['fields'].get(relation) or ()
+            ], f'app1.blogs_{relation}')
+
+    def _insert_profile(self, records, label):
+        users = self._resolve('auth.user', User, {r['fields'].get('user') for r in records})
+        profiles = []
+        for record in records:
+            fields = record['fields']
+            user = users.get(fields.get('user'))
+            if user is None:
+                self.skipped[label] += 1
+                continue
+            profiles.append(Profile(user_id=user, image=fields.get('image'),
+                                    image_variants=fields.get('image_variants') or {}))
+        # existing users already have a profile (created by the signal)
+        Profile.objects.bulk_create(profiles, ignore_conflicts=True)
+        self.counts[label] += len(profiles)
+
+    def _insert_comment(self, records, label):
+        # top-level comments first, so replies in the same batch can point at them
+        top = [r for r in records if not r['fields'].get('parent')]
+        replies = [r for r in records if r['fields'].get('parent')]
+        for group in (top, replies):
+            if group:
+                self._insert_comment_group(group, label)
+
+    def _insert_comment_group(self, records, label):
+        users = self._resolve('auth.user', User, {r['fields'].get('user') for r in records})
+        blogs = self._resolve('app1.blogs', Blogs, {r['fields'].get('blog') for r in records})
+        parents = self._resolve('app1.comment', Comment, {r['fields'].get('parent') for r in records})
+        comments = []
+        for record in records:
+            fields = record['fields']
+            user, blog = users.get(fields.get('user')), blogs.get(fields.get('blog'))
+            parent = parents.get(fields['parent']) if fields.get('parent') else None
+            if user is None or blog is None or (fields.get('parent') and parent is None):
+                self.skipped[label] += 1
+                continue
+            comments.append((record, Comment(
+                blog_id=blog, user_id=user, parent_id=parent, content=fields.get('content', ''),
+            )))
+            self.touched_blogs.add(blog)
+        Comment.objects.bulk_create([c for _, c in comments])
+        for record, comment in comments:
+            if not comment.parent_id:
+                self.maps[label][record['pk']] = comment.id  # only roots can be parents
+        self.counts[label] += len(comments)
+        self._restore_created_at(Comment, [(c.id, _timestamp(r['fields'].get('created_at'))) for r, c in comments])
+
+    def _insert_through(self, records, label):
+        if not records:
+            return
+        through = THROUGH[label]
+        users = self._resolve('auth.user', User, {r['fields'].get('user') for r in records})
+        blogs = self._resolve('app1.blogs', Blogs, {r['fields'].get('blogs') for r in records})
+        rows = []
+        for record in records:
+            fields = record['fields']
+            user, blog = users.get(fields.get('user')), blogs.get(fields.get('blogs'))
+            if user is None or blog is None:
+                self.skipped[label] += 1
+                continue
+            rows.append(through(blogs_id=blog, user_id=user))
+            self.touched_blogs.add(blog)
+        through.objects.bulk_create(rows, ignore_conflicts=True)
+        self.counts[label] += len(rows)
+
+    _insert_blogs_likes = _insert_through
+    _insert_blogs_bookmarks = _insert_through
+
+    def _insert_plain(self, records, label):
+        model = PLAIN[label]
+        names = {f.name for f in model._meta.concrete_fields} - {'id', 'created_at'}
+        rows = [(r['fields'], model(**{k: v for k, v in r['fields'].items() if k in names}))
+                for r in records]
+        model.objects.bulk_create([obj for _, obj in rows])
+        self.counts[label] += len(rows)
+        self._restore_created_at(model, [(obj.id, _timestamp(f.get('created_at'))) for f, obj in rows])
+
+    _insert_feedback = _insert_plain
+    _insert_contactmessage = _insert_plain
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app1.models import Blogs
+
+
+class Command(BaseCommand):
+    help = "Populate Blogs.safe_html, plain_text, excerpt, excerpt_html, word_count and reading_time from content"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Blogs.objects.only('id', 'content').order_by('id')
+
+        batch = []
+        total = 0
+        for blog in queryset.iterator(chunk_size=batch_size):
+            blog.refresh_text_fields()
+            batch.append(blog)
+            if len(batch) >= batch_size:
+                total += self._flush(batch)
+                batch = []
+        if batch:
+            total += self._flush(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled text fields for {total} blog(s)."))
+
+    def _flush(self, batch):
+        with transaction.atomic():
+            Blogs.objects.bulk_update(batch, Blogs.TEXT_FIELDS)
+        return len(batch)
@@ -0,0 +1,64 @@
+import statistics
+import time
+
+import markdown
+from django.core.management.base import BaseCommand
+
+from app1.rendering import clear_cache, render_markdown
+
+SAMPLE = """Here is how to read a file in Python:
+
+```python
+with open("notes.txt") as fh:
+    for line in fh:
+        print(line.rstrip())
+```
+
+And the same thing in JavaScript:
+
+```javascript
+const fs = require("fs");
+fs.readFileSync("notes.txt", "utf8").split("\\n").forEach(l => console.log(l));
+```
+
+* fast
+* **simple**
+* `portable`
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare per-call markdown.markdown() with the shared app1.rendering pipeline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+
+    def handle(self, *args, **options):
+        n = options['iterations']
+        # distinct documents so the HTML cache can't hide the conversion cost
+        docs = [f"{SAMPLE}\n\nVariant {i}" for i in range(n)]
+
+        def per_call(doc):
+            markdown.markdown(doc, extensions=["fenced_code", "codehilite"])
+
+        def shared_cold(doc):
+            render_markdown(doc)
+
+        clear_cache()
+        rows = [
+            ("markdown.markdown() per call", per_call, docs),
+            ("render_markdown, cache miss", shared_cold, docs),
+            ("render_markdown, cache hit", shared_cold, docs),
+        ]
+        for label, fn, inputs in rows:
+            timings = []
+            for doc in inputs:
+                t0 = time.perf_counter()
+                fn(doc)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label:>30}: mean {statistics.mean(timings):7.3f} ms  "
+                f"p50 {timings[len(timings) // 2]:7.3f}  "
+                f"p95 {timings[int(len(timings) * .95)]:7.3f}"
+            )
@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app1 import related
+from app1.models import Blogs, RelatedPost
+
+from .bench_search import build_vocabulary
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N synthetic posts on a handful of topics inside a transaction, time the "
+        "full related-posts build, incremental re-indexing and the page lookup, then "
+        "roll everything back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--topics', type=int, default=200)
+        parser.add_argument('--words', type=int, default=300, help="words per synthetic post")
+        parser.add_argument('--samples', type=int, default=200, help="saves and lookups to time")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.vocabulary = build_vocabulary(rng, size=20_000)
+        # every topic draws from shared Zipf-weighted filler plus its own terms
+        self.weights = [1 / rank for rank in range(1, 2001)]
+        self.topics = [rng.sample(self.vocabulary[2000:], 60) for _ in range(options['topics'])]
+        try:
+            with transaction.atomic():
+                self._seed(rng, options['posts'], options['words'])
+                self._run(rng, options['samples'], options['words'])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Rolled back seeded data.")
+
+    def _post(self, rng, words, author):
+        topic = rng.randrange(len(self.topics))
+        body = rng.choices(self.vocabulary[:2000], self.weights, k=words * 4 // 5)
+        body += rng.choices(self.topics[topic], k=words // 5)
+        rng.shuffle(body)
+        title = " ".join(rng.choices(self.topics[topic], k=3) + rng.choices(self.vocabulary[:2000], k=3))
+        blog = Blogs(title=title.title(), content=f"<p>{' '.join(body)}</p>", author=author)
+        blog.refresh_text_fields()  # bulk_create skips save()
+        return blog, topic
+
+    def _seed(self, rng, posts, words):
+        self.author = User.objects.create(username=f"bench-{rng.getrandbits(32):x}", first_name="Bench")
+        self.topic_of = {}
+        started = time.perf_counter()
+        for start in range(0, posts, 2000):
+            batch = [self._post(rng, words, self.author) for _ in range(min(2000, posts - start))]
+            created = Blogs.objects.bulk_create([blog for blog, _ in batch])
+            self.topic_of.update((blog.pk, topic) for blog, (_, topic) in zip(created, batch))
+        seeded = time.perf_counter()
+        self.stdout.write(f"Seeded {posts} posts in {seeded - started:.1f}s")
+
+        indexed = related.rebuild()
+        self.stdout.write(f"Full build of {indexed} posts: {time.perf_counter() - seeded:.1f}s")
+
+    def _run(self, rng, samples, words):
+        ids = list(self.topic_of)
+        sample = rng.sample(ids, min(samples, len(ids)))
+
+        same_topic = total = 0
+        for pk, related_id in RelatedPost.objects.filter(blog_id__in=sample).values_list('blog_id', 'related_id'):
+            same_topic += self.topic_of[pk] == self.topic_of[related_id]
+            total += 1
+        self.stdout.write(f"Neighbours on the same topic: {same_topic / max(total, 1):.1%} of {total}")
+
+        def new_post():
+            blog, topic = self._post(rng, words, self.author)
+            blog.save()  # the post_save signal re-indexes it
+            self.topic_of[blog.pk] = topic
+
+        for label, fn in (
+            ("save (incremental)", new_post),
+            ("lookup", lambda: related.similar(rng.choice(sample))),
+        ):
+            timings = []
+            for _ in range(samples):
+                t0 = time.perf_counter()
+                fn()
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            pct = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))]
+            self.stdout.write(
+                f"{label:>22}: mean {statistics.mean(timings):7.2f} ms  "
+                f"p50 {pct(.50):7.2f}  p95 {pct(.95):7.2f}  p99 {pct(.99):7.2f}"
+            )
@@ -0,0 +1,102 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from app1.models import Blogs
+from app1.search import get_backend
+
+SYLLABLES = "ba ce di fo gu ka le mi no pu ra se ti vo zu an el in or us".split()
+
+
+def build_vocabulary(rng, size=5000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N synthetic posts inside a transaction, time full-text search against the "
+        "legacy icontains scan, then roll everything back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--words', type=int, default=300, help="words per synthetic post")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.vocabulary = build_vocabulary(rng)
+        # Zipf-like frequencies so, as in real text, most terms are selective
+        self.weights = [1 / rank for rank in range(1, len(self.vocabulary) + 1)]
+        try:
+            with transaction.atomic():
+                self._seed(rng, options['posts'], options['words'])
+                self._run(rng, options['queries'])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Rolled back seeded data.")
+
+    def _seed(self, rng, posts, words):
+        author = User.objects.create(username=f"bench-{rng.getrandbits(32):x}", first_name="Bench")
+        started = time.perf_counter()
+        batch = []
+        for _ in range(posts):
+            body = " ".join(rng.choices(self.vocabulary, self.weights, k=words))
+            title = " ".join(rng.choices(self.vocabulary, self.weights, k=6)).title()
+            blog = Blogs(title=title, content=f"<p>{body}</p>", author=author)
+            blog.refresh_text_fields()  # bulk_create skips save()
+            batch.append(blog)
+            if len(batch) == 2000:
+                Blogs.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Blogs.objects.bulk_create(batch)
+        seeded = time.perf_counter()
+        indexed = get_backend().rebuild()
+        done = time.perf_counter()
+        self.stdout.write(
+            f"Seeded {posts} posts in {seeded - started:.1f}s, "
+            f"indexed {indexed} in {done - seeded:.1f}s"
+        )
+
+    def _run(self, rng, queries):
+        # skip the few stop-word-like head terms; everything else is fair game
+        candidates = self.vocabulary[50:2000]
+        terms = [rng.choice(candidates) for _ in range(queries)]
+        backend = get_backend()
+
+        def fts(term):
+            backend.search(term)
+
+        def legacy(term):
+            # what the old all_blogs/admin search did: scan and return every match
+            list(
+                Blogs.objects.filter(Q(title__icontains=term) | Q(content__icontains=term))
+                .values_list('id', flat=True)
+            )
+
+        for label, fn in ((type(backend).__name__, fts), ("icontains scan", legacy)):
+            timings = []
+            for term in terms:
+                t0 = time.perf_counter()
+                fn(term)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            pct = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))]
+            self.stdout.write(
+                f"{label:>22}: mean {statistics.mean(timings):7.2f} ms  "
+                f"p50 {pct(.50):7.2f}  p95 {pct(.95):7.2f}  p99 {pct(.99):7.2f}"
+            )
@@ -0,0 +1,57 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from app1 import assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Bundle and minify the front-end assets listed in app1/assets.py into static/dist/ "
+        "(--vendor downloads the third-party files first, --collect runs collectstatic after)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vendor", action="store_true",
+            help="Download vendor files that aren't in static/vendor/ yet and update lock.json",
+        )
+        parser.add_argument(
+            "--refresh", action="store_true",
+            help="With --vendor, download every vendor file again (after changing a version)",
+        )
+        parser.add_argument(
+            "--collect", action="store_true",
+            help="Run collectstatic afterwards, writing hashed and compressed copies to STATIC_ROOT",
+        )
+
+    def handle(self, *args, **options):
+        lock = assets.load_lock()
+        if options["vendor"]:
+            for name in assets.VENDOR:
+                written = assets.vendor(name, refresh=options["refresh"])
+                if written:
+                    self.stdout.write(f"Vendored {name} ({len(written)} file(s))")
+                lock.update(written)
+            assets.save_lock(lock)
+        changed = assets.verify_lock(lock)
+        if changed:
+            raise CommandError(
+                "Vendored files don't match static/vendor/lock.json: " + ", ".join(changed)
+                + ". Restore them, or re-download with --vendor --refresh."
+            )
+
+        before = after = 0
+        for name in assets.BUNDLES:
+            try:
+                source_size, bundle_size = assets.build(name)
+            except assets.MissingPart as exc:
+                raise CommandError(str(exc))
+            before += source_size
+            after += bundle_size
+            self.stdout.write(f"{assets.bundle_path(name)}: {source_size / 1024:.0f} KiB -> {bundle_size / 1024:.0f} KiB")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {len(assets.BUNDLES)} bundle(s), {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB minified."
+        ))
+        if options["collect"]:
+            call_command("collectstatic", interactive=False, verbosity=options["verbosity"])
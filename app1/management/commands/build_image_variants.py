@@ -0,0 +1,78 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app1 import images
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tif', '.tiff', '.webp')
+
+
+class Command(BaseCommand):
+    help = (
+        "Resize and re-encode static images to WebP/AVIF width variants and write "
+        "the manifest read by the {% static_picture %} tag"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source", default=os.path.join(settings.STATICFILES_DIRS[0], "images"),
+            help="Directory of source images (default: static/images)",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Re-encode images whose variants are already up to date",
+        )
+
+    def handle(self, *args, **options):
+        source_dir = options["source"]
+        static_root = str(settings.STATICFILES_DIRS[0])
+        out_dir = images.variants_dir()
+        os.makedirs(out_dir, exist_ok=True)
+
+        manifest = images.load_manifest.__wrapped__()
+        built = skipped = 0
+        before = after = 0
+
+        for name in sorted(os.listdir(source_dir)):
+            path = os.path.join(source_dir, name)
+            if not name.lower().endswith(SOURCE_EXTENSIONS) or not os.path.isfile(path):
+                continue
+            key = os.path.relpath(path, static_root).replace(os.sep, "/")
+            mtime = int(os.path.getmtime(path))
+            entry = manifest.get(key)
+            if entry and entry.get("mtime") == mtime and not options["force"]:
+                skipped += 1
+                continue
+
+            image = images.open_clean(path)
+            if image is None:
+                self.stderr.write(f"Skipping {key}: not a readable image")
+                continue
+
+            stem = os.path.splitext(name)[0].replace(" ", "-").lower()
+            entries = []
+            for width, fmt, data in images.render_variants(image):
+                filename = f"{stem}-{width}.{fmt}"
+                with open(os.path.join(out_dir, filename), "wb") as fh:
+                    fh.write(data)
+                rel = os.path.relpath(os.path.join(out_dir, filename), static_root)
+                entries.append((width, fmt, rel.replace(os.sep, "/")))
+                if fmt == "webp" and width == images.ladder(image.width)[-1]:
+                    after += len(data)
+
+            entry = images.variant_set(image, entries)
+            entry["mtime"] = mtime
+            manifest[key] = entry
+            before += os.path.getsize(path)
+            built += 1
+
+        with open(images.manifest_path(), "w") as fh:
+            json.dump(manifest, fh, indent=1, sort_keys=True)
+        images.load_manifest.cache_clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built variants for {built} image(s), {skipped} up to date. "
+            f"Largest WebP total {after / 1024:.0f} KiB vs {before / 1024:.0f} KiB of originals."
+        ))
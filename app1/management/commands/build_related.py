@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app1 import related
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every post's TF-IDF terms and related posts (nightly; saves keep "
+        "single posts up to date in between)"
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = related.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} blog(s) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -1,49 +1,147 @@
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from app1 import cache
 from app1.models import Blogs   # your app is app1 and model is Blogs
+from app1.search import get_backend
+from app1.text import summarize
+
+# Same semantics as the old find/slice loop: each "{{" up to the first "}}"
+# after it is dropped; an unclosed "{{" is left alone.
+TEMPLATE_CODE = re.compile(r"\{\{.*?\}\}", re.DOTALL)
+
+UPDATED_FIELDS = ('title', 'content', *Blogs.TEXT_FIELDS)
+
+
+def remove_template_code(value):
+    """Remove occurrences of {{ ... }} from the string in one pass."""
+    if not isinstance(value, str):
+        return value
+    return TEMPLATE_CODE.sub("", value).strip()
+
+
+def clean_rows(rows):
+    """
+    Clean a chunk of (id, title, content) rows. Returns only the rows that
+    changed, with their text fields recomputed:
+    (id, title, content, *Blogs.TEXT_FIELDS).
+    Runs in the worker processes, so it must stay a plain module function.
+    """
+    changed = []
+    for pk, title, content in rows:
+        new_title = remove_template_code(title)
+        new_content = remove_template_code(content)
+        if new_title != title or new_content != content:
+            changed.append((pk, new_title, new_content, *summarize(new_content)))
+    return changed
+
 
 class Command(BaseCommand):
-    help = "Clean template code like {{ ... }} from Blogs.title, Blogs.content, Blogs.author"
+    help = "Clean template code like {{ ... }} from Blogs.title and Blogs.content"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="rows read per chunk and written per transaction")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="processes used for the regex/text work (1 = in-process)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="report what would change without writing")
 
     def handle(self, *args, **options):
-        def remove_template_code(value):
-            """
-            Remove occurrences of {{ ... }} from the string.
-            If value is not a string, return as-is.
-            """
-            if not isinstance(value, str):
-                return value
-            # Remove all balanced occurrences of {{ ... }}
-            while "{{" in value and "}}" in value:
-                start = value.find("{{")
-                end = value.find("}}", start)
-                if end != -1:
-                    value = value[:start] + value[end + 2:]
-                else:
-                    # no matching closing braces; break to avoid infinite loop
-                    break
-            return value.strip()
-
-        blogs = Blogs.objects.all()
-        cleaned_count = 0
-        cleaned_ids = []
-
-        for blog in blogs:
-            orig_title = blog.title
-            orig_content = blog.content
-            orig_author = blog.author
-
-            new_title = remove_template_code(orig_title)
-            new_content = remove_template_code(orig_content)
-            new_author = remove_template_code(orig_author)
-
-            if new_title != orig_title or new_content != orig_content or new_author != orig_author:
-                blog.title = new_title
-                blog.content = new_content
-                blog.author = new_author
-                blog.save()
-                cleaned_count += 1
-                cleaned_ids.append(blog.id)
-
-        self.stdout.write(self.style.SUCCESS(f"Cleaned {cleaned_count} blog(s)."))
-        if cleaned_ids:
-            self.stdout.write("Cleaned blog ids: " + ", ".join(map(str, cleaned_ids)))
+        batch_size = options['batch_size']
+        workers = options['workers']
+        self.dry_run = options['dry_run']
+        self.search = get_backend()
+
+        started = time.monotonic()
+        self.scanned = self.cleaned = 0
+        self.cleaned_ids = []
+
+        chunks = self._chunks(batch_size)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for changed in self._pool_map(pool, chunks, window=workers * 2):
+                    self._flush(changed, started)
+        else:
+            for changed in map(clean_rows, chunks):
+                self._flush(changed, started)
+
+        elapsed = time.monotonic() - started
+        verb = "Would clean" if self.dry_run else "Cleaned"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {self.cleaned} of {self.scanned} blog(s) in {elapsed:.1f}s "
+            f"({self.scanned / max(elapsed, 1e-6):.0f} rows/s)."
+        ))
+        if self.cleaned_ids:
+            shown = self.cleaned_ids[:100]
+            more = f" (+{self.cleaned - len(shown)} more)" if self.cleaned > len(shown) else ""
+            self.stdout.write(f"{verb} blog ids: " + ", ".join(map(str, shown)) + more)
+
+    def _chunks(self, batch_size):
+        # plain tuples off a server-side cursor; no model instances, no
+        # whole-table result set in memory
+        rows = (
+            Blogs.objects.order_by('id')
+            .values_list('id', 'title', 'content')
+            .iterator(chunk_size=batch_size)
+        )
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                self.scanned += len(chunk)
+                yield chunk
+                chunk = []
+        if chunk:
+            self.scanned += len(chunk)
+            yield chunk
+
+    def _pool_map(self, pool, chunks, window):
+        # Executor.map() would drain the whole generator up front; keep at
+        # most `window` chunks in flight so memory stays flat, results in order
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(clean_rows, chunk))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _flush(self, changed, started):
+        if changed and not self.dry_run:
+            self._write(changed)
+        self.cleaned += len(changed)
+        if len(self.cleaned_ids) < 100:
+            self.cleaned_ids.extend(row[0] for row in changed)
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f"  scanned {self.scanned}, changed {self.cleaned}, "
+            f"{self.scanned / max(elapsed, 1e-6):.0f} rows/s",
+        )
+
+    def _write(self, changed):
+        # One prepared UPDATE run with executemany() per batch. bulk_update()
+        # would build a CASE WHEN per field per row, and resolving those
+        # expressions costs far more CPU than the cleaning itself.
+        table = Blogs._meta.db_table
+        assignments = ", ".join(
+            f"{connection.ops.quote_name(Blogs._meta.get_field(name).column)} = %s"
+            for name in (*UPDATED_FIELDS, 'updated_at')
+        )
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        params = [(*row[1:], now, row[0]) for row in changed]
+        ids = [row[0] for row in changed]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.executemany(f"UPDATE {table} SET {assignments} WHERE id = %s", params)
+            # the raw UPDATE skips save() and its signals, so do their work here
+            indexed = Blogs.objects.select_related('author').defer('content', 'search_vector')
+            for blog in indexed.filter(id__in=ids):
+                self.search.index(blog)
+        cache.bump(cache.LIST_SCOPE, *(cache.blog_scope(pk) for pk in ids))
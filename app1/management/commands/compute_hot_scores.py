@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app1 import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Blogs.hot_score from the engagement buckets in the ranking window "
+        "and drop buckets that have left it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help="keep running, recomputing every N seconds (default: once)")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            scores = ranking.compute_scores()
+            ranking.store_scores(scores)
+            pruned = ranking.prune()
+            self.stdout.write(
+                f"Scored {len(scores)} post(s), pruned {pruned} bucket(s) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,51 @@
+import sys
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+
+from app1.exporter import EXPORTS, FORMATS, stream
+
+
+class Command(BaseCommand):
+    help = "Stream blogs, comments, feedback, contact messages or likes/bookmarks as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--since',
+                            help="only rows created at/after this ISO date or datetime")
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', '-o', help="file to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                day = parse_date(options['since'])
+                if day is None:
+                    raise CommandError(f"Can't parse --since {options['since']!r}")
+                since = datetime(day.year, day.month, day.day)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        try:
+            chunks = stream(options['name'], options['format'], since=since, gzip=options['gzip'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        out = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                out.close()
+            else:
+                out.flush()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}."))
@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.importer import ImportFailed, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a dumpdata JSON array or NDJSON file of users, blogs, profiles, comments, "
+        "likes/bookmarks, feedback and contact messages into the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="records per transaction / bulk_create")
+        parser.add_argument('--checkpoint',
+                            help="checkpoint file (default: <path>.checkpoint)")
+        parser.add_argument('--fresh', action='store_true',
+                            help="ignore an existing checkpoint and start from the top")
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or options['path'] + '.checkpoint'
+        if options['fresh']:
+            try:
+                os.remove(checkpoint)
+            except FileNotFoundError:
+                pass
+
+        importer = Importer(batch_size=options['batch_size'], checkpoint_path=checkpoint)
+        if importer.offset:
+            self.stdout.write(f"Resuming from byte {importer.offset}")
+
+        stats = None
+        try:
+            with open(options['path'], 'rb') as fh:
+                for stats in importer.run(fh):
+                    self.stderr.write(
+                        f"  {stats['records']} records, {sum(stats['inserted'].values())} rows, "
+                        f"{stats['rows_per_sec']:.0f} rows/s, peak {stats['peak_memory_mb']:.0f} MiB"
+                    )
+        except ImportFailed as exc:
+            raise CommandError(f"{exc} (committed batches are kept; rerun to resume)")
+
+        for label, count in sorted(stats['inserted'].items()):
+            self.stdout.write(f"  {label}: {count}")
+        for label, count in sorted(stats['skipped'].items()):
+            self.stdout.write(self.style.WARNING(f"  skipped {label or '<no model>'}: {count}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {sum(stats['inserted'].values())} row(s) at {stats['rows_per_sec']:.0f} rows/s, "
+            f"peak memory {stats['peak_memory_mb']:.0f} MiB."
+        ))
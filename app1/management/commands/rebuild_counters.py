@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from app1.models import Blogs, Comment, Follow, Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Blogs.likes_count, bookmarks_count, comments_count, "
+        "Comment.replies_count and Profile.followers_count from the source tables"
+    )
+
+    def handle(self, *args, **options):
+        def count_of(queryset, fk):
+            # correlated COUNT(*) per blog, 0 when there are no rows
+            subquery = (
+                queryset.filter(**{fk: OuterRef('pk')})
+                .order_by()
+                .values(fk)
+                .annotate(c=Count('*'))
+                .values('c')
+            )
+            return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+        def followers_of():
+            # same, keyed by the profile's user rather than its pk
+            subquery = (
+                Follow.objects.filter(author_id=OuterRef('user_id'))
+                .order_by()
+                .values('author_id')
+                .annotate(c=Count('*'))
+                .values('c')
+            )
+            return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+        with transaction.atomic():
+            updated = Blogs.objects.update(
+                likes_count=count_of(Blogs.likes.through.objects.all(), 'blogs_id'),
+                bookmarks_count=count_of(Blogs.bookmarks.through.objects.all(), 'blogs_id'),
+                comments_count=count_of(Comment.objects.all(), 'blog_id'),
+            )
+            Comment.objects.update(replies_count=count_of(Comment.objects.all(), 'parent_id'))
+            Profile.objects.update(followers_count=followers_of())
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} blog(s)."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app1 import feeds
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the precomputed 'following' feeds from Follow and Blogs "
+        "(run rebuild_counters first so high-follower authors are known)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="only rebuild this user's feed (repeatable)")
+
+    def handle(self, *args, **options):
+        rebuilt = feeds.rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} feed(s)."))
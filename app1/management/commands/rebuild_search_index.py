@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app1.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index (tsvector column or FTS5 table) for every blog"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        with transaction.atomic():
+            count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} blog(s) with {type(backend).__name__}."
+        ))
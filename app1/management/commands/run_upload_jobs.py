@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app1.uploads import claim, get_storage_backend, process
+
+
+class Command(BaseCommand):
+    help = "Push spooled image uploads to remote storage, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help="seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="process one batch and exit (cron / tests)")
+
+    def handle(self, *args, **options):
+        backend = get_storage_backend()
+        while True:
+            jobs = claim(options['batch_size'])
+            for job in jobs:
+                ok = process(job, backend)
+                status = self.style.SUCCESS("done") if ok else self.style.WARNING(job.status)
+                self.stdout.write(f"[{status}] {job.kind} {job.idempotency_key[:12]} "
+                                  f"attempt {job.attempts}")
+            if options['once']:
+                break
+            if not jobs:
+                time.sleep(options['sleep'])
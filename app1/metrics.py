@@ -0,0 +1,101 @@
+"""
+In-process request metrics, rendered in the Prometheus text format by the
+`metrics` view (/metrics).
+
+Filled by app1.middleware.InstrumentationMiddleware. Each worker process keeps
+its own registry, so under gunicorn every scrape sees one worker; add a
+`pid` relabel or scrape each worker if you run more than one.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        # label value -> [bucket counts..., +Inf count], sum
+        self._counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self._sums = defaultdict(float)
+
+    def observe(self, label, value):
+        self._counts[label][bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[label] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label in sorted(self._counts):
+            counts = self._counts[label]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}'
+            yield f'{self.name}_sum{{view="{label}"}} {self._sums[label]:.6f}'
+            yield f'{self.name}_count{{view="{label}"}} {cumulative}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=('view',)):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = defaultdict(int)
+
+    def inc(self, *label_values):
+        self._values[label_values] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for values in sorted(self._values):
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, values))
+            yield f"{self.name}{{{labels}}} {self._values[values]}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('app1_requests_total', "Requests by view and status class",
+                                labels=('view', 'status'))
+        self.latency = Histogram('app1_request_duration_seconds', "Total request latency",
+                                 LATENCY_BUCKETS)
+        # the following are only observed for sampled requests
+        self.queries = Histogram('app1_request_sql_queries', "SQL queries per request",
+                                 QUERY_BUCKETS)
+        self.sql_time = Histogram('app1_request_sql_duration_seconds', "SQL time per request",
+                                  LATENCY_BUCKETS)
+        self.template_time = Histogram('app1_request_template_duration_seconds',
+                                       "Template render time per request", LATENCY_BUCKETS)
+        self.slow = Counter('app1_slow_requests_total', "Requests over APP1_SLOW_REQUEST_MS")
+        self.n_plus_one = Counter('app1_n_plus_one_requests_total',
+                                  "Sampled requests that repeated one query APP1_N_PLUS_ONE_THRESHOLD+ times")
+
+    def record(self, view, status, total, sample=None, slow=False, n_plus_one=False):
+        with self._lock:
+            self.requests.inc(view, f"{status // 100}xx")
+            self.latency.observe(view, total)
+            if sample is not None:
+                self.queries.observe(view, sample['sql_count'])
+                self.sql_time.observe(view, sample['sql_time'])
+                self.template_time.observe(view, sample['template_time'])
+            if slow:
+                self.slow.inc(view)
+            if n_plus_one:
+                self.n_plus_one.inc(view)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.queries, self.sql_time,
+                           self.template_time, self.slow, self.n_plus_one):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,186 @@
+"""
+Per-request instrumentation.
+
+Every request has its latency recorded in app1.metrics (served at /metrics).
+A sampled fraction (APP1_METRICS_SAMPLE_RATE) is also instrumented in
+detail: SQL count and time through connection.execute_wrapper(), and
+template render time through a timer around the Django template backend.
+Sampled requests get a `Server-Timing` header (visible in the browser dev
+tools) and one structured log line on the `app1.requests` logger; requests
+over APP1_SLOW_REQUEST_MS, or that ran one SQL statement
+APP1_N_PLUS_ONE_THRESHOLD+ times, are logged as warnings.
+
+Both middlewares here work sync and async, so under project1.asgi an async
+view (ai_assistant) runs on the event loop end to end. The current sample is
+a ContextVar, which asgiref copies into the threads that run sync views and
+ORM calls, and the SQL timer is installed on every connection as it is
+created and does nothing outside a sampled request.
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as DjangoBackendTemplate
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import registry
+
+logger = logging.getLogger('app1.requests')
+
+_sample = ContextVar('app1_request_sample', default=None)
+
+
+def _sql_timer(execute, sql, params, many, context):
+    sample = _sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample['sql_time'] += time.perf_counter() - start
+        sample['sql_count'] += 1
+        # same SQL text with different params = the N+1 signature
+        sample['statements'][sql] += 1
+
+
+def _install_sql_timer(connection, **kwargs):
+    if _sql_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_timer)
+
+
+def _install_template_timer():
+    """Time top-level renders (includes run inside them, so aren't counted twice)."""
+    if getattr(DjangoBackendTemplate.render, '_app1_timed', False):
+        return
+    original = DjangoBackendTemplate.render
+
+    def render(self, context=None, request=None):
+        sample = _sample.get()
+        if sample is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            sample['template_time'] += time.perf_counter() - start
+
+    render._app1_timed = True
+    DjangoBackendTemplate.render = render
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.sample_rate = getattr(settings, 'APP1_METRICS_SAMPLE_RATE', 0.01)
+        self.slow_seconds = getattr(settings, 'APP1_SLOW_REQUEST_MS', 500) / 1000
+        self.n_plus_one_threshold = getattr(settings, 'APP1_N_PLUS_ONE_THRESHOLD', 10)
+        _install_template_timer()
+        connection_created.connect(_install_sql_timer, dispatch_uid='app1-sql-timer')
+        for alias in connections:  # already open in this thread
+            _install_sql_timer(connections[alias])
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start, sample, token = self._begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _sample.reset(token)
+        return self._finish(request, response, start, sample)
+
+    async def __acall__(self, request):
+        start, sample, token = self._begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _sample.reset(token)
+        return self._finish(request, response, start, sample)
+
+    def _begin(self):
+        start = time.perf_counter()
+        if random.random() >= self.sample_rate:
+            return start, None, None
+        sample = {'sql_count': 0, 'sql_time': 0.0, 'template_time': 0.0, 'statements': Counter()}
+        return start, sample, _sample.set(sample)
+
+    def _finish(self, request, response, start, sample):
+        total = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or '<unmatched>'
+        slow = total >= self.slow_seconds
+        repeated = max(sample['statements'].values(), default=0) if sample else 0
+        n_plus_one = repeated >= self.n_plus_one_threshold
+        registry.record(view, response.status_code, total, sample, slow=slow, n_plus_one=n_plus_one)
+
+        if sample is not None:
+            response['Server-Timing'] = ', '.join((
+                f'db;desc="{sample["sql_count"]} queries";dur={sample["sql_time"] * 1000:.1f}',
+                f'tpl;dur={sample["template_time"] * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+            record = {
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'sql_count': sample['sql_count'],
+                'sql_ms': round(sample['sql_time'] * 1000, 1),
+                'template_ms': round(sample['template_time'] * 1000, 1),
+                'max_repeated_sql': repeated,
+                'slow': slow,
+                'n_plus_one': n_plus_one,
+            }
+            level = logging.WARNING if slow or n_plus_one else logging.INFO
+            logger.log(level, json.dumps(record))
+        elif slow:
+            logger.warning(json.dumps({
+                'view': view, 'path': request.path, 'status': response.status_code,
+                'total_ms': round(total * 1000, 1), 'slow': True,
+            }))
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, which is sync-only, made async-capable: static files are
+    looked up in its in-memory table and served from a thread, and every
+    other request is awaited straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:12
+
+import ckeditor.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0006_alter_profile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='bookmarks_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='blogs',
+            name='content',
+            field=ckeditor.fields.RichTextField(),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0007_blogs_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogs',
+            index=models.Index(fields=['-created_at', '-id'], name='blogs_created_id_idx'),
+        ),
+    ]
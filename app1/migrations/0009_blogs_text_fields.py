@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0008_blogs_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='plain_text',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:15
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS blogs_search_vector_gin "
+            "ON app1_blogs USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS blogs_title_trgm "
+            "ON app1_blogs USING gin (title gin_trgm_ops)"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS app1_blogs_fts "
+            "USING fts5(title, body, author, tokenize='porter unicode61')"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS blogs_title_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS blogs_search_vector_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS app1_blogs_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0009_blogs_text_fields'),
+    ]
+
+    operations = [
+        # no-op on anything but PostgreSQL
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='blogs',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
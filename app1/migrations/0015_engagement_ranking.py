@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0014_follow_feeds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('likes', models.IntegerField(default=0)),
+                ('bookmarks', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('views', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='blogs',
+            index=models.Index(fields=['-hot_score', '-created_at', '-id'], name='blogs_hot_idx'),
+        ),
+        migrations.AddField(
+            model_name='engagementbucket',
+            name='blog',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='engagement', to='app1.blogs'),
+        ),
+        migrations.AddIndex(
+            model_name='engagementbucket',
+            index=models.Index(fields=['bucket'], name='engagement_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='engagementbucket',
+            constraint=models.UniqueConstraint(fields=('blog', 'bucket'), name='engagement_blog_bucket_uniq'),
+        ),
+    ]
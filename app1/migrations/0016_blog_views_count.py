@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0015_engagement_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0016_blog_views_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(max_length=60, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TermFrequency',
+            fields=[
+                ('term', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('posts', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='blogs', to='app1.tag'),
+        ),
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='app1.blogs')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', '-weight'], name='postterm_term_weight_idx')],
+                'constraints': [models.UniqueConstraint(fields=('blog', 'term'), name='postterm_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='app1.blogs')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='app1.blogs')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['blog', '-score'], name='relatedpost_blog_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('blog', 'related'), name='relatedpost_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # existing posts count as last changed when they were written
+    Blogs = apps.get_model('app1', 'Blogs')
+    Blogs.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0017_related_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
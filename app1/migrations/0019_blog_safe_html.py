@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+from app1.text import summarize
+
+
+def backfill_safe_html(apps, schema_editor):
+    # pages read safe_html from now on, so existing posts can't wait for a
+    # later backfill_excerpts run; same batching as that command
+    Blogs = apps.get_model('app1', 'Blogs')
+    batch = []
+    for blog in Blogs.objects.only('id', 'content').order_by('id').iterator(chunk_size=500):
+        blog.safe_html, _, _, blog.excerpt_html, _, _ = summarize(blog.content)
+        batch.append(blog)
+        if len(batch) >= 500:
+            Blogs.objects.bulk_update(batch, ['safe_html', 'excerpt_html'])
+            batch = []
+    Blogs.objects.bulk_update(batch, ['safe_html', 'excerpt_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0018_blog_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='excerpt_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='blogs',
+            name='safe_html',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_safe_html, migrations.RunPython.noop),
+    ]
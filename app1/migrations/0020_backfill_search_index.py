@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+def backfill_search_index(apps, schema_editor):
+    # 0010 created the FTS5 table / tsvector column empty; posts saved since
+    # are indexed by signals.py, the ones from before only by this backfill.
+    # The SQL is a frozen copy of the search backends' rebuild() so later
+    # changes to app1/search.py can't change what this migration does.
+    blogs = apps.get_model('app1', 'Blogs')._meta.db_table
+    users = apps.get_model('auth', 'User')._meta.db_table
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            f"UPDATE {blogs} b SET search_vector = "
+            f"setweight(to_tsvector('english', b.title), 'A') || "
+            f"setweight(to_tsvector('english', concat_ws(' ', u.first_name, u.last_name, u.username)), 'B') || "
+            f"setweight(to_tsvector('english', b.plain_text), 'C') "
+            f"FROM {users} u WHERE u.id = b.author_id"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute("DELETE FROM app1_blogs_fts")
+        schema_editor.execute(
+            f"INSERT INTO app1_blogs_fts (rowid, title, body, author) "
+            f"SELECT b.id, b.title, b.plain_text, "
+            f"trim(u.first_name || ' ' || u.last_name || ' ' || u.username) "
+            f"FROM {blogs} b JOIN {users} u ON u.id = b.author_id"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0019_blog_safe_html'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+def load_spooled_files(apps, schema_editor):
+    # jobs still waiting on this machine's spool carry their bytes over;
+    # anything whose file is gone can't be uploaded and is marked failed
+    UploadJob = apps.get_model('app1', 'UploadJob')
+    for job in UploadJob.objects.exclude(status='done').iterator(chunk_size=100):
+        try:
+            with open(job.spool_path, 'rb') as fh:
+                job.data = fh.read()
+        except OSError:
+            if job.status != 'failed':
+                job.status = 'failed'
+                job.last_error = 'Spooled file missing when moving the spool to the database'
+        job.save(update_fields=['data', 'status', 'last_error'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0020_backfill_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='data',
+            field=models.BinaryField(default=b'', editable=False),
+        ),
+        migrations.RunPython(load_spooled_files, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='uploadjob',
+            name='spool_path',
+        ),
+    ]
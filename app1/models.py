@@ -1,16 +1,67 @@
+import copy
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 from ckeditor.fields import RichTextField
 
+from .text import initials, summarize
+
+
+class BlogsQuerySet(models.QuerySet):
+    # Columns a listing card needs; content/plain_text never leave the DB.
+    CARD_FIELDS = (
+        'id', 'title', 'image', 'image_variants', 'created_at', 'excerpt', 'excerpt_html', 'reading_time',
+        'likes_count', 'bookmarks_count', 'comments_count', 'views_count',
+        'author__id', 'author__username', 'author__first_name', 'author__last_name',
+    )
+
+    def cards(self):
+        return self.select_related('author').only(*self.CARD_FIELDS)
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=60, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def for_names(cls, names):
+        """The tags for `names`, creating missing ones; names that slugify alike share a tag."""
+        by_slug = {}
+        for name in names:
+            slug = slugify(name)
+            if slug:
+                by_slug.setdefault(slug, name.strip()[:50])
+        cls.objects.bulk_create(
+            [cls(name=name, slug=slug) for slug, name in by_slug.items()], ignore_conflicts=True,
+        )
+        return list(cls.objects.filter(slug__in=by_slug))
+
 
 class Blogs(models.Model):  # keep plural name as in your code
+    TEXT_FIELDS = ('safe_html', 'plain_text', 'excerpt', 'excerpt_html', 'word_count', 'reading_time')
+    # what the search and related-post indexes are built from (with the tags)
+    INDEXED_FIELDS = ('title', 'content')
+
     title = models.CharField(max_length=255)  # Slightly longer title limit
     content = RichTextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)  # linked to User
     image = CloudinaryField('image', blank=True, null=True)
+    # Resized WebP/AVIF copies of `image` (see app1/images.py), filled in by
+    # the upload worker; empty until then and for images set before it existed.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last change to anything the post's pages show (saves, and the counter
+    # updates for likes, bookmarks and comments); drives conditional GET,
+    # see app1/conditional.py. View counts and hot scores don't touch it.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     
     likes = models.ManyToManyField(
         settings.AUTH_USER_MODEL, related_name='liked_blogs', blank=True
@@ -18,19 +69,107 @@ class Blogs(models.Model):  # keep plural name as in your code
     bookmarks = models.ManyToManyField(
         settings.AUTH_USER_MODEL, related_name='bookmarked_blogs', blank=True
     )
+    tags = models.ManyToManyField(Tag, related_name='blogs', blank=True)
+
+    # Denormalized counters so pages never have to count the M2M / FK rows.
+    # Kept in sync by the toggle views and the Comment signals; rebuild with
+    # `python manage.py rebuild_counters`.
+    likes_count = models.PositiveIntegerField(default=0)
+    bookmarks_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Deduplicated page views, buffered in process and flushed in batches
+    # (app1/pageviews.py), so it lags real traffic by a few seconds.
+    views_count = models.PositiveIntegerField(default=0)
+
+    # Time-decayed engagement score, recomputed from EngagementBucket by
+    # `python manage.py compute_hot_scores` (app1/ranking.py).
+    hot_score = models.FloatField(default=0)
+
+    # Derived from `content` on save so pages never touch the editor's HTML:
+    # safe_html is the allowlist-sanitized body (app1/sanitize.py) and
+    # excerpt_html the card preview with inline formatting only.
+    # Backfill existing rows with `python manage.py backfill_excerpts`.
+    safe_html = models.TextField(blank=True, default='')
+    plain_text = models.TextField(blank=True, default='')
+    excerpt = models.CharField(max_length=500, blank=True, default='')
+    excerpt_html = models.TextField(blank=True, default='')
+    word_count = models.PositiveIntegerField(default=0)
+    reading_time = models.PositiveSmallIntegerField(default=1)  # minutes
+
+    # Weighted title/author/plain_text tsvector, maintained by app1/search.py.
+    # Only populated on PostgreSQL; SQLite uses the app1_blogs_fts table.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = BlogsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # backs the (created_at, id) keyset pagination in app1/pagination.py
+            models.Index(fields=['-created_at', '-id'], name='blogs_created_id_idx'),
+            # per-author range scans for fan-out on read (app1/feeds.py)
+            models.Index(fields=['author', '-created_at', '-id'], name='blogs_author_created_idx'),
+            # trending order (app1/ranking.py); new posts break ties
+            models.Index(fields=['-hot_score', '-created_at', '-id'], name='blogs_hot_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._indexed = instance._indexed_values()
+        return instance
+
+    def _indexed_values(self):
+        # only what was loaded: reading a deferred field here would query it
+        return {name: self.__dict__[name] for name in self.INDEXED_FIELDS if name in self.__dict__}
+
+    def indexed_fields_changed(self):
+        """Whether the title or content differ from when the row was read (new rows always have)."""
+        loaded = getattr(self, '_indexed', None)
+        return loaded is None or loaded != self._indexed_values()
+
+    def refresh_text_fields(self):
+        """Recompute safe_html and the other TEXT_FIELDS from content."""
+        (self.safe_html, self.plain_text, self.excerpt, self.excerpt_html,
+         self.word_count, self.reading_time) = summarize(self.content)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            # full save; skip when content was deferred (list-card projection)
+            if 'content' not in self.get_deferred_fields():
+                self.refresh_text_fields()
+        elif update_fields:
+            # auto_now only applies to fields that are being saved
+            update_fields = set(update_fields) | {'updated_at'}
+            if 'content' in update_fields:
+                self.refresh_text_fields()
+                update_fields |= set(self.TEXT_FIELDS)
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._indexed = self._indexed_values()
+
 
 class Comment(models.Model):
     blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Replies are one level deep: a reply to a reply is attached to its root.
+    parent = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies'
+    )
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Kept in sync by the Comment signals, like Blogs.comments_count.
+    replies_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']  # newest first
+        indexes = [
+            # keyset pages of a post's comments (KeysetPaginator order)
+            models.Index(fields=['blog', '-created_at', '-id'], name='comment_blog_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} on {self.blog} ({self.created_at:%Y-%m-%d %H:%M})"
@@ -64,14 +203,189 @@ class Profile(models.Model):  # Stores profile image for each user
         blank=True,
         null=True
     )
-        
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Kept in sync by app1.feeds.toggle_follow, like Blogs.likes_count.
+    followers_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.user.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # what was loaded, so saving through the user only writes real changes
+        instance._loaded = instance._snapshot()
+        return instance
+
+    def _snapshot(self):
+        deferred = self.get_deferred_fields()
+        return {
+            field.name: copy.deepcopy(field.get_prep_value(getattr(self, field.attname)))
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred
+        }
+
+    def changed_fields(self):
+        """Names of the loaded fields that differ from what was read from the database."""
+        loaded = getattr(self, '_loaded', {})
+        return [name for name, value in self._snapshot().items() if name in loaded and loaded[name] != value]
+
     @property
     def initials(self):
         """Generate initials from user's first and last name."""
-        name_parts = (self.user.first_name + " " + self.user.last_name).strip().split()
-        if len(name_parts) == 0:
-            return self.user.username[:2].upper()
-        return "".join([part[0].upper() for part in name_parts])[:2]
\ No newline at end of file
+        return initials(self.user.first_name, self.user.last_name, self.user.username)
+
+class EngagementBucket(models.Model):
+    """
+    Net likes/bookmarks/comments/views a post got in one time bucket
+    (RANKING_BUCKET_SECONDS wide), incremented as they happen (app1/ranking.py).
+    """
+    blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='engagement')
+    bucket = models.DateTimeField()  # start of the bucket
+    likes = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'bucket'], name='engagement_blog_bucket_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='engagement_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.blog_id} @ {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='followers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'author'], name='follow_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.follower} follows {self.author}"
+
+
+class FeedEntry(models.Model):
+    """
+    One post in one user's precomputed "following" timeline (app1/feeds.py).
+    `created_at` copies the post's, so a feed page is a single range scan of
+    feedentry_user_created_idx.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_entries')
+    blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='feed_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')  # for unfollow
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'blog'], name='feedentry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-blog'], name='feedentry_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.blog_id} in {self.user_id}'s feed"
+
+
+class UploadJob(models.Model):
+    """
+    A spooled image waiting to be pushed to remote storage by
+    `python manage.py run_upload_jobs` (see app1/uploads.py). The bytes live
+    in `data` rather than on local disk so any worker process can pick the
+    job up; they are dropped once the job is finished.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # sha256 of kind + target + file bytes; re-uploading the same file is a no-op
+    idempotency_key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20)  # 'editor', 'blog_image', 'profile_image'
+    data = models.BinaryField(default=b'', editable=False)
+    original_name = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+
+    # optional row/field that receives the uploaded resource, e.g. app1.blogs #12 .image
+    target_model = models.CharField(max_length=100, blank=True)
+    target_id = models.BigIntegerField(null=True, blank=True)
+    target_field = models.CharField(max_length=50, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    result_url = models.URLField(max_length=500, blank=True)
+    result_value = models.CharField(max_length=255, blank=True)  # stored in target_field
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='uploadjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.idempotency_key[:12]} ({self.status})"
+
+
+class PostTerm(models.Model):
+    """
+    One of a post's highest-weighted TF-IDF terms (app1/related.py). Weights
+    are L2-normalised per post, so summing weight products over shared terms
+    gives their cosine similarity.
+    """
+    blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='terms')
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'term'], name='postterm_unique'),
+        ]
+        indexes = [
+            # a term's strongest posts first: the candidates for a new neighbour
+            models.Index(fields=['term', '-weight'], name='postterm_term_weight_idx'),
+        ]
+
+
+class TermFrequency(models.Model):
+    """How many posts used `term` at the last full related-posts build."""
+    term = models.CharField(max_length=64, primary_key=True)
+    posts = models.PositiveIntegerField()
+
+
+class RelatedPost(models.Model):
+    """One of `blog`'s top-k most similar posts, precomputed by app1/related.py."""
+    blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='related_from')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'related'], name='relatedpost_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['blog', '-score'], name='relatedpost_blog_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.related_id} is related to {self.blog_id} ({self.score:.3f})"
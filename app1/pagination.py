@@ -0,0 +1,118 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk, direction="next"):
+    """Pack a (created_at, id) position into an opaque, URL-safe token."""
+    payload = json.dumps(
+        {"c": created_at.isoformat(), "i": pk, "d": direction},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(). Raises InvalidCursor on anything malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction = data.get("d", "next")
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(data["c"]), int(data["i"]), direction
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+class KeysetPage:
+    """
+    One page of a KeysetPaginator. Mirrors the bits of Django's Page that the
+    templates use (object_list, has_next/has_previous, iteration) but exposes
+    cursors instead of page numbers.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Newest-first keyset pagination on (created_at, id).
+
+    Every page is a single indexed range scan (`WHERE (created_at, id) < ...
+    ORDER BY created_at DESC, id DESC LIMIT n+1`), so page 1000 costs the same
+    as page 1, unlike OFFSET which has to walk and discard every earlier row.
+    """
+
+    def __init__(self, queryset, per_page=None):
+        self.queryset = queryset
+        self.per_page = per_page or getattr(settings, "BLOGS_PAGE_SIZE", 12)
+
+    def page(self, cursor=None):
+        position = None
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except InvalidCursor:
+                position = None  # bad/stale token: fall back to the first page
+
+        if position is None:
+            rows = list(self.queryset.order_by("-created_at", "-id")[:self.per_page + 1])
+            has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+            return self._build(rows, has_next=has_more, has_previous=False)
+
+        created_at, pk, direction = position
+        if direction == "next":
+            rows = list(
+                self.queryset
+                .filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+                .order_by("-created_at", "-id")[:self.per_page + 1]
+            )
+            has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+            return self._build(rows, has_next=has_more, has_previous=True)
+
+        # walking backwards: scan ascending from the cursor, then flip
+        rows = list(
+            self.queryset
+            .filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by("created_at", "id")[:self.per_page + 1]
+        )
+        if not rows:
+            return self.page()
+        has_more, rows = len(rows) > self.per_page, rows[:self.per_page]
+        rows.reverse()
+        return self._build(rows, has_next=True, has_previous=has_more)
+
+    def _build(self, rows, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk, "next")
+        if rows and has_previous:
+            previous_cursor = encode_cursor(rows[0].created_at, rows[0].pk, "prev")
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
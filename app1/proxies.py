@@ -0,0 +1,19 @@
+"""
+The client's address behind the hosting proxy.
+
+Behind a reverse proxy (the Heroku router, a load balancer) REMOTE_ADDR is
+the proxy's address. Each trusted proxy appends the address it saw to
+X-Forwarded-For, so with settings.TRUSTED_PROXY_COUNT = n the client is the
+n-th entry from the right; anything further left is whatever the client
+chose to send and is never used.
+"""
+from django.conf import settings
+
+
+def client_ip(request):
+    count = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if count:
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        if len(hops) >= count:
+            return hops[-count]
+    return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,132 @@
+"""
+Trending order for `home` and `/trending/`.
+
+Engagement is counted as it happens: the like/bookmark/comment signals call
+record(), which adds to the post's EngagementBucket row for the current time
+bucket with a single INSERT ... ON CONFLICT DO UPDATE. Nothing is aggregated
+per request.
+
+`python manage.py compute_hot_scores` walks the buckets inside
+RANKING_WINDOW_HOURS (the Procfile's `clock` process runs it with
+`--every 300`; from cron, drop the flag) and writes
+
+    hot_score = sum(weight . counts) * 0.5 ** (age_hours / RANKING_HALF_LIFE_HOURS)
+
+into Blogs.hot_score. Listings then read `ORDER BY hot_score DESC` straight
+off blogs_hot_idx. With no scores at all the order falls back to newest first.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import cache
+from .models import Blogs, EngagementBucket
+
+BUCKET_SECONDS = getattr(settings, 'RANKING_BUCKET_SECONDS', 60 * 60)
+WINDOW_HOURS = getattr(settings, 'RANKING_WINDOW_HOURS', 72)
+HALF_LIFE_HOURS = getattr(settings, 'RANKING_HALF_LIFE_HOURS', 24)
+WEIGHTS = getattr(settings, 'RANKING_WEIGHTS', {'likes': 1.0, 'bookmarks': 2.0, 'comments': 3.0, 'views': 0.05})
+COUNTERS = ('likes', 'bookmarks', 'comments', 'views')
+
+TRENDING_SCOPE = 'trending'
+
+
+def bucket_start(moment=None):
+    moment = moment or timezone.now()
+    seconds = int(moment.timestamp())
+    return moment - timedelta(seconds=seconds % BUCKET_SECONDS, microseconds=moment.microsecond)
+
+
+# ---------------- Counting ----------------
+def _upsert_sql():
+    table = connection.ops.quote_name(EngagementBucket._meta.db_table)
+    columns = ', '.join(COUNTERS)
+    increments = ', '.join(f'{name} = {table}.{name} + excluded.{name}' for name in COUNTERS)
+    # same syntax on PostgreSQL and SQLite 3.24+
+    return (
+        f"INSERT INTO {table} (blog_id, bucket, {columns}) VALUES (%s, %s{', %s' * len(COUNTERS)}) "
+        f"ON CONFLICT (blog_id, bucket) DO UPDATE SET {increments}"
+    )
+
+
+def record_many(deltas_by_blog):
+    """
+    Add {blog_id: {counter: n}} to each post's current bucket, e.g. a batch
+    of buffered page views. One upsert per post, in a single executemany.
+    """
+    bucket = connection.ops.adapt_datetimefield_value(bucket_start())
+    params = [
+        (blog_id, bucket, *(deltas.get(name, 0) for name in COUNTERS))
+        for blog_id, deltas in deltas_by_blog.items() if any(deltas.values())
+    ]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(_upsert_sql(), params)
+
+
+def record(blog_id, **deltas):
+    """Add `deltas` (likes=1, comments=-1, ...) to the post's current bucket."""
+    record_many({blog_id: deltas})
+
+
+# ---------------- Scoring ----------------
+def decayed(counts, age_hours):
+    raw = sum(WEIGHTS.get(name, 0) * value for name, value in counts.items())
+    return raw * math.pow(0.5, age_hours / HALF_LIFE_HOURS)
+
+
+def compute_scores(now=None):
+    """{blog_id: hot score} from the buckets inside the window."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=WINDOW_HOURS)
+    scores = defaultdict(float)
+    rows = (EngagementBucket.objects.filter(bucket__gte=since)
+            .values_list('blog_id', 'bucket', *COUNTERS).iterator(chunk_size=5000))
+    for blog_id, bucket, *counts in rows:
+        # score a bucket from its midpoint, so the current one isn't favoured
+        age = (now - bucket).total_seconds() / 3600 - BUCKET_SECONDS / 7200
+        scores[blog_id] += decayed(dict(zip(COUNTERS, counts)), max(age, 0))
+    return {blog_id: round(score, 6) for blog_id, score in scores.items() if score > 0}
+
+
+def store_scores(scores):
+    """
+    Replace every hot_score with `scores` in one transaction. Writes go
+    through executemany (same reason as clean_blogs: bulk_update's CASE
+    expression is far slower at this size).
+    """
+    table = connection.ops.quote_name(Blogs._meta.db_table)
+    sql = f"UPDATE {table} SET hot_score = %s WHERE id = %s"
+    with transaction.atomic():
+        Blogs.objects.filter(hot_score__gt=0).update(hot_score=0)
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [(score, pk) for pk, score in scores.items()])
+    cache.bump(TRENDING_SCOPE)
+
+
+def prune(now=None):
+    """Delete buckets that have left the window; returns how many."""
+    since = (now or timezone.now()) - timedelta(hours=WINDOW_HOURS)
+    return EngagementBucket.objects.filter(bucket__lt=since).delete()[0]
+
+
+# ---------------- Reading ----------------
+def trending_version():
+    versions = cache.get_versions([cache.LIST_SCOPE, TRENDING_SCOPE])
+    return f"{versions[cache.LIST_SCOPE]}-{versions[TRENDING_SCOPE]}"
+
+
+def top(limit):
+    """The `limit` hottest posts as blog cards, cached until scores or posts change."""
+    version = trending_version()
+    key = f'app1:trending:{version}:{limit}'
+    blogs = django_cache.get(key)
+    if blogs is None:
+        blogs = list(Blogs.objects.cards().order_by('-hot_score', '-created_at', '-id')[:limit])
+        django_cache.set(key, blogs, cache.TIMEOUT)
+    return blogs, version
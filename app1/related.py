@@ -0,0 +1,264 @@
+"""
+"Related posts" for blog_detail, precomputed from TF-IDF similarity.
+
+A post's terms are the words of its plain_text, its title words (counted
+TITLE_BOOST times) and its tags (as `#slug`, counted TAG_BOOST times).
+Weights are (1 + log tf) * idf, L2-normalised, and each post keeps its
+RELATED_TERMS_PER_POST strongest terms in PostTerm. The cosine similarity of
+two posts is then the sum of weight products over the terms they share.
+Each post's RELATED_POSTS best neighbours are stored in RelatedPost, so the
+page reads them with one indexed query.
+
+`python manage.py build_related` computes the whole index offline. It builds
+an inverted index in memory and keeps only each term's MAX_POSTINGS strongest
+posts, so the work grows with the corpus rather than its square. Saving a
+post re-indexes just that post. Its candidates come from the stored PostTerm
+rows, and it is offered to its new neighbours as a neighbour in turn. Term
+frequencies are counted up as posts are created but not adjusted on edits or
+deletes; the next full build corrects them.
+
+The signals call schedule(), not index(): the work runs once the saving
+transaction commits, once per post however many signals asked for it (the
+post_save and the tag change of one form save), and not at all for saves
+that left the title, content and tags alone.
+
+Words that appear in more than MAX_DF of a sizeable corpus are dropped,
+like stop words. A term only one post uses still keeps its slot, so the
+next post to use it can find that one.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Blogs, PostTerm, RelatedPost, TermFrequency
+
+NEIGHBOURS = getattr(settings, 'RELATED_POSTS', 6)
+TERMS_PER_POST = getattr(settings, 'RELATED_TERMS_PER_POST', 24)
+MAX_POSTINGS = getattr(settings, 'RELATED_MAX_POSTINGS', 100)
+MAX_DF = 0.5
+MAX_DF_MIN_POSTS = 100  # below this, every shared word is still informative
+TITLE_BOOST = 3
+TAG_BOOST = 5
+BATCH_SIZE = 2000
+
+_WORD = re.compile(r'[^\W\d_]{3,64}')
+STOP_WORDS = frozenset("""
+    about above after again against all also and any are because been before being below
+    between both but can could did does doing down during each few for from further had has
+    have having her here hers herself him himself his how into its itself just more most
+    myself nor not now off once only other our ours ourselves out over own same she should
+    some such than that the their theirs them themselves then there these they this those
+    through too under until very was were what when where which while who whom why will
+    with would you your yours yourself yourselves
+""".split())
+
+
+# ---------------- Vectors ----------------
+def term_counts(title, text, tag_slugs=()):
+    counts = Counter(_WORD.findall((text or '').lower()))
+    for word in _WORD.findall((title or '').lower()):
+        counts[word] += TITLE_BOOST
+    for word in STOP_WORDS & counts.keys():
+        del counts[word]
+    for slug in tag_slugs:
+        counts[f'#{slug}'] += TAG_BOOST
+    return counts
+
+
+def idf_table(df, total):
+    """
+    What vectorize() needs to know about the corpus: the idf of every known
+    term that isn't too common, the idf of a term no other post uses yet,
+    and the too-common terms.
+    """
+    too_common = MAX_DF * total if total >= MAX_DF_MIN_POSTS else float('inf')
+    base = 1 + total
+    idf = {term: math.log(base / (1 + posts)) + 1 for term, posts in df.items() if posts <= too_common}
+    common = {term for term, posts in df.items() if posts > too_common}
+    return idf, math.log(base / 2) + 1, common
+
+
+def vectorize(counts, table):
+    """The post's TERMS_PER_POST strongest (term, weight) pairs, normalised over the full vector."""
+    idf, new_idf, common = table
+    log = math.log
+    weights = {term: (1 + log(tf)) * idf.get(term, new_idf) for term, tf in counts.items() if term not in common}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return [(term, w / norm) for term, w in heapq.nlargest(TERMS_PER_POST, weights.items(), key=itemgetter(1))]
+
+
+def _tag_slugs():
+    slugs = defaultdict(list)
+    for blog_id, slug in Blogs.tags.through.objects.values_list('blogs_id', 'tag__slug').iterator(chunk_size=BATCH_SIZE):
+        slugs[blog_id].append(slug)
+    return slugs
+
+
+# ---------------- Full build ----------------
+def _documents(tags):
+    rows = Blogs.objects.order_by('pk').values_list('pk', 'title', 'plain_text').iterator(chunk_size=BATCH_SIZE)
+    for pk, title, text in rows:
+        yield pk, term_counts(title, text, tags.get(pk, ()))
+
+
+def _executemany(model, columns, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while batch := list(islice(rows, 10_000)):
+            cursor.executemany(sql, batch)
+
+
+def rebuild():
+    """
+    Recompute every post's terms and neighbours; returns the number of posts.
+    Reads the posts twice (document frequencies first) rather than holding
+    every post's term counts in memory.
+    """
+    tags = _tag_slugs()
+    df = Counter()
+    total = 0
+    for _, counts in _documents(tags):
+        df.update(counts.keys())
+        total += 1
+
+    # vectors as parallel lists of interned term ids and weights
+    table = idf_table(df, total)
+    term_ids, terms = {}, []
+    post_ids, vectors = [], []
+    for pk, counts in _documents(tags):
+        vector = vectorize(counts, table)
+        ids = []
+        for term, _ in vector:
+            if term not in term_ids:
+                term_ids[term] = len(terms)
+                terms.append(term)
+            ids.append(term_ids[term])
+        post_ids.append(pk)
+        vectors.append((ids, [w for _, w in vector]))
+
+    # each term's MAX_POSTINGS strongest posts
+    postings = defaultdict(list)
+    for index, (ids, weights) in enumerate(vectors):
+        for term_id, weight in zip(ids, weights):
+            postings[term_id].append((weight, index))
+    for term_id, entries in postings.items():
+        if len(entries) > MAX_POSTINGS:
+            postings[term_id] = heapq.nlargest(MAX_POSTINGS, entries)
+
+    neighbours = []
+    for index, (ids, weights) in enumerate(vectors):
+        scores = defaultdict(float)
+        for term_id, weight in zip(ids, weights):
+            for other_weight, other in postings[term_id]:
+                scores[other] += weight * other_weight
+        scores.pop(index, None)
+        for other, score in heapq.nlargest(NEIGHBOURS, scores.items(), key=itemgetter(1)):
+            neighbours.append((post_ids[index], post_ids[other], score))
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for model in (RelatedPost, PostTerm, TermFrequency):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+        _executemany(TermFrequency, ('term', 'posts'), df.items())
+        _executemany(PostTerm, ('blog_id', 'term', 'weight'), (
+            (pk, terms[term_id], weight)
+            for pk, (ids, weights) in zip(post_ids, vectors)
+            for term_id, weight in zip(ids, weights)
+        ))
+        _executemany(RelatedPost, ('blog_id', 'related_id', 'score'), neighbours)
+    return total
+
+
+# ---------------- Incremental ----------------
+def _count_terms(terms):
+    table = connection.ops.quote_name(TermFrequency._meta.db_table)
+    # same syntax on PostgreSQL and SQLite 3.24+
+    sql = (f"INSERT INTO {table} (term, posts) VALUES (%s, 1) "
+           f"ON CONFLICT (term) DO UPDATE SET posts = {table}.posts + 1")
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(term,) for term in terms])
+
+
+def _frequencies(terms):
+    df = {}
+    terms = iter(terms)
+    while batch := list(islice(terms, 500)):
+        df.update(TermFrequency.objects.filter(term__in=batch).values_list('term', 'posts'))
+    return df
+
+
+def trim(blog_ids):
+    """Drop everything past the best NEIGHBOURS related posts of each post in `blog_ids`."""
+    ranked = (
+        RelatedPost.objects.filter(blog_id__in=blog_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=F('blog_id'),
+                              order_by=[F('score').desc(), F('related_id').desc()]))
+        .filter(rank__gt=NEIGHBOURS)
+        .values_list('pk', flat=True)
+    )
+    stale = list(ranked)
+    if stale:
+        RelatedPost.objects.filter(pk__in=stale).delete()
+
+
+def index(blog, created=False):
+    """Recompute `blog`'s terms and neighbours, and offer it to those neighbours."""
+    slugs = list(blog.tags.values_list('slug', flat=True))
+    counts = term_counts(blog.title, blog.plain_text, slugs)
+    if created and counts:
+        _count_terms(counts)
+    vector = vectorize(counts, idf_table(_frequencies(counts), Blogs.objects.count()))
+
+    scores = defaultdict(float)
+    for term, weight in vector:
+        candidates = (PostTerm.objects.filter(term=term).exclude(blog_id=blog.pk)
+                      .order_by('-weight').values_list('blog_id', 'weight')[:MAX_POSTINGS])
+        for other, other_weight in candidates:
+            scores[other] += weight * other_weight
+    best = heapq.nlargest(NEIGHBOURS, scores.items(), key=itemgetter(1))
+
+    with transaction.atomic():
+        PostTerm.objects.filter(blog_id=blog.pk).delete()
+        PostTerm.objects.bulk_create([PostTerm(blog_id=blog.pk, term=t, weight=w) for t, w in vector])
+        # both directions are recomputed; links from posts it is no longer close to go
+        RelatedPost.objects.filter(blog_id=blog.pk).delete()
+        RelatedPost.objects.filter(related_id=blog.pk).delete()
+        RelatedPost.objects.bulk_create(
+            [RelatedPost(blog_id=blog.pk, related_id=other, score=score) for other, score in best]
+            + [RelatedPost(blog_id=other, related_id=blog.pk, score=score) for other, score in best]
+        )
+        if best:
+            trim([other for other, _ in best])
+
+
+def schedule(blog, created=False):
+    """index(blog) after the current transaction commits, at most once per pending commit."""
+    pending = getattr(blog, '_related_pending', None)
+    blog._related_pending = created or bool(pending)
+    if pending is not None:
+        return
+
+    def run():
+        created, blog._related_pending = blog._related_pending, None
+        index(blog, created=created)
+
+    transaction.on_commit(run)
+
+
+# ---------------- Reading ----------------
+def similar(blog_id, limit=None):
+    """`blog_id`'s related posts as blog cards, most similar first."""
+    return list(
+        Blogs.objects.cards().filter(related_from__blog_id=blog_id)
+        .order_by('-related_from__score', '-id')[:limit or NEIGHBOURS]
+    )
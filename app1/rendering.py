@@ -0,0 +1,106 @@
+"""
+Markdown -> HTML rendering shared by the AI assistant and templates.
+
+`markdown.markdown()` builds a new Markdown instance (and re-registers every
+extension) on each call, and codehilite asks Pygments to resolve the lexer
+for every code block. Here each thread keeps one pre-built instance that is
+reset between documents, rendered HTML is memoized in an LRU keyed by a hash
+of the source, and lexer lookups are cached.
+
+Markdown passes raw HTML through, so the output goes through the same
+allowlist as blog content (app1/sanitize.py) before it is memoized; what
+leaves render_markdown is safe to mark_safe.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import markdown
+from markdown.extensions import codehilite
+from markdown.extensions.codehilite import CodeHiliteExtension
+from markdown.extensions.fenced_code import FencedCodeExtension
+from django.conf import settings
+
+from .sanitize import sanitize
+
+_local = threading.local()
+
+
+# ---------------- Lexer lookup ----------------
+_get_lexer_by_name = codehilite.get_lexer_by_name
+
+
+@lru_cache(maxsize=128)
+def _cached_lexer(name, options):
+    return _get_lexer_by_name(name, **dict(options))
+
+
+def cached_get_lexer_by_name(name, **options):
+    try:
+        key = tuple(sorted(options.items()))
+        hash(key)
+    except TypeError:
+        return _get_lexer_by_name(name, **options)
+    return _cached_lexer(name, key)
+
+
+# codehilite resolves the lexer through its module global on every block
+codehilite.get_lexer_by_name = cached_get_lexer_by_name
+
+
+# ---------------- Rendered HTML cache ----------------
+class _LRU:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_html_cache = _LRU(getattr(settings, "MARKDOWN_CACHE_SIZE", 1024))
+
+
+def _converter():
+    md = getattr(_local, "md", None)
+    if md is None:
+        md = markdown.Markdown(extensions=[FencedCodeExtension(), CodeHiliteExtension()])
+        _local.md = md
+    return md
+
+
+def render_markdown(text):
+    """Render Markdown `text` to sanitized HTML (fenced code + Pygments highlighting)."""
+    text = text or ""
+    key = hashlib.sha256(text.encode()).hexdigest()
+    html = _html_cache.get(key)
+    if html is None:
+        md = _converter()
+        try:
+            html = sanitize(md.convert(text))
+        finally:
+            md.reset()
+        _html_cache.set(key, html)
+    return html
+
+
+def clear_cache():
+    _html_cache.clear()
+    _cached_lexer.cache_clear()
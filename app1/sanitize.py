@@ -0,0 +1,78 @@
+"""
+Allowlist sanitizing for CKEditor HTML.
+
+Blogs.content keeps what the editor sent. Blogs.save runs it through CLEANER
+once and stores the result in Blogs.safe_html (see text.summarize); pages
+output that column as-is and never sanitize on read. blog_edit seeds the
+editor with safe_html too, since the editor template renders its initial
+value unescaped, so the first save after an edit replaces content with its
+sanitized form: anything outside the allowlist does not survive an edit.
+
+The Cleaners are built once at import: bleach compiles its tag/attribute
+tables and html5lib walker per Cleaner, which costs more than cleaning a post.
+There is no `style` in the allowlist: filtering CSS needs bleach's
+tinycss2-based CSSSanitizer, and the theme styles everything the editor emits.
+"""
+import re
+
+from bleach.html5lib_shim import Filter
+from bleach.sanitizer import Cleaner
+
+TAGS = frozenset({
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's', 'del', 'ins', 'sub', 'sup', 'mark', 'small',
+    'code', 'kbd', 'pre', 'blockquote', 'span', 'div',
+    'ul', 'ol', 'li', 'a', 'img', 'figure', 'figcaption', 'oembed',
+    'table', 'caption', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td',
+})
+
+ATTRIBUTES = {
+    'a': ['href', 'title', 'target', 'rel'],
+    'img': ['src', 'alt', 'title', 'width', 'height', 'srcset', 'sizes', 'loading', 'decoding'],
+    'oembed': ['url'],  # CKEditor 5 media embeds
+    'ol': ['start', 'reversed'],
+    'th': ['colspan', 'rowspan', 'scope'],
+    'td': ['colspan', 'rowspan'],
+}
+# image/table/media alignment classes, and language-* for highlight.js
+for _tag in ('figure', 'img', 'table', 'span', 'p', 'div', 'pre', 'code'):
+    ATTRIBUTES.setdefault(_tag, []).append('class')
+
+PROTOCOLS = frozenset({'http', 'https', 'mailto'})
+
+# the inline formatting a card preview keeps; links would nest inside the card's own
+INLINE_TAGS = frozenset({'strong', 'b', 'em', 'i', 'u', 's', 'del', 'sub', 'sup', 'mark', 'code', 'kbd'})
+
+# strip=True keeps the text of removed tags; for these it is code, not prose
+_SCRIPT = re.compile(r'<(script|style|template)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+# block boundaries the preview turns into spaces so words don't run together
+_BLOCK_END = re.compile(r'(</(?:p|h[1-6]|li|blockquote|pre|figcaption|caption|t[hd]|div)>|<br\s*/?>)', re.I)
+
+
+class EmbedFilter(Filter):
+    """Lazy-load and async-decode images; keep target=_blank links from reaching window.opener."""
+
+    def __iter__(self):
+        for token in super().__iter__():
+            if token['type'] in ('StartTag', 'EmptyTag'):
+                attrs = token['data']
+                if token['name'] == 'img':
+                    attrs.setdefault((None, 'loading'), 'lazy')
+                    attrs.setdefault((None, 'decoding'), 'async')
+                elif token['name'] == 'a' and attrs.get((None, 'target')) == '_blank':
+                    attrs[(None, 'rel')] = 'noopener noreferrer'
+            yield token
+
+
+CLEANER = Cleaner(tags=TAGS, attributes=ATTRIBUTES, protocols=PROTOCOLS, strip=True, filters=[EmbedFilter])
+INLINE_CLEANER = Cleaner(tags=INLINE_TAGS, attributes={}, strip=True)
+
+
+def sanitize(raw_html):
+    """CKEditor HTML reduced to the allowlist, ready to output with |safe."""
+    return CLEANER.clean(_SCRIPT.sub('', raw_html or ''))
+
+
+def inline_only(safe_html):
+    """safe_html with everything but INLINE_TAGS stripped and blocks separated by spaces."""
+    return INLINE_CLEANER.clean(_BLOCK_END.sub(r'\1 ', safe_html or ''))
@@ -0,0 +1,233 @@
+"""
+Full-text search over Blogs.
+
+Two backends share one interface so views and the admin never care which
+database is in use:
+
+* PostgresSearchBackend – a weighted tsvector persisted in
+  Blogs.search_vector (GIN indexed), ranked with ts_rank and highlighted with
+  ts_headline; falls back to pg_trgm similarity on the title when the
+  full-text query finds nothing (typos, partial words).
+* SQLiteSearchBackend – an FTS5 virtual table (app1_blogs_fts) keyed by the
+  blog id, ranked with bm25() and highlighted with snippet(); falls back to a
+  title substring match.
+
+Snippets come back HTML-escaped with matches wrapped in <mark>.
+
+signals.py reindexes a blog when it is saved and every blog of an author
+whose name changes (rebuild(author_id=...)); migration 0020 filled the index
+for the rows that existed before it, and rebuild_search_index redoes it all.
+"""
+import re
+from dataclasses import dataclass
+
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector, TrigramSimilarity,
+)
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Blogs
+
+SEARCH_LIMIT = 50
+
+# Control characters never appear in plain_text, so they are safe markers to
+# put around matches before escaping the snippet.
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    blog_id: int
+    rank: float
+    snippet: str
+
+
+def _highlight(raw_snippet):
+    html = escape(raw_snippet or '')
+    return mark_safe(html.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>'))
+
+
+def _author_name(blog):
+    author = blog.author
+    return f"{author.get_full_name()} {author.username}".strip()
+
+
+class SQLiteSearchBackend:
+    table = 'app1_blogs_fts'
+
+    def _match_expression(self, query):
+        # quote each term so user input can never be parsed as FTS5 syntax
+        terms = _TERM.findall(query)
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def index(self, blog):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [blog.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, body, author) VALUES (%s, %s, %s, %s)",
+                [blog.pk, blog.title, blog.plain_text, _author_name(blog)],
+            )
+
+    def remove(self, blog_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [blog_id])
+
+    def rebuild(self, author_id=None):
+        blogs, users = Blogs._meta.db_table, User._meta.db_table
+        where, params = ("WHERE b.author_id = %s", [author_id]) if author_id is not None else ("", [])
+        with connection.cursor() as cursor:
+            if author_id is None:
+                cursor.execute(f"DELETE FROM {self.table}")
+            else:
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN "
+                    f"(SELECT id FROM {blogs} WHERE author_id = %s)", [author_id],
+                )
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, body, author) "
+                f"SELECT b.id, b.title, b.plain_text, "
+                f"trim(u.first_name || ' ' || u.last_name || ' ' || u.username) "
+                f"FROM {blogs} b JOIN {users} u ON u.id = b.author_id {where}",
+                params,
+            )
+            return cursor.rowcount
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        match = self._match_expression(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            # bm25 weights: title > author > body; lower bm25 is better
+            cursor.execute(
+                f"SELECT rowid, bm25({self.table}, 10.0, 1.0, 3.0) AS score, "
+                f"snippet({self.table}, 1, %s, %s, '…', 24) "
+                f"FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY score LIMIT %s",
+                [_MARK_START, _MARK_END, match, limit],
+            )
+            rows = cursor.fetchall()
+        if rows:
+            return [SearchHit(pk, -score, _highlight(snippet)) for pk, score, snippet in rows]
+        return self.fallback(query, limit)
+
+    def fallback(self, query, limit):
+        ids = Blogs.objects.filter(title__icontains=query.strip()).order_by(
+            '-created_at', '-id').values_list('id', flat=True)[:limit]
+        return [SearchHit(pk, 0.0, '') for pk in ids]
+
+    def filter(self, queryset, query):
+        match = self._match_expression(query)
+        if not match:
+            return queryset.none()
+        matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [match])
+        return queryset.filter(Q(pk__in=matches) | Q(title__icontains=query.strip()))
+
+
+class PostgresSearchBackend:
+    config = 'english'
+    trigram_threshold = 0.3
+
+    def _vector(self, blog):
+        return (
+            SearchVector(Value(blog.title, output_field=TextField()), weight='A', config=self.config)
+            + SearchVector(Value(_author_name(blog), output_field=TextField()), weight='B', config=self.config)
+            + SearchVector(Value(blog.plain_text, output_field=TextField()), weight='C', config=self.config)
+        )
+
+    def index(self, blog):
+        Blogs.objects.filter(pk=blog.pk).update(search_vector=self._vector(blog))
+
+    def remove(self, blog_id):
+        pass  # the vector lives on the row itself
+
+    def rebuild(self, author_id=None):
+        # one set-based UPDATE ... FROM instead of a round trip per row
+        blogs, users = Blogs._meta.db_table, User._meta.db_table
+        where, params = ("AND b.author_id = %s", [author_id]) if author_id is not None else ("", [])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {blogs} b SET search_vector = "
+                f"setweight(to_tsvector(%s, b.title), 'A') || "
+                f"setweight(to_tsvector(%s, concat_ws(' ', u.first_name, u.last_name, u.username)), 'B') || "
+                f"setweight(to_tsvector(%s, b.plain_text), 'C') "
+                f"FROM {users} u WHERE u.id = b.author_id {where}",
+                [self.config, self.config, self.config, *params],
+            )
+            return cursor.rowcount
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        if not _TERM.search(query):
+            return []
+        search_query = SearchQuery(query, search_type='websearch', config=self.config)
+        rows = (
+            Blogs.objects
+            .filter(search_vector=search_query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), search_query),
+                snippet=SearchHeadline(
+                    'plain_text', search_query, config=self.config,
+                    start_sel=_MARK_START, stop_sel=_MARK_END, max_words=35, min_words=15,
+                ),
+            )
+            .order_by('-rank', '-created_at')
+            .values_list('id', 'rank', 'snippet')[:limit]
+        )
+        hits = [SearchHit(pk, rank, _highlight(snippet)) for pk, rank, snippet in rows]
+        return hits or self.fallback(query, limit)
+
+    def fallback(self, query, limit):
+        rows = (
+            Blogs.objects
+            .annotate(similarity=TrigramSimilarity('title', query))
+            .filter(similarity__gt=self.trigram_threshold)
+            .order_by('-similarity')
+            .values_list('id', 'similarity')[:limit]
+        )
+        return [SearchHit(pk, similarity, '') for pk, similarity in rows]
+
+    def filter(self, queryset, query):
+        if not _TERM.search(query):
+            return queryset.none()
+        search_query = SearchQuery(query, search_type='websearch', config=self.config)
+        return queryset.annotate(similarity=TrigramSimilarity('title', query)).filter(
+            Q(search_vector=search_query) | Q(similarity__gt=self.trigram_threshold)
+        )
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
+
+
+def search_blogs(queryset, query, limit=SEARCH_LIMIT):
+    """
+    Run `query` through the active backend and return the matching rows of
+    `queryset` in rank order, each carrying `search_rank` and `search_snippet`.
+    """
+    hits = get_backend().search(query, limit=limit)
+    by_id = queryset.in_bulk([hit.blog_id for hit in hits])
+    results = []
+    for hit in hits:
+        blog = by_id.get(hit.blog_id)
+        if blog is not None:
+            blog.search_rank = hit.rank
+            blog.search_snippet = hit.snippet
+            results.append(blog)
+    return results
+
+
+def filter_blogs(queryset, query):
+    """
+    `queryset` narrowed to every blog matching `query`, full-text or fallback,
+    as one query with no limit; keeps the queryset's own ordering (used by the
+    admin changelist, which paginates and sorts by itself).
+    """
+    return get_backend().filter(queryset, query)
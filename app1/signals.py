@@ -1,13 +1,178 @@
-from django.db.models.signals import post_save
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from django.utils import timezone
+from .models import Profile, Blogs, Comment
+from .search import get_backend
+from . import cache, feeds, ranking, related
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     if created:
         # Only create a profile, don't set image here
         Profile.objects.create(user=instance)
+        return
+    # Save the profile along with the user only if it was loaded and edited;
+    # a plain user save (e.g. last_login on every login) never touches it.
+    profile = instance._state.fields_cache.get('profile')
+    if profile is not None and (changed := profile.changed_fields()):
+        profile.save(update_fields=changed)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_card(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return  # nothing on the card
+    cache.bump(cache.user_scope(instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_card(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'followers_count'}:
+        return
+    cache.bump(cache.user_scope(instance.user_id))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Blogs.objects.filter(pk=instance.blog_id).update(
+            comments_count=F('comments_count') + 1, updated_at=timezone.now()
+        )
+        if instance.parent_id:
+            Comment.objects.filter(pk=instance.parent_id).update(replies_count=F('replies_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    Blogs.objects.filter(pk=instance.blog_id, comments_count__gt=0).update(
+        comments_count=F('comments_count') - 1, updated_at=timezone.now()
+    )
+    if instance.parent_id:
+        Comment.objects.filter(pk=instance.parent_id, replies_count__gt=0).update(
+            replies_count=F('replies_count') - 1
+        )
+
+
+def _indexed_fields_saved(instance, update_fields):
+    if update_fields is not None and not set(Blogs.INDEXED_FIELDS) & set(update_fields):
+        return False  # counters etc. don't change what is indexed
+    if 'content' in instance.get_deferred_fields():
+        return False
+    return instance.indexed_fields_changed()
+
+
+@receiver(post_save, sender=Blogs)
+def index_blog_for_search(sender, instance, update_fields=None, **kwargs):
+    if _indexed_fields_saved(instance, update_fields):
+        get_backend().index(instance)
+
+
+@receiver(post_save, sender=Blogs)
+def index_related_posts(sender, instance, created, update_fields=None, **kwargs):
+    if _indexed_fields_saved(instance, update_fields):
+        related.schedule(instance, created=created)
+
+
+@receiver(m2m_changed, sender=Blogs.tags.through)
+def retag_blog(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    blogs = Blogs.objects.filter(pk__in=pk_set or []) if reverse else [instance]
+    for blog in blogs:
+        related.schedule(blog)
+        cache.bump(cache.blog_scope(blog.pk))
+
+
+@receiver(post_save, sender=Blogs)
+def fan_out_blog(sender, instance, created, **kwargs):
+    if created:
+        feeds.fan_out(instance)
+
+
+@receiver(post_save, sender=User)
+def reindex_author(sender, instance, created, update_fields=None, **kwargs):
+    # the author's name is indexed with every one of their posts
+    if created or (update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields)):
+        return
+    get_backend().rebuild(author_id=instance.pk)
+
+
+@receiver(post_delete, sender=Blogs)
+def unindex_blog(sender, instance, **kwargs):
+    get_backend().remove(instance.pk)
+
+
+# ---------------- Cache invalidation (see app1/cache.py) ----------------
+@receiver(post_save, sender=Blogs)
+@receiver(post_delete, sender=Blogs)
+def invalidate_blog_cache(sender, instance, **kwargs):
+    cache.bump(cache.blog_scope(instance.pk), cache.LIST_SCOPE)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_posts(sender, instance, created, update_fields=None, **kwargs):
+    # the name is cached with the post (blog_scope), in the listing pages'
+    # cards (LIST_SCOPE) and in the comment pages of the posts they commented on
+    if created or (update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields)):
+        return
+    blog_ids = list(Blogs.objects.filter(author_id=instance.pk).values_list('id', flat=True))
+    commented = (Comment.objects.filter(user_id=instance.pk)
+                 .order_by().values_list('blog_id', flat=True).distinct())
+    scopes = [cache.blog_scope(pk) for pk in blog_ids] + [cache.comments_scope(pk) for pk in commented]
+    if blog_ids:
+        scopes.append(cache.LIST_SCOPE)
+    cache.bump(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_cache(sender, instance, **kwargs):
+    cache.bump(cache.comments_scope(instance.blog_id))
+
+
+# Auto-created through models never send post_save/post_delete, so likes and
+# bookmarks are tracked through m2m_changed; toggle views use add()/remove().
+@receiver(m2m_changed, sender=Blogs.likes.through)
+@receiver(m2m_changed, sender=Blogs.bookmarks.through)
+def invalidate_engagement_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # user.liked_blogs.add(...): instance is the user, pk_set the blogs
+        blog_ids = pk_set or []
+    else:
+        blog_ids = [instance.pk]
+    cache.bump(*(cache.blog_scope(pk) for pk in blog_ids))
+
+
+# ---------------- Engagement counting (see app1/ranking.py) ----------------
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def count_comment(sender, instance, signal, created=True, origin=None, **kwargs):
+    if not created:
+        return
+    if signal is post_delete:
+        # Only deletes of comments themselves (or their parents) count. In a
+        # cascade from a post or a user, the post's buckets are already gone
+        # and an upsert would recreate one for a row about to be deleted.
+        model = origin.model if isinstance(origin, QuerySet) else type(origin)
+        if model is not Comment:
+            return
+    ranking.record(instance.blog_id, comments=1 if signal is post_save else -1)
+
+
+@receiver(m2m_changed, sender=Blogs.likes.through)
+@receiver(m2m_changed, sender=Blogs.bookmarks.through)
+def count_engagement(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    counter = 'likes' if sender is Blogs.likes.through else 'bookmarks'
+    step = 1 if action == 'post_add' else -1
+    if reverse:
+        ranking.record_many({pk: {counter: step} for pk in pk_set})
     else:
-        # Just save existing profile
-        instance.profile.save()
\ No newline at end of file
+        ranking.record(instance.pk, **{counter: step * len(pk_set)})
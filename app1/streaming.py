@@ -0,0 +1,27 @@
+"""
+Streaming responses that stay streamed under ASGI.
+
+Django serves a StreamingHttpResponse built on a plain (sync) iterator under
+ASGI by running list() over it in a thread: the whole body is produced before
+the first byte goes out. StreamingResponse keeps the sync iterator, so WSGI
+serves it as before, and under ASGI pulls one chunk at a time through
+sync_to_async instead. thread_sensitive keeps every step on the request's
+sync thread, and with it on the same database connection, which matters for
+server-side cursors and the per-batch transactions of the importer.
+"""
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+_DONE = object()
+
+
+class StreamingResponse(StreamingHttpResponse):
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+        iterator = iter(self.streaming_content)
+        step = sync_to_async(next, thread_sensitive=True)
+        while (part := await step(iterator, _DONE)) is not _DONE:
+            yield part
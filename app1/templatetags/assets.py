@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from app1 import assets
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _urls(name):
+    """The built bundle, or (before build_assets has run) the URLs of its parts."""
+    if finders.find(assets.bundle_path(name)):
+        return (static(assets.bundle_path(name)),)
+    urls = []
+    for part in assets.BUNDLES[name]:
+        vendor = assets.vendor_name(part)
+        if vendor and not finders.find(part):
+            urls.append(assets.VENDOR[vendor])
+        else:
+            urls.append(static(part))
+    return tuple(urls)
+
+
+@register.simple_tag
+def stylesheet(name):
+    """
+    {% stylesheet 'base.css' %} – <link> for a CSS bundle from app1/assets.py,
+    or one per part until `manage.py build_assets` has built it.
+    """
+    return format_html_join("\n  ", '<link rel="stylesheet" href="{}">', ((url,) for url in _urls(name)))
+
+
+@register.simple_tag
+def javascript(name):
+    """{% javascript 'base.js' %} – the same for a JS bundle."""
+    return format_html_join("\n  ", '<script src="{}"></script>', ((url,) for url in _urls(name)))
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from app1.rendering import render_markdown
+
+register = template.Library()
+
+
+@register.filter(name="markdown")
+def markdown_filter(value):
+    """{{ text|markdown }} – memoized, sanitized Markdown rendering (see app1/rendering.py)."""
+    return mark_safe(render_markdown(value))
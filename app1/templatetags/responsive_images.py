@@ -0,0 +1,84 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from app1.images import load_manifest
+
+register = template.Library()
+
+DEFAULT_SIZES = "100vw"
+
+
+def _srcset(candidates, resolve):
+    return ", ".join(f"{resolve(url)} {width}w" for width, url in candidates)
+
+
+def _picture(variants, fallback, resolve, sizes, lazy, attrs):
+    src_attr = "data-src" if lazy else "src"
+    srcset_attr = "data-srcset" if lazy else "srcset"
+    img_attrs = {src_attr: fallback, **attrs}
+    if lazy:
+        # transparent 1x1 gif until the page script swaps data-src in
+        img_attrs["src"] = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///ywAAAAAAQABAAACAUwAOw=="
+    if variants:
+        img_attrs.setdefault("width", variants["width"])
+        img_attrs.setdefault("height", variants["height"])
+    img = format_html(
+        "<img{}>",
+        format_html_join("", ' {}="{}"', ((k.replace("_", "-"), v) for k, v in img_attrs.items())),
+    )
+    if not variants or not variants.get("sources"):
+        return img
+    sources = format_html_join(
+        "",
+        '<source type="{}" ' + srcset_attr + '="{}" sizes="{}">',
+        ((mime, _srcset(candidates, resolve), sizes)
+         for mime, candidates in sorted(variants["sources"].items())),
+    )
+    return format_html("<picture>{}{}</picture>", sources, img)
+
+
+@register.simple_tag
+def picture(image, variants=None, sizes=DEFAULT_SIZES, lazy=False, **attrs):
+    """
+    {% picture blog.image blog.image_variants sizes="(min-width: 992px) 33vw, 100vw" alt=blog.title %}
+
+    <picture> with AVIF/WebP srcsets from the variant set the upload worker
+    stored on the row; falls back to a plain <img> of the original until the
+    variants exist. Extra keyword arguments become <img> attributes
+    (underscores turn into dashes).
+    """
+    if not image:
+        return ""
+    fallback = (variants or {}).get("fallback") or image.url
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    return _picture(variants, fallback, lambda url: url, sizes, lazy, attrs)
+
+
+@register.simple_tag
+def static_picture(path, sizes=DEFAULT_SIZES, lazy=False, **attrs):
+    """
+    {% static_picture "images/ai.png" alt="..." %} – same markup for a static
+    image, using the manifest from `manage.py build_image_variants`.
+    """
+    variants = load_manifest().get(path)
+    fallback = static(variants["fallback"]) if variants and variants.get("fallback") else static(path)
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    return _picture(variants, fallback, static, sizes, lazy, attrs)
+
+
+@register.filter
+def variant_url(variants, width):
+    """
+    {{ blog.image_variants|variant_url:1280|default:blog.image.url }} – URL of
+    the smallest WebP variant at least `width` pixels wide (e.g. for CSS
+    backgrounds), or "" when there are no variants.
+    """
+    candidates = ((variants or {}).get("sources") or {}).get("image/webp") or []
+    for candidate_width, url in candidates:
+        if candidate_width >= int(width):
+            return url
+    return candidates[-1][1] if candidates else ""
+
@@ -1,3 +1,1369 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+from io import BytesIO, StringIO
+import tempfile
+import warnings
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache as django_cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_started
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from . import ai, assets, cache, exporter, feeds, middleware, pageviews, ranking, related, rendering, search, views
+from .ai import reset_service
+from .bench.seed import seed_dataset
+from .importer import Importer
+from .management.commands.clean_blogs import remove_template_code
+from .metrics import Registry
+from .models import Blogs, Comment, EngagementBucket, FeedEntry, Profile, RelatedPost, UploadJob
+from .templatetags import assets as asset_tags
+from .streaming import StreamingResponse
+from .uploads import StubStorageBackend
+
+
+class UploadQueueTests(TestCase):
+    def setUp(self):
+        override = override_settings(UPLOAD_STORAGE_BACKEND="app1.uploads.StubStorageBackend")
+        override.enable()
+        self.addCleanup(override.disable)
+        StubStorageBackend.uploaded = []
+        StubStorageBackend.fail_times = 0
+        self.client.force_login(User.objects.create_user("uploader", password="pw"))
+
+    def image(self, color="teal"):
+        buf = BytesIO()
+        PILImage.new("RGB", (4, 4), color).save(buf, format="GIF")
+        return SimpleUploadedFile("pic.gif", buf.getvalue(), content_type="image/gif")
+
+    def run_worker(self):
+        call_command("run_upload_jobs", "--once", stdout=StringIO())
+
+    def test_editor_upload_returns_placeholder_then_redirects(self):
+        image = self.image()
+        response = self.client.post("/upload/", {"upload": image})
+        self.assertEqual(response.status_code, 200)
+        url = response.json()["url"]
+        self.assertIn("/uploads/", url)
+        self.assertEqual(StubStorageBackend.uploaded, [])
+
+        pending = self.client.get(url)
+        image.seek(0)
+        self.assertEqual(b"".join(pending.streaming_content), image.read())
+        self.assertEqual(pending["Content-Type"], "image/gif")
+        self.assertEqual(pending["X-Content-Type-Options"], "nosniff")
+        self.assertIn("sandbox", pending["Content-Security-Policy"])
+
+        self.run_worker()
+        done = self.client.get(url)
+        self.assertEqual(done.status_code, 301)
+        self.assertTrue(done["Location"].startswith("https://stub.invalid/"))
+
+    def test_only_logged_in_users_can_upload_images(self):
+        page = SimpleUploadedFile("x.gif", b"<script>alert(1)</script>", content_type="image/gif")
+        response = self.client.post("/upload/", {"upload": page})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadJob.objects.count(), 0)
+
+        self.client.logout()
+        self.assertEqual(self.client.post("/upload/", {"upload": self.image()}).status_code, 403)
+
+    def test_placeholder_never_serves_other_types(self):
+        self.client.post("/upload/", {"upload": self.image()})
+        job = UploadJob.objects.get()
+        UploadJob.objects.update(content_type="text/html")  # a row from before the check
+        self.assertEqual(self.client.get(f"/uploads/{job.idempotency_key}/").status_code, 404)
+
+    def test_failed_job_is_queued_again_for_the_same_file(self):
+        StubStorageBackend.fail_times = 1
+        self.client.post("/upload/", {"upload": self.image()})
+        with override_settings(UPLOAD_MAX_ATTEMPTS=1):
+            self.run_worker()
+        self.assertEqual(UploadJob.objects.get().status, UploadJob.FAILED)
+
+        self.client.post("/upload/", {"upload": self.image()})
+        job = UploadJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (UploadJob.PENDING, 0))
+        self.run_worker()
+        self.assertEqual(UploadJob.objects.get().status, UploadJob.DONE)
+
+    def test_same_file_is_queued_once(self):
+        self.client.post("/upload/", {"upload": self.image()})
+        self.client.post("/upload/", {"upload": self.image()})
+        self.assertEqual(UploadJob.objects.count(), 1)
+
+    def test_spooled_bytes_live_on_the_job_until_it_is_done(self):
+        image = self.image()
+        self.client.post("/upload/", {"upload": image})
+        image.seek(0)
+        self.assertEqual(bytes(UploadJob.objects.get().data), image.read())
+
+        # any worker can take it: nothing it needs is on this machine's disk
+        self.run_worker()
+        job = UploadJob.objects.get()
+        self.assertEqual(job.status, UploadJob.DONE)
+        self.assertEqual(bytes(job.data), b"")
+        self.assertEqual(len(StubStorageBackend.uploaded), 1)
+
+    def test_failed_upload_is_retried_with_backoff(self):
+        StubStorageBackend.fail_times = 1
+        self.client.post("/upload/", {"upload": self.image()})
+        self.run_worker()
+
+        job = UploadJob.objects.get()
+        self.assertEqual(job.status, UploadJob.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+
+        UploadJob.objects.update(next_attempt_at=timezone.now())
+        self.run_worker()
+        self.assertEqual(UploadJob.objects.get().status, UploadJob.DONE)
+
+    def test_blog_image_is_swapped_in_by_worker(self):
+        user = User.objects.create_user("writer", password="pw")
+        self.client.force_login(user)
+        self.client.post("/blog/", {
+            "title": "With a picture",
+            "content": "<p>Hello</p>",
+            "image": self.image("navy"),
+        })
+        blog = Blogs.objects.get()
+        self.assertFalse(blog.image)
+
+        self.run_worker()
+        blog.refresh_from_db()
+        self.assertIn("stub/", blog.image.public_id)
+
+    def test_blog_image_gets_responsive_variants(self):
+        buf = BytesIO()
+        PILImage.new("RGB", (800, 400), "teal").save(buf, format="JPEG")
+        user = User.objects.create_user("painter", password="pw")
+        self.client.force_login(user)
+        self.client.post("/blog/", {
+            "title": "Big picture",
+            "content": "<p>Hello</p>",
+            "image": SimpleUploadedFile("pic.jpg", buf.getvalue(), content_type="image/jpeg"),
+        })
+        self.run_worker()
+
+        blog = Blogs.objects.get()
+        variants = blog.image_variants
+        self.assertEqual((variants["width"], variants["height"]), (800, 400))
+        webp = variants["sources"]["image/webp"]
+        self.assertEqual([width for width, _ in webp], [320, 640, 800])  # no upscaling
+        self.assertEqual(variants["fallback"], webp[-1][1])
+
+        html = Template(
+            "{% load responsive_images %}{% picture blog.image blog.image_variants alt=blog.title %}"
+        ).render(Context({"blog": blog}))
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertIn(f'{webp[0][1]} 320w', html)
+        self.assertIn('width="800" height="400"', html)
+
+    def test_signup_with_an_unqueueable_image_is_a_form_error(self):
+        self.client.logout()
+        buf = BytesIO()
+        PILImage.new("RGB", (4, 4), "teal").save(buf, format="BMP")
+        response = self.client.post("/signup/", {
+            "username": "newcomer", "first_name": "New", "last_name": "Comer", "email": "n@example.com",
+            "password1": "a-long-Passw0rd", "password2": "a-long-Passw0rd",
+            "image": SimpleUploadedFile("pic.bmp", buf.getvalue(), content_type="image/bmp"),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("image", response.context["form"].errors)
+        self.assertFalse(User.objects.filter(username="newcomer").exists())
+        self.assertEqual(UploadJob.objects.count(), 0)
+
+
+class ImportTests(TestCase):
+    def records(self):
+        return [
+            {"model": "auth.user", "pk": 40, "fields": {"username": "old", "password": "!", "is_staff": True}},
+            {"model": "app1.blogs", "pk": 90, "fields": {
+                "title": "Imported", "content": "<p>one two three</p>", "author": 40,
+                "created_at": "2020-01-02T03:04:05Z", "likes": [40], "bookmarks": [],
+            }},
+            {"model": "app1.comment", "pk": 1, "fields": {"blog": 90, "user": 40, "content": "hi"}},
+            {"model": "app1.comment", "pk": 2, "fields": {"blog": 12345, "user": 40, "content": "dangling"}},
+        ]
+
+    def run_import(self, payload, **kwargs):
+        importer = Importer(**kwargs)
+        return list(importer.run(BytesIO(payload)))[-1]
+
+    def test_ndjson_import_remaps_keys_and_keeps_timestamps(self):
+        payload = "\n".join(json.dumps(r) for r in self.records()).encode()
+        stats = self.run_import(payload, batch_size=2)
+
+        user = User.objects.get(username="old")
+        self.assertFalse(user.is_staff)
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        blog = Blogs.objects.get()
+        self.assertEqual(blog.author, user)
+        self.assertEqual(blog.created_at.year, 2020)
+        self.assertEqual(blog.excerpt, "one two three")
+        self.assertEqual((blog.likes_count, blog.comments_count), (1, 1))
+        self.assertEqual(stats["skipped"], {"app1.comment": 1})
+
+    def test_resumes_from_checkpoint(self):
+        payload = json.dumps(self.records(), indent=1).encode()
+        checkpoint = os.path.join(tempfile.mkdtemp(), "dump.checkpoint")
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+
+        first = Importer(batch_size=1, checkpoint_path=checkpoint)
+        next(first.run(BytesIO(payload)))  # commit the user batch, then stop
+        self.assertTrue(os.path.exists(checkpoint))
+
+        self.run_import(payload, batch_size=1, checkpoint_path=checkpoint)
+        self.assertEqual(User.objects.filter(username="old").count(), 1)
+        self.assertEqual(Blogs.objects.get().author.username, "old")
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_resumed_import_still_invalidates_posts_touched_before_the_stop(self):
+        django_cache.clear()
+        host = User.objects.create_user("host", password="pw")
+        post = Blogs.objects.create(title="Here already", content="<p>x</p>", author=host)
+        payload = "\n".join(json.dumps(r) for r in [
+            {"model": "app1.comment", "pk": 1, "fields": {"blog": post.pk, "user": host.pk, "content": "hi"}},
+            {"model": "auth.user", "pk": 41, "fields": {"username": "later", "password": "!"}},
+        ]).encode()
+        checkpoint = os.path.join(tempfile.mkdtemp(), "dump.checkpoint")
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+        version = cache.get_version(cache.blog_scope(post.pk))
+
+        first = Importer(batch_size=1, checkpoint_path=checkpoint)
+        next(first.run(BytesIO(payload)))  # the comment batch, then stop
+        self.run_import(payload, batch_size=1, checkpoint_path=checkpoint)
+        self.assertNotEqual(cache.get_version(cache.blog_scope(post.pk)), version)
+
+    def test_imported_posts_get_related_posts(self):
+        payload = "\n".join(json.dumps(r) for r in [
+            {"model": "auth.user", "pk": 40, "fields": {"username": "old", "password": "!"}},
+            {"model": "app1.blogs", "pk": 1, "fields": {
+                "title": "Tuning SQLite indexes", "content": "<p>covering indexes make sqlite fast</p>", "author": 40}},
+            {"model": "app1.blogs", "pk": 2, "fields": {
+                "title": "Postgres indexes", "content": "<p>covering indexes speed up queries</p>", "author": 40}},
+        ]).encode()
+        self.run_import(payload)
+        postgres, sqlite = Blogs.objects.order_by("title")
+        self.assertEqual([b.pk for b in related.similar(sqlite.pk)], [postgres.pk])
+
+    def test_web_import_streams_small_dumps_and_refuses_large_ones(self):
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        payload = "\n".join(json.dumps(r) for r in self.records()).encode()
+        response = self.client.post("/import-data/", {"dump": SimpleUploadedFile("d.ndjson", payload)})
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(lines[-1]["inserted"]["app1.blogs"], 1)
+
+        with override_settings(IMPORT_WEB_MAX_BYTES=len(payload) - 1):
+            response = self.client.post("/import-data/", {"dump": SimpleUploadedFile("d.ndjson", payload)})
+        self.assertEqual(response.status_code, 413)
+        self.assertIn(b"manage.py import_data", response.content)
+        self.assertEqual(Blogs.objects.count(), 1)
+
+
+class CleanBlogsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("writer", password="pw")
+        self.dirty = Blogs.objects.create(
+            title="Hello {{ user.name }}", content="<p>keep {{ a }}this{{\nb }} and {{ unclosed</p>",
+            author=self.author,
+        )
+        self.clean = Blogs.objects.create(title="Plain", content="<p>nothing {here}</p>", author=self.author)
+
+    def clean_blogs(self, *args):
+        out = StringIO()
+        call_command("clean_blogs", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_removes_each_pair_up_to_the_first_closing_braces(self):
+        self.assertEqual(remove_template_code(" a {{ x }} b {{ y }}} c "), "a  b } c")
+        self.assertEqual(remove_template_code("{{ unclosed"), "{{ unclosed")
+        self.assertEqual(remove_template_code("{{ multi\nline }}x"), "x")
+        self.assertIsNone(remove_template_code(None))
+
+    def test_rewrites_changed_posts_and_their_derived_fields(self):
+        clean_before = Blogs.objects.get(pk=self.clean.pk).updated_at
+        self.assertIn("Cleaned 1 of 2", self.clean_blogs("--batch-size", "1"))
+        blog = Blogs.objects.get(pk=self.dirty.pk)
+        self.assertEqual(blog.title, "Hello")
+        self.assertEqual(blog.content, "<p>keep this and {{ unclosed</p>")
+        self.assertEqual(blog.plain_text, "keep this and {{ unclosed")
+        self.assertEqual(Blogs.objects.get(pk=self.clean.pk).updated_at, clean_before)
+        self.assertEqual([b.pk for b in search.search_blogs(Blogs.objects.all(), "this")], [blog.pk])
+
+    def test_dry_run_and_worker_processes(self):
+        self.assertIn("Would clean 1 of 2", self.clean_blogs("--dry-run"))
+        self.assertEqual(Blogs.objects.get(pk=self.dirty.pk).title, "Hello {{ user.name }}")
+        self.assertIn(f"Cleaned blog ids: {self.dirty.pk}", self.clean_blogs("--workers", "2", "--batch-size", "1"))
+        self.assertEqual(Blogs.objects.get(pk=self.dirty.pk).title, "Hello")
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("writer", password="pw")
+        self.old = Blogs.objects.create(title="Old, \"quoted\"", content="<p>é</p>", author=self.author)
+        Blogs.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=30))
+        self.new = Blogs.objects.create(title="New", content="<p>x</p>", author=self.author)
+        self.new.likes.add(self.author)
+
+    def export(self, name, fmt="ndjson", **kwargs):
+        return b"".join(exporter.stream(name, fmt, **kwargs))
+
+    def test_ndjson_uses_the_dumpdata_shape_and_imports_back(self):
+        records = [json.loads(line) for line in self.export("blogs").splitlines()]
+        self.assertEqual([r["pk"] for r in records], [self.old.pk, self.new.pk])
+        self.assertEqual(records[0]["model"], "app1.blogs")
+        self.assertEqual(records[0]["fields"]["author"], self.author.pk)
+        self.assertEqual(records[0]["fields"]["content"], "<p>é</p>")
+        likes = [json.loads(line) for line in self.export("likes").splitlines()]
+        self.assertEqual([r["fields"] for r in likes], [{"blogs": self.new.pk, "user": self.author.pk}])
+
+        list(Importer().run(BytesIO(self.export("blogs"))))
+        self.assertEqual(Blogs.objects.filter(title="New").count(), 2)
+
+    def test_csv_gzip_and_since(self):
+        lines = self.export("blogs", "csv").decode().splitlines()
+        self.assertEqual(lines[0], "pk,title,content,author,image,created_at")
+        self.assertTrue(lines[1].startswith(f'{self.old.pk},"Old, ""quoted""",<p>é</p>,{self.author.pk},'))
+        self.assertEqual(gzip.decompress(self.export("blogs", "csv", gzip=True)), self.export("blogs", "csv"))
+
+        since = timezone.now() - timedelta(days=1)
+        self.assertEqual([json.loads(line)["pk"] for line in self.export("blogs", since=since).splitlines()],
+                         [self.new.pk])
+        with self.assertRaises(ValueError):
+            self.export("likes", since=since)
+
+    def test_command_and_admin_action(self):
+        path = os.path.join(tempfile.mkdtemp(), "blogs.ndjson.gz")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command("export_data", "blogs", "--gzip", "--since", "2000-01-01", "-o", path, stderr=StringIO())
+        with open(path, "rb") as fh:
+            self.assertEqual(gzip.decompress(fh.read()), self.export("blogs"))
+        with self.assertRaises(CommandError):
+            call_command("export_data", "likes", "--since", "yesterday")
+
+        self.client.force_login(User.objects.create_user("admin", password="pw", is_staff=True, is_superuser=True))
+        response = self.client.post("/admin/app1/blogs/", {
+            "action": "export_csv", "_selected_action": [self.new.pk],
+        })
+        self.assertIn('.csv"', response["Content-Disposition"])
+        self.assertEqual(b"".join(response.streaming_content).decode().splitlines()[1].split(",")[0], str(self.new.pk))
+
+
+class CommentTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.author = User.objects.create_user("writer", password="pw")
+        self.reader = User.objects.create_user("reader", password="pw", first_name="Rea")
+        self.blog = Blogs.objects.create(title="Talk", content="<p>x</p>", author=self.author)
+        self.client.force_login(self.reader)
+
+    def comment(self, content, parent=None):
+        data = {"content": content, **({"parent": parent} if parent else {})}
+        return self.client.post(f"/blogs/{self.blog.pk}/comment/", data, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def test_ajax_comment_returns_its_html_and_the_new_count(self):
+        data = self.comment("<b>first</b>").json()
+        self.assertEqual(data["comments_count"], 1)
+        self.assertIsNone(data["parent"])
+        self.assertIn("&lt;b&gt;first&lt;/b&gt;", data["html"])
+
+        self.assertEqual(self.comment("   ").status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.comment("anon").status_code, 302)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_replies_stay_one_level_deep(self):
+        root = self.comment("root").json()["id"]
+        reply = self.comment("reply", parent=root).json()
+        nested = self.comment("reply to reply", parent=reply["id"]).json()
+        self.assertEqual((reply["parent"], nested["parent"]), (root, root))
+        self.assertEqual(Comment.objects.get(pk=root).replies_count, 2)
+
+        other = Blogs.objects.create(title="Other", content="<p>x</p>", author=self.author)
+        foreign = Comment.objects.create(blog=other, user=self.reader, content="elsewhere")
+        self.assertIsNone(self.comment("not a reply", parent=foreign.pk).json()["parent"])
+
+    @override_settings(COMMENTS_PAGE_SIZE=2)
+    def test_comment_pages_follow_the_cursor_and_new_comments(self):
+        ids = [self.comment(f"c{i}").json()["id"] for i in range(3)]
+        url = f"/blogs/{self.blog.pk}/comments/"
+        first = self.client.get(url, {"format": "json"}).json()
+        second = self.client.get(url, {"format": "json", "cursor": first["next_cursor"]}).json()
+        self.assertEqual([c["id"] for c in first["comments"] + second["comments"]], ids[::-1])
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(first["comments"][0]["user"], "Rea")
+
+        newest = self.comment("c3").json()["id"]
+        self.assertEqual(self.client.get(url, {"format": "json"}).json()["comments"][0]["id"], newest)
+        replies = self.client.get(url, {"format": "json", "parent": ids[0]}).json()
+        self.assertEqual(replies["comments"], [])
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        # sampled requests log a JSON line each; assertLogs still sees them
+        logger = logging.getLogger("app1.requests")
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        self.addCleanup(logger.setLevel, level)
+        patcher = mock.patch.object(pageviews, "FLUSH_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pageviews.flush)
+        self.registry = Registry()
+        for target in (middleware, "registry"), (views, "metrics_registry"):
+            patcher = mock.patch.object(*target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        author = User.objects.create_user("writer", password="pw")
+        self.blog = Blogs.objects.create(title="Timed", content="<p>x</p>", author=author)
+
+    @override_settings(APP1_METRICS_SAMPLE_RATE=1)
+    def test_sampled_requests_are_timed_and_logged(self):
+        with self.assertLogs("app1.requests", "INFO") as logs:
+            response = self.client.get(f"/blogs/{self.blog.pk}/")
+        self.assertRegex(response["Server-Timing"], r'^db;desc="\d+ queries";dur=[\d.]+, tpl;dur=[\d.]+, total;dur=')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record["view"], record["status"]), ("blog_detail", 200))
+        self.assertGreater(record["sql_count"], 0)
+        self.assertGreater(record["template_ms"], 0)
+
+        rendered = self.registry.render()
+        self.assertIn('app1_requests_total{view="blog_detail",status="2xx"} 1', rendered)
+        self.assertIn('app1_request_sql_queries_count{view="blog_detail"} 1', rendered)
+
+    @override_settings(APP1_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_only_count_latency(self):
+        response = self.client.get(f"/blogs/{self.blog.pk}/")
+        self.assertFalse(response.has_header("Server-Timing"))
+        rendered = self.registry.render()
+        self.assertIn('app1_request_duration_seconds_count{view="blog_detail"} 1', rendered)
+        self.assertNotIn('app1_request_sql_queries_count{view="blog_detail"}', rendered)
+
+    @override_settings(APP1_METRICS_SAMPLE_RATE=1, APP1_N_PLUS_ONE_THRESHOLD=3)
+    def test_repeated_queries_are_flagged(self):
+        def looping_view(request):
+            for _ in range(3):
+                Blogs.objects.filter(pk=self.blog.pk).exists()
+            return HttpResponse("ok")
+
+        instrumented = middleware.InstrumentationMiddleware(looping_view)
+        with self.assertLogs("app1.requests", "WARNING") as logs:
+            instrumented(RequestFactory().get("/loop/"))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record["max_repeated_sql"], record["n_plus_one"]), (3, True))
+        self.assertIn('app1_n_plus_one_requests_total{view="<unmatched>"} 1', self.registry.render())
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_need_the_bearer_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        self.assertIn(b"# TYPE app1_requests_total counter", response.content)
+
+
+# what Django warns before collecting a sync iterator into a list under ASGI
+BUFFERED_STREAM = "StreamingHttpResponse must consume synchronous iterators"
+
+
+class StreamingTests(TestCase):
+    """Streams are sent chunk by chunk under ASGI, not collected first."""
+
+    def asgi_post(self, path, data, events):
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        body = encode_multipart(BOUNDARY, data)
+        csrf = "c" * 32
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}; " \
+                 f"{settings.CSRF_COOKIE_NAME}={csrf}"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "client": ("127.0.0.1", 5000), "server": ("localhost", 80),
+            "headers": [
+                (b"host", b"localhost"), (b"cookie", cookie.encode()), (b"x-csrftoken", csrf.encode()),
+                (b"content-type", MULTIPART_CONTENT.encode()), (b"content-length", str(len(body)).encode()),
+            ],
+        }
+
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()  # the client stays connected
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                events.append("sent")
+
+        # as the test client does: keep the test transaction's connection open
+        request_started.disconnect(close_old_connections)
+        self.addCleanup(request_started.connect, close_old_connections)
+        handler = ASGIHandler()
+        with warnings.catch_warnings():
+            warnings.filterwarnings("error", BUFFERED_STREAM)
+            async_to_sync(handler)(scope, receive, send)
+
+    def test_import_progress_is_sent_per_batch(self):
+        events = []
+
+        class SlowImporter:
+            def run(self, dump):
+                for batch in (1, 2):
+                    events.append(f"batch {batch}")
+                    yield {"batch": batch}
+
+        with mock.patch.object(views, "Importer", SlowImporter):
+            self.asgi_post("/import-data/", {"dump": SimpleUploadedFile("d.ndjson", b"{}")}, events)
+        self.assertEqual(events, ["batch 1", "sent", "batch 2", "sent"])
+
+    def test_export_is_pulled_one_chunk_at_a_time(self):
+        produced = []
+
+        def chunks():
+            for n in range(3):
+                produced.append(n)
+                yield b"x"
+
+        response = StreamingResponse(chunks())
+
+        async def first_chunk():
+            async for part in response:
+                return part
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings("error", BUFFERED_STREAM)
+            self.assertEqual(async_to_sync(first_chunk)(), b"x")
+        self.assertEqual(produced, [0])
+        self.assertIsInstance(exporter.response("blogs"), StreamingResponse)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.author = User.objects.create_user("writer", password="pw")
+        self.reader = User.objects.create_user("reader", password="pw")
+        self.blog = Blogs.objects.create(title="Counted", content="<p>x</p>", author=self.author)
+        self.client.force_login(self.reader)
+
+    def test_toggles_keep_counters_in_step(self):
+        like, bookmark = f"/blogs/{self.blog.pk}/like/", f"/blogs/{self.blog.pk}/bookmark/"
+        self.assertEqual(self.client.post(like).json(), {"liked": True, "count": 1})
+        self.assertEqual(self.client.post(bookmark).json(), {"bookmarked": True, "count": 1})
+        self.assertEqual(self.client.post(like).json(), {"liked": False, "count": 0})
+        self.assertEqual(self.client.post("/blogs/999999/like/").status_code, 404)
+
+        # a drifted counter never goes negative
+        self.client.post(like)
+        Blogs.objects.filter(pk=self.blog.pk).update(likes_count=0)
+        self.assertEqual(self.client.post(like).json(), {"liked": False, "count": 0})
+
+    def test_rebuild_counters_recounts_from_the_source_tables(self):
+        self.blog.likes.add(self.reader)
+        comment = Comment.objects.create(blog=self.blog, user=self.reader, content="hi")
+        Comment.objects.create(blog=self.blog, user=self.author, content="re", parent=comment)
+        self.client.post(f"/users/{self.author.pk}/follow/")
+        Blogs.objects.update(likes_count=7, bookmarks_count=3, comments_count=0)
+        Comment.objects.update(replies_count=5)
+        Profile.objects.update(followers_count=9)
+
+        call_command("rebuild_counters", stdout=StringIO())
+        blog = Blogs.objects.get()
+        self.assertEqual((blog.likes_count, blog.bookmarks_count, blog.comments_count), (1, 0, 2))
+        self.assertEqual(Comment.objects.get(pk=comment.pk).replies_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.author).followers_count, 1)
+        self.assertEqual(Profile.objects.get(user=self.reader).followers_count, 0)
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.reader = User.objects.create_user("reader")
+        self.author = User.objects.create_user("author")
+
+    def post(self, title, author=None):
+        return Blogs.objects.create(title=title, content="<p>x</p>", author=author or self.author)
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        old = self.post("old")
+        following, count = feeds.toggle_follow(self.reader, self.author.pk)
+        self.assertEqual((following, count), (True, 1))
+        new = self.post("new")
+
+        page = feeds.feed_page(self.reader)
+        self.assertEqual([b.pk for b in page], [new.pk, old.pk])
+
+        feeds.toggle_follow(self.reader, self.author.pk)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(Profile.objects.get(user=self.author).followers_count, 0)
+
+    def test_feed_is_capped_and_pages_by_cursor(self):
+        feeds.toggle_follow(self.reader, self.author.pk)
+        with mock.patch.object(feeds, "MAX_LENGTH", 3):
+            posts = [self.post(f"p{i}") for i in range(5)]
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 3)
+
+        first = feeds.feed_page(self.reader, per_page=2)
+        second = feeds.feed_page(self.reader, first.next_cursor, per_page=2)
+        self.assertEqual([b.pk for b in first] + [b.pk for b in second],
+                         [p.pk for p in reversed(posts)][:3])
+        self.assertFalse(second.has_next())
+
+    def test_high_follower_authors_are_merged_at_read_time(self):
+        star = User.objects.create_user("star")
+        quiet_post = self.post("quiet")
+        feeds.toggle_follow(self.reader, self.author.pk)
+        with mock.patch.object(feeds, "FANOUT_MAX_FOLLOWERS", 1):
+            feeds.toggle_follow(self.reader, star.pk)
+            star_post = self.post("star post", author=star)
+            self.assertFalse(FeedEntry.objects.filter(blog=star_post).exists())
+            with self.assertNumQueries(2):
+                page = feeds.feed_page(self.reader)
+        self.assertEqual([b.pk for b in page], [star_post.pk, quiet_post.pk])
+
+    def test_posts_stay_in_the_feed_when_an_author_cools_down(self):
+        star = User.objects.create_user("star")
+        fan = User.objects.create_user("fan")
+        with mock.patch.object(feeds, "FANOUT_MAX_FOLLOWERS", 2):
+            feeds.toggle_follow(self.reader, star.pk)
+            feeds.toggle_follow(fan, star.pk)
+            star_post = self.post("while hot", author=star)
+            self.assertFalse(FeedEntry.objects.filter(blog=star_post).exists())
+            feeds.toggle_follow(fan, star.pk)  # back under the threshold
+            page = feeds.feed_page(self.reader)
+        self.assertEqual([b.pk for b in page], [star_post.pk])
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, blog=star_post).exists())
+
+    def test_following_a_user_without_a_profile_creates_it(self):
+        Profile.objects.filter(user=self.author).delete()
+        self.client.force_login(self.reader)
+        response = self.client.post(f"/users/{self.author.pk}/follow/")
+        self.assertEqual(response.json(), {"following": True, "followers": 1})
+
+    def test_import_fans_out_to_existing_followers(self):
+        feeds.toggle_follow(self.reader, self.author.pk)
+        record = {"model": "app1.blogs", "pk": 1, "fields": {
+            "title": "Imported", "content": "<p>x</p>", "author": self.author.pk}}
+        list(Importer().run(BytesIO(json.dumps(record).encode())))
+        self.assertEqual([b.title for b in feeds.feed_page(self.reader)], ["Imported"])
+
+
+class RankingTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.user = User.objects.create_user("fan")
+        self.author = User.objects.create_user("writer")
+        self.old, self.new = (
+            Blogs.objects.create(title=t, content="<p>x</p>", author=self.author) for t in ("old", "new")
+        )
+
+    def test_engagement_is_bucketed_as_it_happens(self):
+        self.client.force_login(self.user)
+        self.client.post(f"/blogs/{self.old.pk}/like/")
+        self.client.post(f"/blogs/{self.old.pk}/bookmark/")
+        self.client.post(f"/blogs/{self.old.pk}/comment/", {"content": "hi"})
+        self.client.post(f"/blogs/{self.old.pk}/like/")  # unlike
+
+        bucket = EngagementBucket.objects.get(blog=self.old)
+        self.assertEqual((bucket.likes, bucket.bookmarks, bucket.comments), (0, 1, 1))
+
+    def test_posts_and_users_with_comments_can_be_deleted(self):
+        comment = Comment.objects.create(blog=self.old, user=self.user, content="first")
+        Comment.objects.create(blog=self.old, user=self.user, content="reply", parent=comment)
+        Comment.objects.create(blog=self.new, user=self.user, content="other")
+
+        self.client.force_login(User.objects.create_user("admin", password="pw", is_staff=True))
+        response = self.client.post(f"/blog/{self.old.pk}/delete/")
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Blogs.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(EngagementBucket.objects.filter(blog_id=self.old.pk).exists())
+
+        self.author.delete()
+        self.assertFalse(Blogs.objects.exists())
+        self.assertFalse(EngagementBucket.objects.exists())
+
+        post = Blogs.objects.create(title="again", content="<p>x</p>", author=self.user)
+        Comment.objects.create(blog=post, user=self.user, content="gone soon").delete()
+        self.assertEqual(EngagementBucket.objects.get(blog=post).comments, 0)
+
+    def test_scores_decay_and_drive_trending_order(self):
+        now = timezone.now()
+        EngagementBucket.objects.create(blog=self.new, bucket=ranking.bucket_start(now), likes=4)
+        EngagementBucket.objects.create(
+            blog=self.old, bucket=ranking.bucket_start(now - timedelta(hours=48)), likes=10,
+        )
+        scores = ranking.compute_scores(now)
+        self.assertAlmostEqual(scores[self.old.pk] / scores[self.new.pk], 10 / 4 * 0.25, places=1)
+
+        ranking.store_scores({self.old.pk: 5.0})
+        response = self.client.get("/trending/")
+        self.assertEqual([b.pk for b in response.context["blogs"]], [self.old.pk, self.new.pk])
+
+
+class RelatedPostTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.author = User.objects.create_user("writer", password="pw")
+        self.posts = {}
+        for name, title, body in (
+            ("sqlite", "Tuning SQLite indexes", "covering indexes make sqlite queries fast; sqlite planner"),
+            ("cats", "Caring for cats", "kittens need vaccinations, grooming and a warm bed"),
+            ("indexes", "Postgres indexes", "btree indexes and covering indexes speed up queries"),
+        ):
+            # indexing runs when the saving transaction commits
+            with self.captureOnCommitCallbacks(execute=True):
+                self.posts[name] = Blogs.objects.create(title=title, content=f"<p>{body}</p>", author=self.author)
+
+    def edit(self, post, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/blog/{post.pk}/edit/", data)
+
+    def test_saving_a_post_relates_it_both_ways(self):
+        sqlite, cats, indexes = (self.posts[n] for n in ("sqlite", "cats", "indexes"))
+        self.assertEqual([b.pk for b in related.similar(indexes.pk)], [sqlite.pk])
+        self.assertEqual([b.pk for b in related.similar(sqlite.pk)], [indexes.pk])
+        self.assertEqual(related.similar(cats.pk), [])
+
+        incremental = set(RelatedPost.objects.values_list("blog_id", "related_id"))
+        self.assertEqual(related.rebuild(), 3)
+        self.assertEqual(set(RelatedPost.objects.values_list("blog_id", "related_id")), incremental)
+
+    def test_tags_from_the_form_relate_posts_on_the_detail_page(self):
+        cats, indexes = self.posts["cats"], self.posts["indexes"]
+        self.client.force_login(self.author)
+        for post in (cats, indexes):
+            self.edit(post, title=post.title, content=post.content, tags="Weekend reads, weekend-reads")
+        self.assertEqual([t.slug for t in cats.tags.all()], ["weekend-reads"])
+
+        response = self.client.get(f"/blogs/{cats.pk}/")
+        self.assertEqual([b.pk for b in response.context["related_posts"]], [indexes.pk])
+        self.assertContains(response, "Weekend reads")
+
+    def test_posts_are_indexed_once_per_commit_and_only_when_their_text_changes(self):
+        cats = self.posts["cats"]
+        self.client.force_login(self.author)
+        form = {"title": cats.title, "content": cats.content, "tags": "pets"}
+        with mock.patch.object(related, "index", wraps=related.index) as index:
+            self.edit(cats, **form)  # new tag
+            self.assertEqual(index.call_count, 1)
+            self.edit(cats, **form)  # nothing changed
+            with self.captureOnCommitCallbacks(execute=True):
+                Blogs.objects.get(pk=cats.pk).save()
+            self.assertEqual(index.call_count, 1)
+            self.edit(cats, **{**form, "title": "Caring for kittens"})
+            self.assertEqual(index.call_count, 2)
+
+        with self.captureOnCommitCallbacks() as pending:
+            Blogs.objects.create(title="Queued", content="<p>covering indexes</p>", author=self.author)
+        self.assertFalse(RelatedPost.objects.filter(blog__title="Queued").exists())
+        self.assertEqual(len(pending), 1)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("writer", password="pw", first_name="Ada", last_name="Lovelace")
+        self.engine = Blogs.objects.create(
+            title="Analytical engines", content="<p>punched cards drive the mill</p>", author=self.author,
+        )
+        self.cats = Blogs.objects.create(title="Caring for cats", content="<p>grooming</p>", author=self.author)
+
+    def test_posts_are_found_by_body_with_highlighted_snippets(self):
+        response = self.client.get("/all-blogs/", {"q": "punched"})
+        self.assertEqual([b.pk for b in response.context["blogs"]], [self.engine.pk])
+        self.assertIn("<mark>punched</mark>", response.context["blogs"][0].search_snippet)
+
+    def test_renaming_an_author_reindexes_their_posts(self):
+        self.author.last_name = "Byron"
+        self.author.save()
+        found = [b.pk for b in search.search_blogs(Blogs.objects.all(), "Byron")]
+        self.assertEqual(sorted(found), sorted([self.engine.pk, self.cats.pk]))
+        self.assertEqual(search.search_blogs(Blogs.objects.all(), "Lovelace"), [])
+
+    def test_rebuild_fills_an_empty_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM app1_blogs_fts")
+        self.assertEqual(search.search_blogs(Blogs.objects.all(), "grooming"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual([b.pk for b in search.search_blogs(Blogs.objects.all(), "grooming")], [self.cats.pk])
+
+    def test_admin_search_matches_every_post_in_one_query(self):
+        extra = [
+            Blogs.objects.create(title=f"Engine {n}", content="<p>x</p>", author=self.author) for n in range(3)
+        ]
+        self.client.force_login(User.objects.create_user("admin", password="pw", is_staff=True, is_superuser=True))
+        response = self.client.get("/admin/app1/blogs/", {"q": "engine"})
+        found = {b.pk for b in response.context["cl"].result_list}
+        self.assertEqual(found, {self.engine.pk, *(b.pk for b in extra)})
+
+
+class SanitizeTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.author = User.objects.create_user("author", password="pw")
+
+    def test_edits_are_sanitized_once_and_pages_serve_the_stored_copy(self):
+        blog = Blogs.objects.create(title="Post", content="<p>draft</p>", author=self.author)
+        self.client.force_login(self.author)
+        self.client.post(f"/blog/{blog.pk}/edit/", {
+            "title": "Post",
+            "content": '<p onclick="x()">Hi <script>steal()</script><a href="javascript:x()">there</a></p>'
+                       '<figure class="image"><img src="https://example.com/a.png" onerror="x()"></figure>',
+        })
+        blog.refresh_from_db()
+        self.assertIn("<script>", blog.content)  # the editor source is kept as sent
+        self.assertEqual(
+            blog.safe_html,
+            '<p>Hi <a>there</a></p><figure class="image">'
+            '<img src="https://example.com/a.png" loading="lazy" decoding="async"></figure>',
+        )
+        self.assertEqual(blog.plain_text, "Hi there")
+
+        with mock.patch("app1.sanitize.CLEANER.clean") as clean:
+            response = self.client.get(f"/blogs/{blog.pk}/")
+        clean.assert_not_called()
+        self.assertContains(response, blog.safe_html, html=False)
+        self.assertNotContains(response, "steal()")
+
+    def test_card_preview_keeps_inline_markup_and_closes_cut_tags(self):
+        words = " ".join(f"w{i}" for i in range(40))
+        blog = Blogs.objects.create(
+            title="Long", author=self.author,
+            content=f"<h2>Intro</h2><p>Some <strong>{words}</strong></p><ul><li>later</li></ul>",
+        )
+        self.assertEqual(blog.excerpt_html, "Intro Some <strong>" + " ".join(f"w{i}" for i in range(23)) + "…</strong>")
+        self.assertContains(self.client.get("/all-blogs/"), blog.excerpt_html, html=False)
+
+
+class UserCardTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.user = User.objects.create_user("ada", password="pw", first_name="Ada", last_name="Lovelace")
+
+    def profile_queries(self, queries):
+        return [q["sql"] for q in queries if "app1_profile" in q["sql"]]
+
+    def test_warm_logged_in_page_issues_no_profile_queries(self):
+        self.client.force_login(self.user)
+        self.client.get("/about/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/about/")
+        self.assertContains(response, ">AL</span>")
+        self.assertEqual(self.profile_queries(queries), [])
+
+    def test_user_saves_only_write_the_profile_when_it_changed(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.login(username="ada", password="pw")  # updates last_login
+        self.assertEqual(self.profile_queries(queries), [])
+
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+        user.profile.image_variants["width"] = 96
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        self.assertEqual(len(self.profile_queries(queries)), 1)
+        self.assertEqual(Profile.objects.get(user=user).image_variants, {"width": 96})
+
+    def test_card_follows_name_changes(self):
+        self.client.force_login(self.user)
+        self.client.get("/about/")
+        self.user.first_name, self.user.last_name = "Grace", "Hopper"
+        self.user.save()
+        self.assertContains(self.client.get("/about/"), ">GH</span>")
+
+
+class CachedAuthTests(TestCase):
+    def test_request_user_comes_from_the_cache_until_the_user_changes(self):
+        django_cache.clear()
+        user = User.objects.create_user("bob", password="old-password")
+        self.client.login(username="bob", password="old-password")
+        self.client.get("/about/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/about/")
+        self.assertFalse([q for q in queries if '"auth_user"' in q["sql"]])
+
+        user.set_password("new-password")
+        user.save()
+        response = self.client.get("/profile/")
+        self.assertRedirects(response, "/login?next=/profile/", fetch_redirect_response=False)
+
+
+class PageViewTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        patcher = mock.patch.object(pageviews, "FLUSH_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pageviews.flush)
+        self.blog = Blogs.objects.create(
+            title="Read me", content="<p>x</p>", author=User.objects.create_user("writer"),
+        )
+
+    def test_views_are_deduplicated_and_flushed_in_one_batch(self):
+        url = f"/blogs/{self.blog.pk}/"
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+            self.client.get(url)  # same visitor inside the window
+            self.client.get(url, REMOTE_ADDR="10.0.0.2")
+            self.client.get(f"/single-blog/{self.blog.pk}/", REMOTE_ADDR="10.0.0.3")
+        self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE")])
+
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views_count, 0)
+        self.assertEqual(pageviews.flush(), 1)
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views_count, 3)
+        self.assertEqual(EngagementBucket.objects.get(blog=self.blog).views, 3)
+
+    def test_failed_flush_is_retried_without_counting_twice(self):
+        other = Blogs.objects.create(title="Deleted", content="<p>x</p>", author=self.blog.author)
+        self.client.get(f"/blogs/{self.blog.pk}/")
+        self.client.get(f"/blogs/{other.pk}/")
+        other.delete()
+
+        with mock.patch.object(ranking, "record_many", side_effect=RuntimeError("down")):
+            with self.assertRaises(RuntimeError):
+                pageviews.flush()
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views_count, 0)
+
+        self.assertEqual(pageviews.flush(), 1)
+        self.assertEqual(pageviews.flush(), 0)
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views_count, 1)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_visitors_behind_the_proxy_are_told_apart(self):
+        url = f"/blogs/{self.blog.pk}/"
+        for client_ip in ("198.51.100.1", "198.51.100.2", "198.51.100.2"):
+            self.client.get(url, REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=f"203.0.113.9, {client_ip}")
+        pageviews.flush()
+        self.blog.refresh_from_db()
+        self.assertEqual(self.blog.views_count, 2)
+
+    def test_disabled_counter_records_nothing(self):
+        with mock.patch.object(pageviews, "ENABLED", False):
+            self.client.get(f"/blogs/{self.blog.pk}/")
+        self.assertEqual(pageviews.flush(), 0)
+
+
+class AssetTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.root, "vendor", "icons"))
+        os.makedirs(os.path.join(self.root, "css"))
+        with open(os.path.join(self.root, "vendor", "icons.css"), "w") as fh:
+            fh.write("/*! Icons v1 */\n@font-face { src: url(icons/solid.woff2) format('woff2'); }\n")
+        with open(os.path.join(self.root, "css", "site.css"), "w") as fh:
+            fh.write(".quote::before {\n  /* decoration */\n  content: \"a ,  b ; }\";\n  color : red;\n}\n")
+        override = override_settings(STATICFILES_DIRS=[self.root])
+        override.enable()
+        self.addCleanup(override.disable)
+        patches = [
+            mock.patch.dict(assets.BUNDLES, {"test.css": ["vendor/icons.css", "css/site.css"],
+                                             "test.js": ["vendor/missing.js"]}),
+            mock.patch.dict(assets.VENDOR, {"icons.css": "https://cdn.example/icons.css",
+                                            "missing.js": "https://cdn.example/missing.js"}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        asset_tags._urls.cache_clear()
+        self.addCleanup(asset_tags._urls.cache_clear)
+
+    def test_bundle_is_minified_with_urls_rebased(self):
+        assets.build("test.css")
+        with open(os.path.join(self.root, "dist", "test.css")) as fh:
+            css = fh.read()
+        self.assertIn("/*! Icons v1 */", css)
+        self.assertIn('url("../vendor/icons/solid.woff2")', css)
+        self.assertIn('content:"a ,  b ; }"', css)  # strings untouched
+        self.assertNotIn("decoration", css)
+        with self.assertRaises(assets.MissingPart):
+            assets.build("test.js")
+
+    def test_tags_fall_back_to_parts_until_built(self):
+        template = Template("{% load assets %}{% stylesheet 'test.css' %}{% javascript 'test.js' %}")
+        html = template.render(Context())
+        self.assertIn('href="/static/vendor/icons.css"', html)
+        self.assertIn('href="/static/css/site.css"', html)
+        self.assertIn('src="https://cdn.example/missing.js"', html)
+
+        assets.build("test.css")
+        asset_tags._urls.cache_clear()
+        html = template.render(Context())
+        self.assertEqual(html.count("<link"), 1)
+        self.assertIn('href="/static/dist/test.css"', html)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        patch = mock.patch.object(pageviews, "FLUSH_SECONDS", 0)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(pageviews.flush)
+        self.author = User.objects.create_user("author", password="pw")
+        self.blog = Blogs.objects.create(title="Cached", content="<p>same as before</p>", author=self.author)
+
+    def revalidate(self, url, response, queries=1):
+        with self.assertNumQueries(queries):
+            return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_unchanged_post_is_not_modified_after_one_query(self):
+        url = f"/blogs/{self.blog.pk}/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("public", first["Cache-Control"])
+        self.assertIn("Cookie", first["Vary"])
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        again = self.revalidate(url, first)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(again["ETag"], first["ETag"])
+
+        Comment.objects.create(blog=self.blog, user=self.author, content="new")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_logged_in_pages_are_private_and_follow_the_viewers_state(self):
+        reader = User.objects.create_user("reader", password="pw")
+        self.client.force_login(reader)
+        url = f"/blogs/{self.blog.pk}/"
+        first = self.client.get(url)
+        self.assertIn("private", first["Cache-Control"])
+        self.assertFalse(first.has_header("Last-Modified"))
+        # session + the post with the viewer's state
+        self.assertEqual(self.revalidate(url, first, queries=2).status_code, 304)
+
+        self.client.post(f"/blogs/{self.blog.pk}/like/")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_post_page_ignores_other_posts_and_view_flushes(self):
+        url = f"/blogs/{self.blog.pk}/"
+        first = self.client.get(url)
+        Blogs.objects.create(title="Unrelated", content="<p>x</p>", author=User.objects.create_user("other"))
+        pageviews.flush()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self.author.first_name = "Renamed"
+        self.author.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_renamed_users_show_up_in_listings_and_comment_threads(self):
+        commenter = User.objects.create_user("commenter", password="pw")
+        Comment.objects.create(blog=self.blog, user=commenter, content="hello")
+        url = f"/blogs/{self.blog.pk}/"
+        self.client.get("/all-blogs/")
+        self.client.get(url)
+
+        self.author.first_name = "Zelda"
+        self.author.save()
+        commenter.first_name = "Quincy"
+        commenter.save()
+        self.assertContains(self.client.get("/all-blogs/"), "Zelda")
+        self.assertContains(self.client.get(url), "Quincy")
+
+    def test_pending_messages_are_rendered_instead_of_not_modified(self):
+        self.client.force_login(User.objects.create_user("reader", password="pw"))
+        url = f"/blogs/{self.blog.pk}/"
+        first = self.client.get(url)
+        self.client.get(f"/blog/{self.blog.pk}/edit/")  # "not allowed", queued for the next page
+        # nothing on the page changed, only the message is waiting
+        self.assertEqual(self.client.get(url)["ETag"], first["ETag"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+    def test_listings_follow_the_newest_change(self):
+        first = self.client.get("/all-blogs/")
+        self.assertEqual(self.revalidate("/all-blogs/", first).status_code, 304)
+        more = self.client.get("/load-more-blogs/")
+        self.assertNotIn("Vary", more)
+        self.assertEqual(self.revalidate("/load-more-blogs/", more).status_code, 304)
+
+        self.blog.title = "Cached, edited"
+        self.blog.save()
+        self.assertEqual(self.client.get("/all-blogs/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+        self.assertEqual(self.client.get("/load-more-blogs/", HTTP_IF_NONE_MATCH=more["ETag"]).status_code, 200)
+
+
+class MarkdownTests(TestCase):
+    def setUp(self):
+        rendering.clear_cache()
+        self.addCleanup(rendering.clear_cache)
+
+    def render(self, text):
+        return Template("{% load markdown_extras %}{{ text|markdown }}").render(Context({"text": text}))
+
+    def test_renders_markdown_with_highlighted_code(self):
+        html = self.render("# Title\n\nSome **bold** text.\n\n```python\nprint(1)\n```\n")
+        self.assertIn("<h1>Title</h1>", html)
+        self.assertIn("<strong>bold</strong>", html)
+        self.assertIn('<div class="codehilite">', html)
+        self.assertIn('<span class="nb">print</span>', html)
+
+    def test_raw_html_is_sanitized(self):
+        html = self.render(
+            '<script>alert(1)</script>\n\n<img src="https://example.com/a.png" onerror="alert(2)">'
+            "\n\n[link](javascript:alert(3))"
+        )
+        self.assertNotIn("<script", html)
+        self.assertNotIn("alert", html)
+        self.assertIn('<img src="https://example.com/a.png" loading="lazy" decoding="async">', html)
+
+
+class AIAssistantTests(TestCase):
+    def setUp(self):
+        override = override_settings(
+            AI_CLIENT_CLASS="app1.ai.FakeChatClient", AI_FAKE_LATENCY=0,
+            AI_MAX_CONCURRENT_PER_USER=1, AI_BREAKER_THRESHOLD=2, AI_BREAKER_RESET=30,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        reset_service()
+        self.addCleanup(reset_service)
+        self.service = ai.get_service()
+
+    def test_identical_prompts_are_answered_from_the_cache(self):
+        with mock.patch.object(self.service.client, "complete", wraps=self.service.client.complete) as complete:
+            first = async_to_sync(self.service.complete)("user:1", "hello")
+            second = async_to_sync(self.service.complete)("user:2", "hello")
+        self.assertEqual(first, second)
+        self.assertEqual(complete.call_count, 1)
+
+        cache = ai.ResponseCache(max_entries=1, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual((cache.get("a"), cache.get("b")), (None, 2))
+
+    def test_limiter_caps_requests_in_flight_per_user(self):
+        stream = self.service.open_stream("user:1", "long answer")
+        with self.assertRaises(ai.TooManyRequests):
+            self.service.open_stream("user:1", "another")
+        self.service.open_stream("user:2", "another")  # other users aren't held up
+        async_to_sync(_drain)(stream)
+        self.service.open_stream("user:1", "a third")
+
+    def test_breaker_fails_fast_then_lets_one_trial_through(self):
+        failing = mock.AsyncMock(side_effect=ConnectionError("upstream down"))
+        with mock.patch.object(self.service.client, "complete", failing):
+            for prompt in ("one", "two"):
+                with self.assertRaises(ConnectionError):
+                    async_to_sync(self.service.complete)("user:1", prompt)
+            with self.assertRaises(ai.AIUnavailable):
+                async_to_sync(self.service.complete)("user:1", "three")
+        self.assertEqual(failing.await_count, 2)
+
+        breaker = self.service.breaker
+        breaker.opened_at -= 31
+        breaker.before_call()  # the half-open trial
+        with self.assertRaises(ai.AIUnavailable):
+            breaker.before_call()
+        breaker.record_success()
+        breaker.before_call()
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_streams_over_asgi_and_limits_anonymous_visitors_by_client_ip(self):
+        client = AsyncClient()
+        response = async_to_sync(client.post)(
+            "/ai-assistant/?stream=1", {"text": "hi"}, content_type="application/json",
+            REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.7",
+        )
+        self.assertTrue(response.is_async)
+        self.assertIn("You asked: hi", "".join(c.decode() for c in async_to_sync(_drain)(response.streaming_content)))
+
+        with mock.patch.object(self.service, "complete", mock.AsyncMock(return_value="ok")) as complete:
+            self.client.post("/ai-assistant/", {"text": "hi"}, content_type="application/json",
+                             REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="198.51.100.8")
+        complete.assert_awaited_once_with("ip:198.51.100.8", "hi")
+
+
+# ---------------- Query budgets ----------------
+# Every route in app1/urls.py, requested as an anonymous visitor, a logged-in
+# user and a staff user against a seeded dataset with a cold cache. Budgets
+# are (max queries for anon, user, staff), set to the measured counts so any
+# extra query fails, and a response-size ceiling in KiB.
+# If a change legitimately needs more, raise the number here in the same
+# commit so the diff shows it. Set QUERY_BUDGET_REPORT=<path> to write the
+# measured numbers as JSON for diffing between commits.
+QUERY_BUDGETS = {
+    '': ((1, 4, 4), 36),
+    'about/': ((0, 3, 3), 20),
+    'ai-assistant/': ((0, 2, 2), 4),
+    'all-blogs/': ((2, 5, 5), 52),
+    'app2/': ((0, 0, 0), 4),
+    'blog/': ((0, 5, 5), 52),
+    'blog/<int:pk>/delete/': ((0, 4, 5), 16),
+    'blog/<int:pk>/edit/': ((0, 4, 6), 32),
+    'blog_page/': ((0, 5, 5), 52),
+    'blogs/': ((2, 5, 5), 52),
+    'blogs/<int:blog_id>/': ((5, 8, 8), 64),
+    'blogs/<int:blog_id>/comment/': ((0, 6, 6), 4),
+    'blogs/<int:blog_id>/comments/': ((1, 3, 3), 36),
+    'blogs/<int:pk>/bookmark/': ((0, 11, 11), 4),
+    'blogs/<int:pk>/like/': ((0, 11, 11), 4),
+    'bookmarks/': ((0, 4, 4), 28),
+    'comments/<int:pk>/delete/': ((0, 2, 8), 4),
+    'contact/': ((0, 3, 3), 20),
+    'feed/': ((0, 5, 5), 44),
+    'feedback/': ((0, 3, 3), 20),
+    'home/': ((1, 4, 4), 36),
+    'homepage/': ((0, 0, 0), 4),
+    'import-data/': ((0, 2, 3), 16),
+    'load-more-blogs/': ((2, 2, 2), 8),
+    'login/': ((0, 3, 3), 16),
+    'logout/': ((0, 4, 4), 4),
+    'metrics': ((0, 2, 2), 108),
+    'profile': ((0, 5, 5), 24),
+    'profile/': ((0, 5, 5), 24),
+    'profile/edit/': ((0, 5, 5), 24),
+    'signup/': ((0, 3, 3), 20),
+    'single-blog/<int:blog_id>/': ((2, 5, 5), 20),
+    'trending/': ((1, 4, 4), 88),
+    'upload/': ((0, 6, 3), 4),
+    'uploads/<str:key>/': ((1, 1, 1), 4),
+    'users/<int:user_id>/follow/': ((0, 14, 14), 4),
+}
+
+# routes that fail before this suite existed; they are still requested so a
+# fix shows up as a budget to fill in
+KNOWN_BROKEN = {
+    'homepage/',  # renders "my first.html", which isn't in the repo
+    'app2/',      # renders "my sec.html", ditto
+}
+
+ROLES = ('anon', 'user', 'staff')
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.people, cls.posts = seed_dataset()
+        cls.user = cls.people[0]
+        cls.staff = User.objects.create_user("budget-staff", password="pw", is_staff=True)
+        cls.blog = Blogs.objects.order_by("-comments_count").first()  # busiest post
+        cls.job = UploadJob.objects.create(
+            idempotency_key="k" * 64, kind="editor", status=UploadJob.DONE,
+            result_url="https://stub.invalid/x.jpg",
+        )
+
+    def setUp(self):
+        logger = logging.getLogger("app1.requests")
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        self.addCleanup(logger.setLevel, level)
+        override = override_settings(
+            AI_CLIENT_CLASS="app1.ai.FakeChatClient", AI_FAKE_LATENCY=0,
+            UPLOAD_STORAGE_BACKEND="app1.uploads.StubStorageBackend",
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        reset_service()
+        self.addCleanup(reset_service)
+        patcher = mock.patch.object(pageviews, "FLUSH_SECONDS", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pageviews.flush)
+        # /metrics lists every view requested so far; start from an empty
+        # registry so its size doesn't depend on which tests ran first
+        registry = Registry()
+        for target in (middleware, "registry"), (views, "metrics_registry"):
+            patcher = mock.patch.object(*target, registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    # -------- request building --------
+    def url_for(self, route):
+        def arg(match):
+            name = match.group(1)
+            if name == "key":
+                return self.job.idempotency_key
+            if name == "user_id":
+                return str(self.blog.author_id)
+            if route.startswith("comments/"):
+                return str(Comment.objects.create(blog=self.blog, user=self.user, content="to delete").pk)
+            return str(self.blog.pk)
+        return "/" + re.sub(r"<(?:\w+:)?(\w+)>", arg, route)
+
+    def request(self, client, route, url):
+        if route in ("blogs/<int:blog_id>/comment/",):
+            return client.post(url, {"content": "Budget comment"})
+        if route in ("comments/<int:pk>/delete/", "blogs/<int:pk>/like/", "blogs/<int:pk>/bookmark/",
+                     "users/<int:user_id>/follow/"):
+            return client.post(url)
+        if route == "ai-assistant/":
+            return client.post(url, json.dumps({"text": "hello"}), content_type="application/json")
+        if route == "upload/":
+            buf = BytesIO()
+            PILImage.new("RGB", (2, 2)).save(buf, format="GIF")
+            return client.post(url, {"upload": SimpleUploadedFile("a.gif", buf.getvalue(), "image/gif")})
+        return client.get(url)
+
+    def measure(self, route, role):
+        client = Client(raise_request_exception=False)
+        if role == "user":
+            client.force_login(self.user)
+        elif role == "staff":
+            client.force_login(self.staff)
+        url = self.url_for(route)  # fixtures (and their signals) stay out of the count
+        django_cache.clear()  # budgets are for a cold cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request(client, route, url)
+            if response.streaming:
+                body = b"".join(
+                    async_to_sync(_drain)(response.streaming_content)
+                    if response.is_async else response.streaming_content
+                )
+            else:
+                body = response.content
+        return {"status": response.status_code, "queries": len(queries), "bytes": len(body)}
+
+    # -------- the test --------
+    def test_every_route_stays_within_budget(self):
+        from . import urls
+
+        routes = sorted({str(p.pattern) for p in urls.urlpatterns})
+        report = {route: {role: self.measure(route, role) for role in ROLES} for route in routes}
+
+        path = os.environ.get("QUERY_BUDGET_REPORT")
+        if path:
+            with open(path, "w") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+
+        failures = []
+        for route, results in report.items():
+            if route not in QUERY_BUDGETS:
+                failures.append(f"{route}: no budget (measured {results})")
+                continue
+            max_queries, max_kib = QUERY_BUDGETS[route]
+            for role, limit in zip(ROLES, max_queries):
+                result = results[role]
+                if result["status"] >= 500 and route not in KNOWN_BROKEN:
+                    failures.append(f"{route} [{role}]: HTTP {result['status']}")
+                if result["queries"] > limit:
+                    failures.append(f"{route} [{role}]: {result['queries']} queries > budget {limit}")
+                if result["bytes"] > max_kib * 1024:
+                    failures.append(f"{route} [{role}]: {result['bytes']} bytes > budget {max_kib} KiB")
+        self.assertFalse(failures, "\n" + "\n".join(failures))
+
+
+async def _drain(iterator):
+    return [chunk async for chunk in iterator]
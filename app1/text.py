@@ -0,0 +1,52 @@
+import html
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from .sanitize import inline_only, sanitize
+
+EXCERPT_WORDS = 40
+PREVIEW_WORDS = 25  # excerpt_html, sized for the listing cards
+EXCERPT_MAX_CHARS = 500
+WORDS_PER_MINUTE = 200  # same rate the detail page used client-side
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def html_to_text(raw_html):
+    """Flatten CKEditor HTML into a single line of readable text."""
+    text = html.unescape(strip_tags(raw_html or ''))
+    return _WHITESPACE.sub(' ', text.replace('\xa0', ' ')).strip()
+
+
+def truncate_html(safe_html, words):
+    """
+    The first `words` words of an HTML fragment with an ellipsis, closing any
+    tags the cut leaves open (unlike truncatewords, which can cut mid-tag).
+    """
+    return Truncator(safe_html).words(words, html=True)
+
+
+def summarize(raw_html):
+    """
+    Return (safe_html, plain_text, excerpt, excerpt_html, word_count,
+    reading_time) for a post body, in Blogs.TEXT_FIELDS order. reading_time
+    is in whole minutes, never less than 1.
+    """
+    safe_html = sanitize(raw_html)
+    inline = inline_only(safe_html)
+    plain_text = html_to_text(inline)
+    word_count = len(plain_text.split())
+    excerpt = Truncator(Truncator(plain_text).words(EXCERPT_WORDS)).chars(EXCERPT_MAX_CHARS)
+    excerpt_html = truncate_html(_WHITESPACE.sub(' ', inline.replace('&nbsp;', ' ')).strip(), PREVIEW_WORDS)
+    reading_time = max(1, -(-word_count // WORDS_PER_MINUTE))
+    return safe_html, plain_text, excerpt, excerpt_html, word_count, reading_time
+
+
+def initials(first_name, last_name, username):
+    """Up to two initials from the user's name, or the start of the username."""
+    parts = f"{first_name} {last_name}".split()
+    if not parts:
+        return username[:2].upper()
+    return "".join(part[0].upper() for part in parts)[:2]
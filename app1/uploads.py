@@ -0,0 +1,272 @@
+"""
+Deferred image uploads.
+
+Requests never talk to Cloudinary any more. They spool the file into an
+UploadJob row (`data`) and return straight away:
+
+* editor uploads get a placeholder URL (`upload_placeholder` view) that serves
+  the spooled file while the job is pending and redirects to the remote URL
+  once it is done;
+* model images (Blogs.image, Profile.image) are written into their field by
+  the worker when the upload succeeds, together with the WebP/AVIF width
+  variants from app1/images.py (`image_variants`).
+
+Only images are queued: enqueue() identifies the spooled bytes with Pillow
+and raises NotAnImage for anything outside SERVED_TYPES, and the job's
+content_type comes from that check, never from the client. The worker
+re-encodes them before upload (metadata stripped, WebP, capped at the widest
+variant).
+
+`python manage.py run_upload_jobs` drains the queue with retries and
+exponential backoff. The spool is the database rather than local disk, so
+any number of workers on any machine can lease any job and nothing is lost
+when a dyno's filesystem is thrown away; the Procfile runs the worker as its
+own `worker` process. Finished jobs drop their bytes. A job that ended FAILED
+is queued again when the same file is uploaded again. The remote side is pluggable through
+settings.UPLOAD_STORAGE_BACKEND; tests use StubStorageBackend.
+"""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import images
+from .models import UploadJob
+
+BACKOFF_BASE = 5          # seconds
+BACKOFF_MAX = 60 * 60     # seconds
+LEASE = timedelta(minutes=10)
+
+# the only types accepted, and so the only ones upload_placeholder serves
+SERVED_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp", "image/avif"})
+
+# job kinds whose target gets responsive variants; 'editor' images are inlined
+# into rich-text content as a single <img> and only get the re-encode
+VARIANT_KINDS = ("blog_image", "profile_image")
+
+
+# ---------------- Storage backends ----------------
+class CloudinaryStorageBackend:
+    def upload(self, path, job, suffix=""):
+        import cloudinary.uploader
+
+        options = {}
+        if suffix:
+            # deterministic ids, so a retried job overwrites its own variants
+            options = {"public_id": f"variants/{job.idempotency_key[:24]}_{suffix}", "overwrite": True}
+        result = cloudinary.uploader.upload(path, **options)
+        url = result.get("secure_url") or result.get("url")
+        # same "<resource_type>/<type>/v<version>/<public_id>.<format>" string
+        # CloudinaryField stores for a direct upload
+        value = "{}/{}/v{}/{}.{}".format(
+            result.get("resource_type", "image"), result.get("type", "upload"),
+            result.get("version"), result.get("public_id"), result.get("format"),
+        )
+        return url, value
+
+
+class StubStorageBackend:
+    """In-memory stand-in used by the test-suite and offline benchmarks."""
+
+    uploaded = []
+    fail_times = 0  # make the next N uploads raise, to exercise retries
+
+    def upload(self, path, job, suffix=""):
+        if StubStorageBackend.fail_times:
+            StubStorageBackend.fail_times -= 1
+            raise ConnectionError("stub upload failure")
+        with open(path, "rb") as fh:
+            StubStorageBackend.uploaded.append((job.idempotency_key, fh.read()))
+        public_id = f"stub/{job.idempotency_key[:16]}" + (f"_{suffix}" if suffix else "")
+        return f"https://stub.invalid/{public_id}.jpg", f"image/upload/v1/{public_id}.jpg"
+
+
+def get_storage_backend():
+    path = getattr(settings, "UPLOAD_STORAGE_BACKEND", "app1.uploads.CloudinaryStorageBackend")
+    return import_string(path)()
+
+
+# ---------------- Enqueue ----------------
+class NotAnImage(ValueError):
+    pass
+
+
+def check_image(upload):
+    """The upload's MIME type if it is an image in SERVED_TYPES, else raise NotAnImage."""
+    content_type = images.mime_type(upload)
+    if hasattr(upload, "seek"):
+        upload.seek(0)
+    if content_type not in SERVED_TYPES:
+        raise NotAnImage("Only JPEG, PNG, GIF, WebP and AVIF images can be uploaded.")
+    return content_type
+
+
+def enqueue(upload, kind, target=None, field=None):
+    """
+    Spool `upload` into the database and queue it. `target`/`field` name the model
+    instance attribute that should receive the uploaded resource.
+    Returns the (possibly pre-existing) UploadJob.
+    """
+    target_model = target._meta.label_lower if target is not None else ""
+    target_id = target.pk if target is not None else None
+
+    digest = hashlib.sha256(f"{kind}\0{target_model}\0{target_id}\0{field or ''}\0".encode())
+    data = BytesIO()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+        data.write(chunk)
+    key = digest.hexdigest()
+    data.seek(0)
+    content_type = check_image(data)
+
+    existing = UploadJob.objects.defer("data").filter(idempotency_key=key).first()
+    if existing is not None:
+        if existing.status != UploadJob.FAILED:
+            return existing
+        # the key is the same for the same bytes; give a failed job a fresh start
+        existing.data = data.getvalue()
+        existing.status = UploadJob.PENDING
+        existing.attempts = 0
+        existing.next_attempt_at = timezone.now()
+        existing.finished_at = None
+        existing.last_error = ""
+        existing.save()
+        return existing
+
+    try:
+        with transaction.atomic():
+            return UploadJob.objects.create(
+                idempotency_key=key,
+                kind=kind,
+                data=data.getvalue(),
+                original_name=(upload.name or "")[:255],
+                content_type=content_type,
+                target_model=target_model,
+                target_id=target_id,
+                target_field=field or "",
+            )
+    except IntegrityError:
+        # same file queued concurrently; the other request's job wins
+        return UploadJob.objects.get(idempotency_key=key)
+
+
+def detach_upload(form, field):
+    """
+    Take a freshly uploaded file off a bound ModelForm's instance so that
+    saving the instance doesn't push it to Cloudinary inline. The field keeps
+    its previous value until the worker swaps the new one in.
+    """
+    value = getattr(form.instance, field, None)
+    if isinstance(value, UploadedFile):
+        setattr(form.instance, field, form.initial.get(field))
+        return value
+    return None
+
+
+def placeholder_url(job):
+    return reverse("upload_placeholder", args=[job.idempotency_key])
+
+
+# ---------------- Worker ----------------
+def backoff(attempts):
+    return timedelta(seconds=min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1)))
+
+
+def claim(batch_size):
+    """Lease up to `batch_size` due jobs to this worker."""
+    now = timezone.now()
+    due = (
+        Q(status=UploadJob.PENDING, next_attempt_at__lte=now)
+        | Q(status=UploadJob.RUNNING, locked_until__lt=now)  # crashed worker
+    )
+    with transaction.atomic():
+        queryset = UploadJob.objects.filter(due).order_by("next_attempt_at")
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        ids = list(queryset.values_list("id", flat=True)[:batch_size])
+        UploadJob.objects.filter(id__in=ids).update(
+            status=UploadJob.RUNNING, locked_until=now + LEASE
+        )
+    return list(UploadJob.objects.filter(id__in=ids).order_by("next_attempt_at"))
+
+
+def _upload_bytes(job, backend, data, suffix=""):
+    # the backends take a path; the file only lives for the one upload
+    fd, path = tempfile.mkstemp(prefix=f"{job.idempotency_key[:16]}.{suffix or 'main'}.")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    try:
+        return backend.upload(path, job, suffix)
+    finally:
+        os.remove(path)
+
+
+def _upload(job, backend):
+    """Push the job's file (and its variants). Returns the variant set or {}."""
+    image = images.open_clean(BytesIO(job.data))
+    if image is None:
+        job.result_url, job.result_value = _upload_bytes(job, backend, bytes(job.data))
+        return {}
+
+    job.result_url, job.result_value = _upload_bytes(job, backend, images.normalized(image))
+    if job.kind not in VARIANT_KINDS:
+        return {}
+    entries = []
+    for width, fmt, data in images.render_variants(image):
+        url, _ = _upload_bytes(job, backend, data, suffix=f"{width}{fmt}")
+        entries.append((width, fmt, url))
+    return images.variant_set(image, entries)
+
+
+def _apply_to_target(job, variants):
+    if not job.target_model or job.target_id is None:
+        return
+    model = apps.get_model(job.target_model)
+    target = model.objects.filter(pk=job.target_id).first()
+    if target is None:
+        return  # deleted while the upload was queued
+    setattr(target, job.target_field, job.result_value)
+    update_fields = [job.target_field]
+    if hasattr(target, "image_variants"):
+        target.image_variants = variants
+        update_fields.append("image_variants")
+    # a real save() so the cache/search signals see the change
+    target.save(update_fields=update_fields)
+
+
+def process(job, backend):
+    """Upload one claimed job. Returns True on success."""
+    job.attempts += 1
+    try:
+        variants = _upload(job, backend)
+        _apply_to_target(job, variants)
+    except Exception as exc:
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        max_attempts = getattr(settings, "UPLOAD_MAX_ATTEMPTS", 5)
+        if job.attempts >= max_attempts:
+            job.status = UploadJob.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = UploadJob.PENDING
+            job.next_attempt_at = timezone.now() + backoff(job.attempts)
+        job.locked_until = None
+        job.save()
+        return False
+
+    job.status = UploadJob.DONE
+    job.finished_at = timezone.now()
+    job.locked_until = None
+    job.last_error = ""
+    job.data = b""
+    job.save()
+    return True
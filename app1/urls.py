@@ -29,8 +29,10 @@ urlpatterns = [
     path('blog/', views.blog_view, name='blog'),
     path('blog_page/', views.blog_view, name='blog_page'),
     path("upload/", views.upload_image, name="upload_image"),
+    path("uploads/<str:key>/", views.upload_placeholder, name="upload_placeholder"),
     path("blogs/<int:blog_id>/", views.blog_detail, name="blog_detail"),
     path("blogs/<int:blog_id>/comment/", views.add_comment, name="add_comment"),
+    path("blogs/<int:blog_id>/comments/", views.blog_comments, name="blog_comments"),
     path("comments/<int:pk>/delete/", views.delete_comment, name="delete_comment"),
     path('single-blog/<int:blog_id>/', views.single_blog, name='single_blog'),
     path('blog/<int:pk>/edit/', views.blog_edit, name='blog_edit'),
@@ -38,6 +40,7 @@ urlpatterns = [
     # Searchable blogs list
     path('blogs/', views.all_blogs, name='blogs'),
     path('all-blogs/', views.all_blogs, name='all_blogs'),
+    path('trending/', views.trending, name='trending'),
 
     # Feedback and Contact
     path('feedback/', views.feedback_view, name='feedback'),
@@ -52,4 +55,8 @@ urlpatterns = [
     path("ai-assistant/", views.ai_assistant, name="ai_assistant"),
     path("blogs/<int:pk>/like/", views.toggle_like, name="blog_like"),
     path("blogs/<int:pk>/bookmark/", views.toggle_bookmark, name="blog_bookmark"),
+    path("users/<int:user_id>/follow/", views.toggle_follow, name="user_follow"),
+    path("feed/", views.feed, name="feed"),
+    path("bookmarks/", views.bookmarks, name="bookmarks"),
+    path("metrics", views.metrics, name="metrics"),
 ]
@@ -0,0 +1,64 @@
+"""
+The signed-in user's "card" for the navigation in base.html: display name,
+initials and avatar URL.
+
+Every logged-in page renders it, so it is read from the cache under the
+user's scope and memoized on the request. Nothing touches Profile on a
+warm page. The signals in app1/signals.py bump the scope when the User or
+the Profile row changes.
+"""
+from dataclasses import dataclass
+
+from django.contrib.auth.models import User
+from django.core.cache import cache as django_cache
+
+from . import cache
+from .text import initials
+from .templatetags.responsive_images import variant_url
+
+AVATAR_WIDTH = 96
+
+
+@dataclass(frozen=True)
+class UserCard:
+    id: int
+    username: str
+    display_name: str
+    initials: str
+    avatar_url: str
+
+
+def build(user_id):
+    user = (User.objects.select_related('profile')
+            .only('username', 'first_name', 'last_name', 'profile__image', 'profile__image_variants')
+            .get(pk=user_id))
+    profile = getattr(user, 'profile', None)  # users created before Profile existed have none
+    avatar_url = ''
+    if profile is not None and profile.image:
+        avatar_url = variant_url(profile.image_variants, AVATAR_WIDTH) or profile.image.url
+    return UserCard(
+        id=user.pk,
+        username=user.username,
+        display_name=user.get_full_name() or user.username,
+        initials=initials(user.first_name, user.last_name, user.username),
+        avatar_url=avatar_url,
+    )
+
+
+def get_card(user_id):
+    key = cache.make_key('usercard', cache.user_scope(user_id))
+    card = django_cache.get(key)
+    if card is None:
+        card = build(user_id)
+        django_cache.set(key, card, cache.TIMEOUT)
+    return card
+
+
+def for_request(request):
+    """The current user's card, or None for anonymous visitors; looked up once per request."""
+    if not request.user.is_authenticated:
+        return None
+    card = getattr(request, '_user_card', None)
+    if card is None:
+        card = request._user_card = get_card(request.user.pk)
+    return card
@@ -1,26 +1,45 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponseBadRequest , HttpResponse
+from django.http import (
+    JsonResponse, HttpResponseBadRequest , HttpResponse, StreamingHttpResponse, FileResponse, Http404,
+)
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout, login
+from django.contrib.auth.models import User
 from django.contrib import messages
 from django.core.files.storage import default_storage
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.http import require_POST
-from django.core.management import call_command
-import cloudinary.uploader
-
-from .models import Blogs, ContactMessage, Feedback, Profile, Comment
+from django.db import transaction
+from django.db.models import Exists, F, Max, OuterRef
+from django.db.models.functions import Coalesce
+from django.template.defaultfilters import filesizeformat
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .models import Blogs, ContactMessage, Feedback, Profile, Comment, UploadJob, Follow
+from . import feeds, pageviews, ranking, related, uploads
 from .forms import BlogsForms, SignUpForm, ProfileForm
+from .pagination import KeysetPaginator
+from .proxies import client_ip
+from .search import search_blogs
+from .rendering import render_markdown
+from .importer import ImportFailed, Importer
+from .metrics import registry as metrics_registry
+from .ai import AIUnavailable, TooManyRequests, get_service as get_ai_service
+from .cache import (
+    LIST_SCOPE, attach_versions, blog_scope, cached_page, comments_scope,
+)
+from .conditional import page_etag, respond
+from .streaming import StreamingResponse
 
 from django.urls import reverse
 from django.contrib.admin.views.decorators import staff_member_required
-import json, os
-from openai import OpenAI
+import asyncio, json
+from io import BytesIO
 from django.conf import settings
-import markdown
-from markdown.extensions import Extension
-from markdown.extensions.fenced_code import FencedCodeExtension
 
 # ---------------- Signup ----------------
 def signup_view(request):
@@ -33,11 +52,10 @@ def signup_view(request):
             # 2) make sure Profile exists
             profile = user.profile
 
-            # 3) attach uploaded file (works for CloudinaryField)
+            # 3) queue the uploaded file; the worker fills in profile.image
             image = form.cleaned_data.get('image') or request.FILES.get('image')
             if image and getattr(image, 'size', 0) > 0:
-                profile.image = image
-                profile.save()
+                uploads.enqueue(image, 'profile_image', target=profile, field='image')
 
             login(request, user)
             return redirect('profile')
@@ -57,8 +75,22 @@ def about(request):
 
 # ---------------- Home + Blogs ----------------
 def home(request):
-    blogs = Blogs.objects.all().order_by('-created_at')[:9]
-    return render(request, 'homepage.html', {'blogs': blogs})
+    # precomputed trending order (app1/ranking.py); newest first until anything is scored
+    blogs, version = ranking.top(9)
+    return render(request, 'homepage.html', {
+        'blogs': blogs,
+        'list_version': version,
+    })
+
+
+def trending(request):
+    blogs, _ = ranking.top(getattr(settings, 'RANKING_TRENDING_SIZE', 30))
+    return render(request, 'all_blogs.html', {
+        'blogs': attach_versions(blogs),
+        'is_paginated': False,
+        'page_title': 'Trending',
+        'page_subtitle': 'What readers are liking, saving and discussing right now.',
+    })
 
 
 # ---------------- Profile ----------------
@@ -74,13 +106,22 @@ def edit_profile(request):
     if request.method == 'POST':
         form = ProfileForm(request.POST, request.FILES, instance=profile_obj)
         if form.is_valid():
+            image = uploads.detach_upload(form, 'image')
             form.save()
+            if image:
+                uploads.enqueue(image, 'profile_image', target=profile_obj, field='image')
             # update user info
+            # only the fields that changed, so an unchanged name doesn't
+            # reindex every post for search (signals.reindex_author)
             user = request.user
-            user.first_name = request.POST.get('first_name', user.first_name)
-            user.last_name = request.POST.get('last_name', user.last_name)
-            user.email = request.POST.get('email', user.email)
-            user.save()
+            changed = []
+            for field in ('first_name', 'last_name', 'email'):
+                value = request.POST.get(field, getattr(user, field))
+                if value != getattr(user, field):
+                    setattr(user, field, value)
+                    changed.append(field)
+            if changed:
+                user.save(update_fields=changed)
             messages.success(request, "Your profile has been updated successfully.")
             return redirect('profile')
     else:
@@ -104,28 +145,110 @@ def blog_view(request):
     if request.method == 'POST':
         form = BlogsForms(request.POST, request.FILES)
         if form.is_valid():
+            image = uploads.detach_upload(form, 'image')
             blog = form.save(commit=False)
             blog.author = request.user
-            blog.save()
+            # one commit, so the post and its tags are indexed together
+            with transaction.atomic():
+                blog.save()
+                form.save_m2m()
+            if image:
+                uploads.enqueue(image, 'blog_image', target=blog, field='image')
             messages.success(request, "Your blog has been saved!")
             return redirect('blog_view')
     else:
         form = BlogsForms()
 
-    blogs = Blogs.objects.all().order_by('-id')[:2]
+    blogs = Blogs.objects.cards().order_by('-id')[:2]
     return render(request, 'blog_page.html', {'form': form, 'blogs': blogs})
 
 
 def blog_detail(request, blog_id):
-    blog = get_object_or_404(
-        Blogs.objects.select_related("author").prefetch_related("comments__user"),
-        id=blog_id
+    # safe_html is only loaded when the cached body fragment misses
+    blogs = Blogs.objects.select_related("author").defer("content", "safe_html", "plain_text", "search_vector")
+    if request.user.is_authenticated:
+        # the viewer's like/bookmark/follow state in the same query
+        user_id = request.user.pk
+        blogs = blogs.annotate(
+            is_liked=Exists(Blogs.likes.through.objects.filter(blogs_id=OuterRef("pk"), user_id=user_id)),
+            is_bookmarked=Exists(Blogs.bookmarks.through.objects.filter(blogs_id=OuterRef("pk"), user_id=user_id)),
+            is_following=Exists(Follow.objects.filter(follower_id=user_id, author_id=OuterRef("author_id"))),
+        )
+    blog = get_object_or_404(blogs, id=blog_id)
+    is_liked = getattr(blog, "is_liked", False)
+    is_bookmarked = getattr(blog, "is_bookmarked", False)
+    is_following = getattr(blog, "is_following", False)
+    pageviews.record_view(request, blog.id)
+
+    # Only this post's own scopes: LIST_SCOPE moves on every post save and
+    # page-view flush. The view count and the related sidebar refresh with
+    # the post's next change; renaming the author bumps blog_scope too.
+    etag, versions = page_etag(
+        request,
+        [blog_scope(blog.id), comments_scope(blog.id)],
+        "blog_detail", blog.id, blog.updated_at.isoformat(), is_liked, is_bookmarked, is_following,
     )
-    return render(request, 'blog_detail.html', {'blog': blog})
+    return respond(request, etag, blog.updated_at, lambda: render(request, 'blog_detail.html', {
+        'blog': blog,
+        # lazy: only evaluated when the comments fragment has to be rendered
+        'comments_page': SimpleLazyObject(lambda: _comment_page(blog.id)),
+        'blog_version': versions[blog_scope(blog.id)],
+        'comments_version': versions[comments_scope(blog.id)],
+        'is_liked': is_liked,
+        'is_bookmarked': is_bookmarked,
+        'is_following': is_following,
+        'tags': SimpleLazyObject(lambda: list(blog.tags.all())),
+        'related_posts': related.similar(blog.id),
+    }))
+
+
+def _comment_page(blog_id, cursor=None, parent_id=None):
+    """One keyset page of a post's top-level comments, or of one comment's replies."""
+    queryset = Comment.objects.filter(blog_id=blog_id, parent_id=parent_id).select_related("user")
+    paginator = KeysetPaginator(queryset, per_page=getattr(settings, "COMMENTS_PAGE_SIZE", 20))
+    return cached_page(paginator, cursor, f"comments:{parent_id or 0}", scope=comments_scope(blog_id))
+
+
+def blog_comments(request, blog_id):
+    """
+    Lazy-loaded comment pages for blog_detail: an HTML partial (with its own
+    "load more" button) by default, or JSON with ?format=json.
+    """
+    parent = request.GET.get("parent") or ""
+    parent_id = int(parent) if parent.isdigit() else None
+    cursor = request.GET.get("cursor")
+    page = _comment_page(blog_id, cursor, parent_id)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "comments": [
+                {
+                    "id": c.id,
+                    "parent": c.parent_id,
+                    "user": c.user.get_full_name() or c.user.username,
+                    "content": c.content,
+                    "created_at": c.created_at.isoformat(),
+                    "replies_count": c.replies_count,
+                }
+                for c in page
+            ],
+            "next_cursor": page.next_cursor,
+        })
+
+    response = render(request, "partials/comment_list.html", {
+        "comments": page.object_list,
+        "next_cursor": page.next_cursor,
+        "cursor": cursor,
+        "blog_id": blog_id,
+        "parent_id": parent_id,
+    })
+    response["X-Next-Cursor"] = page.next_cursor or ""
+    return response
 
 
 def single_blog(request, blog_id):
     blog = get_object_or_404(Blogs, id=blog_id)
+    pageviews.record_view(request, blog.id)
     return render(request, 'single_blog.html', {'blog': blog})
 
 
@@ -142,15 +265,21 @@ def blog_edit(request, pk):
         form.instance.content = request.POST.get('content', '').strip()
 
         if form.is_valid():
+            image = uploads.detach_upload(form, 'image')
             updated_blog = form.save(commit=False)
             updated_blog.author = blog.author
-            updated_blog.save()
+            with transaction.atomic():
+                updated_blog.save()
+                form.save_m2m()
+            if image:
+                uploads.enqueue(image, 'blog_image', target=updated_blog, field='image')
             messages.success(request, "Blog updated.")
             return redirect('blog_detail', blog_id=blog.id)
         else:
             messages.error(request, "Please correct the errors below.")
     else:
-        form = BlogsForms(instance=blog)
+        # the editor is seeded with |safe, so open it on the sanitized body
+        form = BlogsForms(instance=blog, initial={'content': blog.safe_html})
 
     return render(request, 'blog_edit.html', {'form': form, 'blog': blog})
 
@@ -173,14 +302,35 @@ def blog_delete(request, pk):
 @require_POST
 @login_required
 def add_comment(request, blog_id):
-    blog = get_object_or_404(Blogs, id=blog_id)
+    blog = get_object_or_404(Blogs.objects.only("id"), id=blog_id)
     content = (request.POST.get("content") or "").strip()
+    is_ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
 
     if not content:
+        if is_ajax:
+            return JsonResponse({"error": "Comment can't be empty"}, status=400)
         return redirect("blog_detail", blog_id=blog.id)
 
-    Comment.objects.create(blog=blog, user=request.user, content=content)
-    return redirect("blog_detail", blog_id=blog.id)
+    parent_id = None
+    parent = (request.POST.get("parent") or "").strip()
+    if parent.isdigit():
+        # replies stay one level deep: answering a reply attaches to its root
+        parent_id = (
+            Comment.objects.filter(pk=parent, blog_id=blog.id)
+            .values_list(Coalesce("parent_id", "id"), flat=True)
+            .first()
+        )
+
+    comment = Comment.objects.create(blog=blog, user=request.user, parent_id=parent_id, content=content)
+    if not is_ajax:
+        return redirect("blog_detail", blog_id=blog.id)
+
+    return JsonResponse({
+        "id": comment.id,
+        "parent": parent_id,
+        "html": render_to_string("partials/comment.html", {"comment": comment}, request=request),
+        "comments_count": Blogs.objects.values_list("comments_count", flat=True).get(pk=blog.id),
+    })
 
 
 @require_POST
@@ -219,96 +369,236 @@ def contact_view(request):
 
 
 # ---------------- Blogs List ----------------
+def _listing_etag(request, name, per_viewer=True):
+    """ETag and Last-Modified for a page of the newest-first listing: one MAX() off the updated_at index."""
+    latest = Blogs.objects.aggregate(latest=Max("updated_at"))["latest"]
+    etag, _ = page_etag(request, [LIST_SCOPE], name, request.GET.get("cursor") or "", latest,
+                        per_viewer=per_viewer)
+    return etag, latest
+
+
 def load_more_blogs(request):
-    offset = int(request.GET.get("offset", 0))
-    limit = 2
-    blogs = Blogs.objects.all().order_by('-created_at')[offset:offset + limit]
-    return render(request, "partials/blog_list_partial.html", {"blogs": blogs})
+    # the cards in this fragment look the same to everyone
+    etag, latest = _listing_etag(request, "load_more", per_viewer=False)
+
+    def render_page():
+        paginator = KeysetPaginator(Blogs.objects.cards(), per_page=2)
+        page_obj = cached_page(paginator, request.GET.get("cursor"), "load_more")
+        response = render(request, "partials/blog_list_partial.html", {
+            "blogs": attach_versions(page_obj.object_list),
+        })
+        # the client passes this back as ?cursor= to fetch the following batch
+        response["X-Next-Cursor"] = page_obj.next_cursor or ""
+        return response
+
+    return respond(request, etag, latest, render_page, per_viewer=False)
 
 
 def all_blogs(request):
-    query = request.GET.get('q')
+    query = (request.GET.get('q') or '').strip()
     if query:
-        blogs = Blogs.objects.filter(title__icontains=query)
-    else:
-        blogs = Blogs.objects.all()
-    return render(request, 'all_blogs.html', {'blogs': blogs})
+        # ranked full-text results (app1/search.py), one page of best matches
+        blogs = search_blogs(Blogs.objects.cards(), query)
+        return render(request, 'all_blogs.html', {
+            'blogs': attach_versions(blogs),
+            'is_paginated': False,
+            'query': query,
+        })
+    etag, latest = _listing_etag(request, 'all_blogs')
+
+    def render_page():
+        page_obj = cached_page(KeysetPaginator(Blogs.objects.cards()), request.GET.get('cursor'), 'all_blogs')
+        return render(request, 'all_blogs.html', {
+            'blogs': attach_versions(page_obj.object_list),
+            'page_obj': page_obj,
+            'is_paginated': page_obj.has_other_pages(),
+            'query': query,
+        })
+
+    return respond(request, etag, latest, render_page)
 
 # ---------------- AI Assistant ----------------
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
-@csrf_exempt 
-def ai_assistant(request):
-    if request.method == "POST":
+def _suggestion_to_html(suggestion):
+    # If AI response has ``` but no language specified, force python
+    if "```" in suggestion and "```python" not in suggestion:
+        suggestion = suggestion.replace("```", "```python", 1)
+    # Convert AI output (Markdown → HTML with code blocks)
+    return render_markdown(suggestion)
+
+
+@csrf_exempt
+async def ai_assistant(request):
+    """
+    POST {"text": "...", "stream": false} -> {"suggestion": "<html>"}.
+    With "stream": true (or ?stream=1) the raw Markdown is streamed back as
+    it is generated. The Procfile serves project1.asgi, so a slow completion
+    waits on the event loop rather than holding a worker thread; under WSGI
+    the stream would be buffered.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    try:
         data = json.loads(request.body)
-        user_text = data.get("text")
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    user_text = (data.get("text") or "").strip()
+    if not user_text:
+        return JsonResponse({"error": "No text provided"}, status=400)
 
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant."},
-                    {"role": "user", "content": user_text}
-                ]
-            )
+    user = await request.auser()
+    user_key = f"user:{user.pk}" if user.is_authenticated else f"ip:{client_ip(request)}"
+    service = get_ai_service()
+
+    try:
+        if data.get("stream") or request.GET.get("stream") == "1":
+            chunks = service.open_stream(user_key, user_text)
+            return StreamingHttpResponse(chunks, content_type="text/markdown; charset=utf-8")
+        suggestion = await service.complete(user_key, user_text)
+    except TooManyRequests:
+        return JsonResponse({"error": "Too many requests in progress, please wait."}, status=429)
+    except AIUnavailable as e:
+        return JsonResponse({"error": str(e)}, status=503)
+    except asyncio.TimeoutError:
+        return JsonResponse({"error": "The AI assistant timed out."}, status=504)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
 
-            suggestion = response.choices[0].message.content
-            # If AI response has ``` but no language specified, force python
-            if "```" in suggestion and "```python" not in suggestion:
-             suggestion = suggestion.replace("```", "```python", 1)
-            # Convert AI output (Markdown → HTML with code blocks)
-            suggestion_html = markdown.markdown(
-              suggestion,
-              extensions=["fenced_code", "codehilite"]
+    return JsonResponse({"suggestion": _suggestion_to_html(suggestion)})
+
+def _toggle_membership(blog_id, relation, counter, user):
+    """
+    Add/remove `user` on the `relation` M2M of a blog and keep the matching
+    denormalized counter in step. Returns (is_member, count).
+    """
+    through = getattr(Blogs, relation).through
+    link = through.objects.filter(blogs_id=blog_id, user_id=user.pk)
+
+    with transaction.atomic():
+        # lock the blog row so concurrent toggles serialize on the counter;
+        # also the existence check (404)
+        blog = get_object_or_404(Blogs.objects.select_for_update().only("id"), pk=blog_id)
+        # add()/remove() rather than the through model: auto-created through
+        # models send no save/delete signals, only m2m_changed (cache, ranking)
+        members = getattr(blog, relation)
+        if link.exists():
+            members.remove(user.pk)
+            # never below zero, like the comment counters, even if the counter has drifted
+            Blogs.objects.filter(pk=blog_id, **{f"{counter}__gt": 0}).update(
+                **{counter: F(counter) - 1}, updated_at=timezone.now()
             )
+            is_member = False
+        else:
+            members.add(user.pk)
+            Blogs.objects.filter(pk=blog_id).update(**{counter: F(counter) + 1}, updated_at=timezone.now())
+            is_member = True
+        count = Blogs.objects.filter(pk=blog_id).values_list(counter, flat=True).get()
+    return is_member, count
 
-            return JsonResponse({"suggestion": suggestion_html})
-        except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
 
 @login_required
 @require_POST
 def toggle_like(request, pk):
     if request.method != "POST":
         return HttpResponseBadRequest("POST required")
-    blog = get_object_or_404(Blogs, pk=pk)
-    if request.user in blog.likes.all():
-        blog.likes.remove(request.user)
-        liked = False
-    else:
-        blog.likes.add(request.user)
-        liked = True
-    return JsonResponse({"liked": liked, "count": blog.likes.count()})
+    liked, count = _toggle_membership(pk, "likes", "likes_count", request.user)
+    return JsonResponse({"liked": liked, "count": count})
 
 @login_required
 @require_POST
 def toggle_bookmark(request, pk):
     if request.method != "POST":
         return HttpResponseBadRequest("POST required")
-    blog = get_object_or_404(Blogs, pk=pk)
-    if request.user in blog.bookmarks.all():
-        blog.bookmarks.remove(request.user)
-        bookmarked = False
-    else:
-        blog.bookmarks.add(request.user)
-        bookmarked = True
-    return JsonResponse({"bookmarked": bookmarked})
+    bookmarked, count = _toggle_membership(pk, "bookmarks", "bookmarks_count", request.user)
+    return JsonResponse({"bookmarked": bookmarked, "count": count})
+
 
+@login_required
+@require_POST
+def toggle_follow(request, user_id):
+    author = get_object_or_404(User.objects.only("id"), pk=user_id)
+    if author.pk == request.user.pk:
+        return JsonResponse({"error": "You can't follow yourself"}, status=400)
+    following, count = feeds.toggle_follow(request.user, author.pk)
+    return JsonResponse({"following": following, "followers": count})
+
+
+# ---------------- Personal timelines ----------------
+@login_required
+def feed(request):
+    page_obj = feeds.feed_page(request.user, request.GET.get("cursor"))
+    return render(request, "all_blogs.html", {
+        "blogs": attach_versions(page_obj.object_list),
+        "page_obj": page_obj,
+        "is_paginated": page_obj.has_other_pages(),
+        "page_title": "Following",
+        "page_subtitle": "New posts from the authors you follow.",
+        "empty_title": "Nothing here yet",
+        "empty_desc": "Follow authors from their posts and what they publish will show up here.",
+    })
+
+
+@login_required
+def bookmarks(request):
+    # newest posts first (the bookmark table has no timestamp to order by)
+    paginator = KeysetPaginator(Blogs.objects.cards().filter(bookmarks=request.user))
+    page_obj = paginator.page(request.GET.get("cursor"))
+    return render(request, "all_blogs.html", {
+        "blogs": attach_versions(page_obj.object_list),
+        "page_obj": page_obj,
+        "is_paginated": page_obj.has_other_pages(),
+        "page_title": "My Bookmarks",
+        "page_subtitle": "Posts you saved to read later.",
+        "empty_title": "No bookmarks yet",
+        "empty_desc": "Use the bookmark button on a post to save it here.",
+    })
+
+# ---------------- Data import (staff only) ----------------
+@staff_member_required
 def import_data(request):
-    try:
-        call_command("loaddata", "data.json")
-        return HttpResponse("✅ Data imported successfully!")
-    except Exception as e:
-        return HttpResponse(f"❌ Error: {e}")
+    max_bytes = getattr(settings, "IMPORT_WEB_MAX_BYTES", 5 * 1024 * 1024)
+    if request.method != "POST":
+        return render(request, "import_data.html", {"max_bytes": max_bytes})
+    dump = request.FILES.get("dump")
+    if dump is None:
+        return HttpResponseBadRequest("No file uploaded")
+    if dump.size > max_bytes:
+        # no checkpoint here, and the worker timeout would cut it off midway
+        return HttpResponse(
+            f"Dumps over {filesizeformat(max_bytes)} must be imported with "
+            f"`python manage.py import_data <file>`, which resumes where it stopped.",
+            status=413, content_type="text/plain",
+        )
+
+    # the upload is already on disk (TemporaryFileUploadHandler); the
+    # importer reads it in chunks and streams one stats line per batch
+    importer = Importer()
+
+    def progress():
+        try:
+            for stats in importer.run(dump):
+                yield json.dumps(stats) + "\n"
+        except ImportFailed as exc:
+            yield json.dumps({"error": str(exc)}) + "\n"
+
+    # one line per committed batch, also under ASGI (app1/streaming.py)
+    return StreamingResponse(progress(), content_type="application/x-ndjson")
 
 
 
-@csrf_exempt
 def upload_image(request):
     """
-    Accepts POST uploads from CKEditor (field name 'upload') and uploads to Cloudinary.
+    Accepts POST uploads from CKEditor (field name 'upload') and queues them for
+    Cloudinary (see app1/uploads.py). The returned URL is a placeholder that
+    serves the queued image until the upload job finishes, then redirects.
     Returns JSON compatible with CKEditor 5 SimpleUploadAdapter ({"url": ...})
     and includes legacy fields ("uploaded": 1, "fileName": ...) for CKEditor 4 compatibility.
+    Logged-in users only; the editor sends the CSRF token as X-CSRFToken.
     """
+    if not request.user.is_authenticated:
+        return JsonResponse({
+            "uploaded": 0,
+            "error": {"message": "Log in to upload images"}
+        }, status=403)
     if request.method == "POST":
         upload = request.FILES.get("upload") or request.FILES.get("file") or None
         if not upload:
@@ -317,9 +607,8 @@ def upload_image(request):
                 "error": {"message": "No file received"}
             }, status=400)
         try:
-            # Upload to Cloudinary (your Cloudinary config in settings.py stays the same)
-            result = cloudinary.uploader.upload(upload)
-            uploaded_url = result.get("secure_url") or result.get("url")
+            job = uploads.enqueue(upload, 'editor')
+            uploaded_url = job.result_url or request.build_absolute_uri(uploads.placeholder_url(job))
             # Return both CKEditor 5 friendly response and legacy fields
             return JsonResponse({
                 "url": uploaded_url,
@@ -335,4 +624,33 @@ def upload_image(request):
     return JsonResponse({
         "uploaded": 0,
         "error": {"message": "Invalid request method"}
-    }, status=400)
\ No newline at end of file
+    }, status=400)
+
+
+def upload_placeholder(request, key):
+    """Temporary URL for a queued upload: the spooled file, then the real one."""
+    job = get_object_or_404(UploadJob, idempotency_key=key)
+    if job.status == UploadJob.DONE and job.result_url:
+        return redirect(job.result_url, permanent=True)
+    # only types enqueue() identified itself; never what the client claimed
+    servable = job.content_type in uploads.SERVED_TYPES
+    if servable and job.status != UploadJob.FAILED and job.data:
+        response = FileResponse(BytesIO(job.data), content_type=job.content_type)
+        response["Cache-Control"] = "no-store"
+        response["X-Content-Type-Options"] = "nosniff"
+        response["Content-Security-Policy"] = "default-src 'none'; sandbox"
+        return response
+    raise Http404("Upload not available")
+
+
+# ---------------- Metrics ----------------
+def metrics(request):
+    """Request metrics from app1/middleware.py in the Prometheus text format."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        allowed = constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4")
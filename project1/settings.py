@@ -6,6 +6,7 @@ import cloudinary.uploader
 import cloudinary.api
 import cloudinary_storage
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -33,7 +34,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, async-capable; every middleware here must be, see app1/middleware.py
+    'app1.middleware.StaticFilesMiddleware',
+    # after it so static files aren't counted
+    'app1.middleware.InstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,6 +59,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'app1.context_processors.user_card',
             ],
         },
     },
@@ -85,6 +90,13 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# (Django 5's replacement for STATICFILES_STORAGE) collectstatic writes
+# content-hashed names plus .gz/.br copies, which WhiteNoise serves with a
+# far-future Cache-Control; bundles come from `manage.py build_assets`
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "app1.assets.StaticStorage"},
+}
 
 
 # Media configuration (required by CKEditor uploader)
@@ -137,3 +149,123 @@ ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["127.0.0.1", "localhost"])
 if not DEBUG:
     # Add your production domain(s) when deploying
     ALLOWED_HOSTS += [".onrender.com"]
+
+# Cache backend, e.g. locmemcache://, filecache:///var/tmp/django_cache or
+# redis://127.0.0.1:6379/1 (needs the `redis` package). Keys are versioned by
+# app1/cache.py, so entries are never served stale after a write.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+    "sessions": env.cache("SESSION_CACHE_URL", default="locmemcache://sessions"),
+}
+APP1_CACHE_TIMEOUT = env.int("APP1_CACHE_TIMEOUT", default=60 * 60)
+
+# Sessions: "db" (one query per request that has a session cookie),
+# "cached_db" (read through the "sessions" cache, written to both) or
+# "signed_cookies" (the session lives in the cookie; no server-side state, so
+# logging out can't revoke a copied cookie). With more than one worker,
+# cached_db needs a shared SESSION_CACHE_URL, or a logout in one worker
+# leaves the session alive in the others' local caches.
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_MODE = env("SESSION_MODE", default="db")
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f"SESSION_MODE must be one of {', '.join(SESSION_ENGINES)}")
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+SESSION_CACHE_ALIAS = "sessions"
+
+# request.user is read through the cache (app1/auth.py) unless this is off.
+# Entries are dropped on any User save, but with per-process caches another
+# worker may keep a changed user for up to AUTH_USER_CACHE_SECONDS.
+AUTH_USER_CACHE = env.bool("AUTH_USER_CACHE", default=True)
+AUTH_USER_CACHE_SECONDS = env.int("AUTH_USER_CACHE_SECONDS", default=60)
+AUTHENTICATION_BACKENDS = [
+    "app1.auth.CachedModelBackend" if AUTH_USER_CACHE else "django.contrib.auth.backends.ModelBackend",
+]
+
+# Page size for the keyset-paginated blog listings (app1/pagination.py)
+BLOGS_PAGE_SIZE = env.int("BLOGS_PAGE_SIZE", default=12)
+# Comments per lazily loaded page on the blog detail page
+COMMENTS_PAGE_SIZE = env.int("COMMENTS_PAGE_SIZE", default=20)
+
+# "Following" feeds (app1/feeds.py): entries kept per user, the follower count
+# above which an author's posts are merged at read time instead of fanned out,
+# and how many of an author's posts a new follow copies in.
+FEED_MAX_LENGTH = env.int("FEED_MAX_LENGTH", default=500)
+FEED_FANOUT_MAX_FOLLOWERS = env.int("FEED_FANOUT_MAX_FOLLOWERS", default=1000)
+FEED_BACKFILL = env.int("FEED_BACKFILL", default=20)
+
+# Trending order (app1/ranking.py): engagement is counted in buckets of
+# RANKING_BUCKET_SECONDS, and `manage.py compute_hot_scores` decays the last
+# RANKING_WINDOW_HOURS of them with the given half-life into Blogs.hot_score
+# (every 5 minutes, from the Procfile's `clock` process).
+RANKING_BUCKET_SECONDS = env.int("RANKING_BUCKET_SECONDS", default=60 * 60)
+RANKING_WINDOW_HOURS = env.int("RANKING_WINDOW_HOURS", default=72)
+RANKING_HALF_LIFE_HOURS = env.float("RANKING_HALF_LIFE_HOURS", default=24)
+RANKING_TRENDING_SIZE = env.int("RANKING_TRENDING_SIZE", default=30)
+
+# Related posts (app1/related.py): neighbours kept per post, TF-IDF terms kept
+# per post, and how many of a term's strongest posts are compared against.
+RELATED_POSTS = env.int("RELATED_POSTS", default=6)
+RELATED_TERMS_PER_POST = env.int("RELATED_TERMS_PER_POST", default=24)
+RELATED_MAX_POSTINGS = env.int("RELATED_MAX_POSTINGS", default=100)
+
+# Reverse proxies in front of the app that append to X-Forwarded-For
+# (app1/proxies.py); the Heroku router is one. 0 trusts REMOTE_ADDR as is.
+TRUSTED_PROXY_COUNT = env.int("TRUSTED_PROXY_COUNT", default=1 if "DYNO" in os.environ else 0)
+
+# Page views (app1/pageviews.py): one view per session/IP per dedup window,
+# buffered in each worker and flushed to the database every FLUSH seconds.
+# Listing pages pick up new counts at most every LIST_REFRESH seconds.
+VIEW_COUNTER_ENABLED = env.bool("VIEW_COUNTER_ENABLED", default=True)
+VIEW_COUNTER_DEDUP_SECONDS = env.int("VIEW_COUNTER_DEDUP_SECONDS", default=30 * 60)
+VIEW_COUNTER_FLUSH_SECONDS = env.float("VIEW_COUNTER_FLUSH_SECONDS", default=10)
+VIEW_COUNTER_LIST_REFRESH_SECONDS = env.int("VIEW_COUNTER_LIST_REFRESH_SECONDS", default=5 * 60)
+
+# AI assistant (app1/ai.py). Set AI_CLIENT_CLASS=app1.ai.FakeChatClient to run
+# the endpoint offline, e.g. for load tests.
+AI_CLIENT_CLASS = env("AI_CLIENT_CLASS", default="app1.ai.OpenAIChatClient")
+AI_MODEL = env("AI_MODEL", default="gpt-4o-mini")
+AI_TIMEOUT = env.float("AI_TIMEOUT", default=30)
+AI_CACHE_TTL = env.int("AI_CACHE_TTL", default=60 * 60)
+AI_CACHE_SIZE = env.int("AI_CACHE_SIZE", default=512)
+AI_MAX_CONCURRENT_PER_USER = env.int("AI_MAX_CONCURRENT_PER_USER", default=2)
+AI_BREAKER_THRESHOLD = env.int("AI_BREAKER_THRESHOLD", default=5)
+AI_BREAKER_RESET = env.int("AI_BREAKER_RESET", default=30)
+
+# Deferred image uploads (app1/uploads.py, drained by `manage.py run_upload_jobs`)
+UPLOAD_STORAGE_BACKEND = env("UPLOAD_STORAGE_BACKEND", default="app1.uploads.CloudinaryStorageBackend")
+UPLOAD_MAX_ATTEMPTS = env.int("UPLOAD_MAX_ATTEMPTS", default=5)
+
+# /import-data/ runs the import inside the request, within gunicorn's timeout
+# and without a checkpoint; bigger dumps go through `manage.py import_data`.
+IMPORT_WEB_MAX_BYTES = env.int("IMPORT_WEB_MAX_BYTES", default=5 * 1024 * 1024)
+
+# Responsive variants of static/images (app1/images.py). Generated output, not
+# committed: run `python manage.py build_image_variants` before collectstatic.
+IMAGE_VARIANTS_DIR = env("IMAGE_VARIANTS_DIR", default=str(BASE_DIR / "static" / "images" / "variants"))
+
+# Request instrumentation (app1/middleware.py, Prometheus text at /metrics).
+# Without METRICS_TOKEN only staff can read /metrics; with it, scrapers send
+# "Authorization: Bearer <token>". Latency is recorded for every request; only
+# 1% get the SQL/template timers and a log line unless the rate is raised.
+APP1_METRICS_SAMPLE_RATE = env.float("APP1_METRICS_SAMPLE_RATE", default=0.01)
+APP1_SLOW_REQUEST_MS = env.int("APP1_SLOW_REQUEST_MS", default=500)
+APP1_N_PLUS_ONE_THRESHOLD = env.int("APP1_N_PLUS_ONE_THRESHOLD", default=10)
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        # one JSON line per sampled request
+        "app1.requests": {
+            "handlers": ["console"],
+            "level": env("APP1_REQUEST_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
+}
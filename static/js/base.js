@@ -0,0 +1,382 @@
+// helpers
+function showToast(msg, ms = 2200) {
+  try {
+    const holder = document.getElementById('cg_toast_holder');
+    const t = document.createElement('div');
+    t.className = 'cg-toast';
+    t.textContent = msg;
+    holder.appendChild(t);
+    setTimeout(() => t.style.opacity = '1', 20);
+    setTimeout(() => { t.style.opacity = '0'; setTimeout(() => t.remove(), 300); }, ms);
+  } catch (e) { console.log(e); }
+}
+
+function getCSRFToken() {
+  let cookieValue = null;
+  const cookies = document.cookie ? document.cookie.split(';') : [];
+  for (let i = 0; i < cookies.length; i++) {
+    const cookie = cookies[i].trim();
+    if (cookie.substring(0, 10) === 'csrftoken=') { cookieValue = decodeURIComponent(cookie.substring(10)); break; }
+  }
+  return cookieValue;
+}
+
+// username for avatar initials (base.html puts it on <body>)
+const userName = document.body.dataset.userName || '';
+
+document.addEventListener('DOMContentLoaded', function () {
+  // init AOS & highlight.js
+  try { if (window.AOS) AOS.init({ duration: 650, once: true, easing: 'cubic-bezier(.2,.8,.2,1)' }); } catch (e) { }
+  try { if (window.hljs && typeof hljs.highlightAll === 'function') hljs.highlightAll(); } catch (e) { }
+
+  // elements
+  const openSearch = document.getElementById('openSearch');
+  const closeSearch = document.getElementById('closeSearch');
+  const searchDrawer = document.getElementById('searchDrawer');
+  const searchBox = document.getElementById('searchBox');
+
+  const themeToggle = document.getElementById('themeToggle');
+  const themeIcon = document.getElementById('themeIcon');
+
+  const openAI = document.getElementById('openAI');
+  const aiPopup = document.getElementById('aiPopup');
+  const aiClose = document.getElementById('aiClose');
+  const aiSend = document.getElementById('aiSend');
+  const aiInput = document.getElementById('aiInput');
+  const aiResponseArea = document.getElementById('aiResponseArea');
+  const aiInsertBtn = document.getElementById('aiInsertBtn');
+  const aiCopyBtn = document.getElementById('aiCopy');
+  const aiHeader = document.getElementById('aiHeader');
+
+  // NEW: More menu elements
+  const moreMenuBtn = document.getElementById('moreMenuBtn');
+  const moreMenu = document.getElementById('moreMenu');
+  const moreClose = document.getElementById('moreClose');
+
+  // pointer glow for dock
+  document.querySelectorAll('.pill-item').forEach(el => {
+    el.addEventListener('mousemove', (e) => {
+      const rect = el.getBoundingClientRect();
+      el.style.setProperty('--mx', `${e.clientX - rect.left}px`);
+      el.style.setProperty('--my', `${e.clientY - rect.top}px`);
+    });
+  });
+
+  // ripple effect
+  document.querySelectorAll('.ripple').forEach(el => {
+    el.addEventListener('click', function (e) {
+      const r = document.createElement('span');
+      r.className = 'r';
+      const rect = el.getBoundingClientRect();
+      const size = Math.max(rect.width, rect.height);
+      r.style.width = r.style.height = size + 'px';
+      r.style.left = (e.clientX - rect.left - size / 2) + 'px';
+      r.style.top = (e.clientY - rect.top - size / 2) + 'px';
+      el.appendChild(r);
+      setTimeout(() => r.remove(), 600);
+    });
+  });
+
+  // search drawer open/close
+  function openSearchDrawer() { if (!searchDrawer) return; searchDrawer.classList.add('open'); searchDrawer.style.display = 'block'; searchDrawer.setAttribute('aria-hidden', 'false'); setTimeout(() => searchBox && searchBox.focus(), 90); }
+  function closeSearchDrawer() { if (!searchDrawer) return; searchDrawer.classList.remove('open'); searchDrawer.setAttribute('aria-hidden', 'true'); setTimeout(() => searchDrawer.style.display = 'none', 220); }
+  openSearch && openSearch.addEventListener('click', (e) => { e.preventDefault(); (searchDrawer.classList.contains('open') ? closeSearchDrawer() : openSearchDrawer()); });
+  closeSearch && closeSearch.addEventListener('click', closeSearchDrawer);
+
+  // theme toggle
+  function updateThemeIcon() { const isLight = document.documentElement.classList.contains('light-mode'); themeIcon.className = isLight ? 'fa-solid fa-sun' : 'fa-solid fa-moon'; themeToggle.setAttribute('aria-pressed', isLight ? 'true' : 'false'); }
+  (function initTheme() { try { const saved = localStorage.getItem('theme') || 'auto'; if (saved === 'auto') { const prefersLight = window.matchMedia && window.matchMedia('(prefers-color-scheme: light)').matches; document.documentElement.classList.toggle('light-mode', prefersLight); } else { document.documentElement.classList.toggle('light-mode', saved === 'light'); } } catch (e) { } updateThemeIcon(); })();
+  themeToggle && themeToggle.addEventListener('click', function () { const nowLight = document.documentElement.classList.toggle('light-mode'); try { localStorage.setItem('theme', nowLight ? 'light' : 'dark'); } catch (e) { } updateThemeIcon(); showToast('Theme changed'); });
+
+  // AI popup open/close
+  function openAIPopup() { if (!aiPopup) return; aiPopup.classList.add('open'); aiPopup.setAttribute('aria-hidden', 'false'); setTimeout(() => aiInput && aiInput.focus(), 120); }
+  function closeAIPopup() { if (!aiPopup) return; aiPopup.classList.remove('open'); aiPopup.setAttribute('aria-hidden', 'true'); }
+  openAI && openAI.addEventListener('click', () => { const showing = aiPopup.classList.contains('open'); showing ? closeAIPopup() : openAIPopup(); });
+  aiClose && aiClose.addEventListener('click', closeAIPopup);
+
+  // draggable AI popup
+  (function makeDraggable(headerEl, popupEl) {
+    if (!headerEl || !popupEl) return;
+    let dragging = false, startX = 0, startY = 0, origX = 0, origY = 0;
+    headerEl.addEventListener('mousedown', function (e) {
+      if (e.button !== 0) return;
+      dragging = true; startX = e.clientX; startY = e.clientY;
+      const rect = popupEl.getBoundingClientRect(); origX = rect.left; origY = rect.top;
+      popupEl.style.right = 'auto'; popupEl.style.left = rect.left + 'px'; popupEl.style.top = rect.top + 'px'; popupEl.style.position = 'fixed';
+      document.addEventListener('mousemove', onMove); document.addEventListener('mouseup', onUp);
+      headerEl.style.cursor = 'grabbing'; e.preventDefault();
+    });
+    function onMove(e) { if (!dragging) return; const dx = e.clientX - startX, dy = e.clientY - startY; popupEl.style.left = (origX + dx) + 'px'; popupEl.style.top = (origY + dy) + 'px'; }
+    function onUp() { dragging = false; document.removeEventListener('mousemove', onMove); document.removeEventListener('mouseup', onUp); headerEl.style.cursor = 'grab'; }
+  })(aiHeader, aiPopup);
+
+  // AI helpers (bubbles + typing)
+  function createBubble(text, role = 'ai', html = false) {
+    const wrapper = document.createElement('div');
+    wrapper.className = 'ai-bubble ' + (role === 'ai' ? 'ai' : 'user');
+
+    const avatar = document.createElement('div');
+    avatar.className = 'avatar';
+    avatar.textContent = role === 'ai' ? 'AI' : (userName ? userName.charAt(0).toUpperCase() : 'U');
+
+    const meta = document.createElement('div');
+    meta.className = 'meta';
+
+    const content = document.createElement('div');
+    content.className = 'content';
+    if (html) content.innerHTML = text; else content.textContent = text || '';
+
+    const actions = document.createElement('div');
+    actions.className = 'actions';
+    const copyBtn = document.createElement('button'); copyBtn.className = 'bubble-copy'; copyBtn.title = 'Copy'; copyBtn.innerHTML = '<i class="fa-regular fa-copy"></i>';
+    copyBtn.addEventListener('click', () => { copyText(content.innerText || content.textContent); });
+    actions.appendChild(copyBtn);
+
+    meta.appendChild(content);
+    wrapper.appendChild(avatar);
+    wrapper.appendChild(meta);
+    wrapper.appendChild(actions);
+
+    aiResponseArea.appendChild(wrapper);
+    aiResponseArea.scrollTop = aiResponseArea.scrollHeight;
+    return { wrapper, content, copyBtn };
+  }
+
+  function attachTyping(bubble) {
+    const dots = document.createElement('div'); dots.className = 'typing-dots'; dots.innerHTML = '<span></span><span></span><span></span>'; bubble.appendChild(dots); return function remove() { dots.remove(); };
+  }
+
+  function copyText(txt) {
+    if (!txt) return showToast('Nothing to copy');
+    if (navigator.clipboard && navigator.clipboard.writeText) navigator.clipboard.writeText(txt).then(() => showToast('Copied'), () => prompt('Copy:', txt)); else prompt('Copy:', txt);
+  }
+
+  // send AI request (replace endpoint with yours)
+  aiSend && aiSend.addEventListener('click', async function () {
+    const text = (aiInput.value || '').trim();
+    if (!text) { showToast('Write a prompt'); aiInput.focus(); return; }
+
+    createBubble(text, 'user', false);
+
+    aiSend.disabled = true;
+    const { wrapper, content } = createBubble('', 'ai', false);
+    const removeTyping = attachTyping(wrapper);
+
+    try {
+      await new Promise(r => setTimeout(r, 350)); // small UX delay
+
+      const res = await fetch('/ai-assistant/', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCSRFToken() },
+        body: JSON.stringify({ text })
+      });
+      const data = await res.json();
+      if (!res.ok) throw new Error(data.error || 'AI request failed');
+
+      removeTyping();
+      const suggestion = data.suggestion || '✨ (No suggestion returned)';
+
+      if (/<\/?[a-z][\s\S]*>/i.test(suggestion)) {
+        content.innerHTML = suggestion;
+      } else {
+        content.textContent = '';
+        let i = 0; const speed = 14;
+        const t = setInterval(() => { content.textContent += suggestion.charAt(i); i++; if (i >= suggestion.length) clearInterval(t); }, speed);
+      }
+
+      try { if (window.hljs) content.querySelectorAll && content.querySelectorAll('pre code').forEach(b => hljs.highlightElement(b)); } catch (e) { }
+
+      aiInsertBtn.style.display = 'inline-block'; aiCopyBtn.style.display = 'inline-block';
+    } catch (err) {
+      removeTyping(); content.textContent = '⚠️ ' + (err.message || 'Request failed');
+    } finally { aiSend.disabled = false; aiInput.value = ''; aiResponseArea.scrollTop = aiResponseArea.scrollHeight; }
+  });
+
+  // insert last AI suggestion into editors/textarea
+  aiInsertBtn && aiInsertBtn.addEventListener('click', function () {
+    const last = aiResponseArea.querySelector('.ai-bubble.ai .content:last-of-type');
+    const plain = last ? (last.innerText || last.textContent || '').trim() : '';
+    if (!plain) return showToast('No AI suggestion to insert');
+
+    // Quill
+    if (window.quill && typeof window.quill.insertText === 'function') {
+      try { const q = window.quill; const sel = q.getSelection && q.getSelection(true); const index = (sel && sel.index) || q.getLength(); q.insertText(index, '\n' + plain + '\n', 'user'); return showToast('Inserted into Quill'); } catch (e) { }
+    }
+
+    // TinyMCE
+    if (window.tinymce && tinymce.activeEditor) { try { tinymce.activeEditor.insertContent(plain); return showToast('Inserted into TinyMCE'); } catch (e) { } }
+
+    // CKEditor 4
+    if (window.CKEDITOR && CKEDITOR.instances) {
+      try { const ids = Object.keys(CKEDITOR.instances); if (ids.length) { CKEDITOR.instances[ids[0]].insertText(plain); return showToast('Inserted into CKEditor'); } } catch (e) { }
+    }
+
+    // CKEditor 5
+    if (window.editor && window.editor.model && typeof window.editor.model.change === 'function') {
+      try { window.editor.model.change(writer => { const viewFragment = window.editor.data.processor.toView(plain); const modelFragment = window.editor.data.toModel(viewFragment); window.editor.model.insertContent(modelFragment); }); return showToast('Inserted into editor'); } catch (e) { }
+    }
+
+    // fallback: textarea with id id_content
+    const hidden = document.getElementById('id_content');
+    if (hidden && (hidden.tagName === 'TEXTAREA' || hidden.TAGNAME === 'INPUT')) { hidden.value = (hidden.value || '') + '\n' + plain + '\n'; return showToast('Inserted into content field'); }
+
+    // last fallback: clipboard
+    copyText(plain);
+  });
+
+  aiCopyBtn && aiCopyBtn.addEventListener('click', function () {
+    const last = aiResponseArea.querySelector('.ai-bubble.ai .content:last-of-type');
+    const plain = last ? (last.innerText || last.textContent).trim() : '';
+    if (!plain) return showToast('Nothing to copy'); copyText(plain);
+  });
+
+  // NEW: More menu open/close handlers
+  function openMore() {
+    if (!moreMenu) return;
+    moreMenu.classList.add('open');
+    moreMenu.setAttribute('aria-hidden', 'false');
+    if (window.innerWidth <= 768) {
+      const header = moreMenu.querySelector('.more-header');
+      if (header) header.style.display = 'flex';
+    }
+    const firstLink = moreMenu.querySelector('.more-link');
+    setTimeout(() => firstLink && firstLink.focus(), 60);
+  }
+  function closeMore() {
+    if (!moreMenu) return;
+    moreMenu.classList.remove('open');
+    moreMenu.setAttribute('aria-hidden', 'true');
+  }
+
+  moreMenuBtn && moreMenuBtn.addEventListener('click', (e) => {
+    e.stopPropagation();
+    moreMenu.classList.contains('open') ? closeMore() : openMore();
+  });
+
+  moreClose && moreClose.addEventListener('click', (e) => { e.stopPropagation(); closeMore(); });
+
+  // close overlays when clicking outside
+  document.addEventListener('click', function (e) {
+    try {
+      if (searchDrawer && searchDrawer.classList.contains('open') && !searchDrawer.contains(e.target) && !openSearch.contains(e.target)) closeSearchDrawer();
+      if (aiPopup && aiPopup.classList.contains('open') && !aiPopup.contains(e.target) && !openAI.contains(e.target)) closeAIPopup();
+      if (moreMenu && moreMenu.classList.contains('open') && !moreMenu.contains(e.target) && !moreMenuBtn.contains(e.target)) closeMore();
+    } catch (err) { }
+  });
+
+  // lazy-load images
+  const lazyImgs = document.querySelectorAll('img.lazy');
+  if ('IntersectionObserver' in window) {
+    const io = new IntersectionObserver((entries, obs) => {
+      entries.forEach(entry => {
+        if (entry.isIntersecting) {
+          const img = entry.target;
+          img.src = img.dataset.src || img.getAttribute('data-src');
+          img.onload = () => img.classList.add('loaded');
+          obs.unobserve(img);
+        }
+      });
+    }, { rootMargin: '200px' });
+    lazyImgs.forEach(img => io.observe(img));
+  } else {
+    lazyImgs.forEach(img => { img.src = img.dataset.src || img.getAttribute('data-src'); img.onload = () => img.classList.add('loaded'); });
+  }
+
+  // subtle parallax background on scroll
+  window.addEventListener('scroll', function () { const s = window.scrollY || window.pageYOffset; const ratio = Math.min(1, s / 1200); document.body.style.backgroundPosition = `${ratio * 30}% 50%`; });
+
+  // first-time tip
+  try { if (!localStorage.getItem('theme_seen')) { showToast('Tip: Toggle theme (moon/sun) to switch dark/light mode'); localStorage.setItem('theme_seen', '1'); } } catch (e) { }
+
+  // ESC to close overlays
+  document.addEventListener('keydown', function (e) {
+    if (e.key === 'Escape') { closeSearchDrawer(); closeAIPopup(); closeMore(); }
+    if (e.key === 'k' && (e.ctrlKey || e.metaKey)) { e.preventDefault(); openSearchDrawer(); }
+  });
+
+  /* =============================
+     SMART DRAGGABLE FAB + AUTO-PLACED RADIAL MENU
+     ============================= */
+  (function simpleVerticalFab() {
+    const fabMenu = document.getElementById('fabMenu');
+    if (!fabMenu) return;
+    const mainBtn = fabMenu.querySelector('.main');
+    const actionsEl = document.getElementById('fabActions');
+
+    function openFAB() {
+      fabMenu.classList.add('open');
+      mainBtn && mainBtn.setAttribute('aria-expanded', 'true');
+      actionsEl && actionsEl.setAttribute('aria-hidden', 'false');
+      // Enable pointer events for actions container when open
+      actionsEl.style.pointerEvents = 'auto';
+    }
+
+    function closeFAB() {
+      fabMenu.classList.remove('open');
+      mainBtn && mainBtn.setAttribute('aria-expanded', 'false');
+      actionsEl && actionsEl.setAttribute('aria-hidden', 'true');
+      // Disable pointer events for actions container when closed
+      actionsEl.style.pointerEvents = 'none';
+    }
+
+    mainBtn && mainBtn.addEventListener('click', (ev) => {
+      ev.stopPropagation();
+      ev.preventDefault(); // Prevent default action
+      fabMenu.classList.contains('open') ? closeFAB() : openFAB();
+    });
+
+    document.addEventListener('click', (ev) => {
+      if (!fabMenu.contains(ev.target) && fabMenu.classList.contains('open')) {
+        closeFAB();
+      }
+    });
+
+    window.addEventListener('keydown', (e) => {
+      if (e.key === 'Escape') closeFAB();
+    });
+
+    // hook actions to existing handlers
+    const fabSearch = document.getElementById('fabSearch');
+    const fabTheme = document.getElementById('fabTheme');
+    const fabMore = document.getElementById('fabMore');
+    const fabAI = document.getElementById('fabAI');
+
+    // Add event listeners with proper event handling
+    fabSearch && fabSearch.addEventListener('click', (e) => {
+      e.stopPropagation();
+      e.preventDefault(); // Prevent default action
+      document.getElementById('openSearch')?.click();
+      closeFAB();
+    });
+
+    fabTheme && fabTheme.addEventListener('click', (e) => {
+      e.stopPropagation();
+      e.preventDefault(); // Prevent default action
+      document.getElementById('themeToggle')?.click();
+      closeFAB();
+    });
+
+    fabMore && fabMore.addEventListener('click', (e) => {
+      e.stopPropagation();
+      e.preventDefault(); // Prevent default action
+      document.getElementById('moreMenuBtn')?.click();
+      closeFAB();
+    });
+
+    fabAI && fabAI.addEventListener('click', (e) => {
+      e.stopPropagation();
+      e.preventDefault(); // Prevent default action
+      document.getElementById('openAI')?.click();
+      closeFAB();
+    });
+
+    // Handle all link buttons
+    document.querySelectorAll('.fab-actions a.fab-btn').forEach(btn => {
+      btn.addEventListener('click', (e) => {
+        e.stopPropagation();
+        // Let the link navigate naturally
+        setTimeout(() => closeFAB(), 100);
+      });
+    });
+  })();
+});
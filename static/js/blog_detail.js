@@ -0,0 +1,517 @@
+(function () {
+  /* ---------- CSRF ---------- */
+  function getCookie(name) {
+    const v = `; ${document.cookie}`.split(`; ${name}=`); return v.length === 2 ? v.pop().split(";").shift() : null;
+  }
+  const csrftoken = getCookie("csrftoken");
+  // per-page values come from #blog-detail-data in blog_detail.html
+  const page = document.getElementById("blog-detail-data").dataset;
+  const isAuth = page.auth === "true";
+
+/* ---------- Progress Bar ---------- */
+function onScrollProgress() {
+  const st = window.scrollY;
+  const max = document.body.scrollHeight - window.innerHeight;
+  const pct = Math.max(0, Math.min(100, (st / (max || 1)) * 100));
+  const bar = document.getElementById("progress-bar");
+  const indicator = document.getElementById("scroll-indicator");
+  if (bar) bar.style.width = pct + "%";
+  if (indicator) indicator.style.height = pct + "%";
+}
+document.addEventListener("scroll", onScrollProgress, { passive: true });
+onScrollProgress();
+
+/* ---------- Reading Time ---------- */
+function calcReadingTime() {
+  const content = document.querySelector(".blog-content");
+  if (!content) return;
+  const words = (content.innerText || "").trim().split(/\s+/).filter(Boolean).length;
+  const minutes = Math.max(1, Math.ceil(words / 200));
+  const rt = document.getElementById("reading-time");
+  if (rt) rt.textContent = `⏱ ${minutes} min read`;
+}
+document.addEventListener("DOMContentLoaded", calcReadingTime);
+
+/* ---------- Hero Particles ---------- */
+function createParticles() {
+  const particlesContainer = document.getElementById("hero-particles");
+  if (!particlesContainer) return;
+
+  const particleCount = 30;
+
+  for (let i = 0; i < particleCount; i++) {
+    const particle = document.createElement("div");
+    particle.className = "particle";
+
+    // Random size
+    const size = Math.random() * 8 + 3;
+    particle.style.width = `${size}px`;
+    particle.style.height = `${size}px`;
+
+    // Random position
+    particle.style.left = `${Math.random() * 100}%`;
+    particle.style.top = `${Math.random() * 100}%`;
+
+    // Random opacity
+    particle.style.opacity = Math.random() * 0.5 + 0.2;
+
+    // Random animation duration
+    const duration = Math.random() * 20 + 10;
+    particle.style.animation = `float ${duration}s infinite ease-in-out`;
+
+    // Random delay
+    particle.style.animationDelay = `${Math.random() * 5}s`;
+
+    particlesContainer.appendChild(particle);
+  }
+}
+
+// Add float animation
+const style = document.createElement("style");
+style.textContent = `
+    @keyframes float {
+      0%, 100% { transform: translateY(0) translateX(0); }
+      25% { transform: translateY(-20px) translateX(10px); }
+      50% { transform: translateY(0) translateX(20px); }
+      75% { transform: translateY(20px) translateX(10px); }
+    }
+  `;
+document.head.appendChild(style);
+
+document.addEventListener("DOMContentLoaded", createParticles);
+
+/* ---------- Reaction Particles ---------- */
+function createReactionParticles(button) {
+  const particlesContainer = button.querySelector(".reaction-particles");
+  if (!particlesContainer) return;
+
+  const particleCount = 15;
+  const color = window.getComputedStyle(button).getPropertyValue("color");
+
+  for (let i = 0; i < particleCount; i++) {
+    const particle = document.createElement("div");
+    particle.className = "reaction-particle";
+
+    // Random size
+    const size = Math.random() * 8 + 4;
+    particle.style.width = `${size}px`;
+    particle.style.height = `${size}px`;
+
+    // Position at center of button
+    particle.style.left = "50%";
+    particle.style.top = "50%";
+
+    // Color
+    particle.style.background = color;
+
+    // Random direction
+    const angle = (Math.PI * 2 * i) / particleCount;
+    const velocity = Math.random() * 60 + 40;
+    const vx = Math.cos(angle) * velocity;
+    const vy = Math.sin(angle) * velocity;
+
+    // Animation
+    particle.animate([
+      { transform: "translate(-50%, -50%) scale(1)", opacity: 1 },
+      { transform: `translate(calc(-50% + ${vx}px), calc(-50% + ${vy}px)) scale(0)`, opacity: 0 }
+    ], {
+      duration: 1200,
+      easing: "cubic-bezier(0, .9, .57, 1)"
+    });
+
+    particlesContainer.appendChild(particle);
+
+    // Remove after animation
+    setTimeout(() => {
+      particle.remove();
+    }, 1200);
+  }
+}
+
+/* ---------- Normalize editor output (floats/figures) ---------- */
+document.addEventListener("DOMContentLoaded", function () {
+  const content = document.querySelector('.blog-content');
+  if (!content) return;
+  content.querySelectorAll('figure').forEach(fig => {
+    const cls = (fig.className || '').toLowerCase();
+    try {
+      if (cls.includes('align-left') || cls.includes('image-style-align-left') || cls.includes('image-style-left')) {
+        fig.style.cssFloat = 'left'; fig.style.margin = '10px 20px 10px 0'; fig.style.maxWidth = '45%';
+      } else if (cls.includes('align-right') || cls.includes('image-style-align-right') || cls.includes('image-style-right')) {
+        fig.style.cssFloat = 'right'; fig.style.margin = '10px 0 10px 20px'; fig.style.maxWidth = '45%';
+      } else if (cls.includes('align-center') || cls.includes('image-style-align-center') || cls.includes('image-style-center')) {
+        fig.style.display = 'block'; fig.style.margin = '12px auto'; fig.style.maxWidth = '90%'; fig.style.textAlign = 'center';
+      }
+    } catch (e) { }
+  });
+  content.querySelectorAll('img').forEach(img => {
+    const styleAttr = img.getAttribute('style') || '';
+    const cls = (img.className || '').toLowerCase();
+    if (cls.includes('alignleft') || cls.includes('align-left')) {
+      img.style.cssFloat = 'left'; img.style.margin = '10px 20px 10px 0'; img.style.maxWidth = '45%';
+    } else if (cls.includes('alignright') || cls.includes('align-right')) {
+      img.style.cssFloat = 'right'; img.style.margin = '10px 0 10px 20px'; img.style.maxWidth = '45%';
+    } else if (cls.includes('aligncenter') || cls.includes('align-center')) {
+      img.style.display = 'block'; img.style.margin = '12px auto'; img.style.maxWidth = '90%';
+    }
+    if (/float\s*:\s*left/.test(styleAttr)) {
+      img.style.cssFloat = 'left'; if (!img.style.margin) img.style.margin = '10px 20px 10px 0'; if (!img.style.maxWidth) img.style.maxWidth = '45%';
+    } else if (/float\s*:\s*right/.test(styleAttr)) {
+      img.style.cssFloat = 'right'; if (!img.style.margin) img.style.margin = '10px 0 10px 20px'; if (!img.style.maxWidth) img.style.maxWidth = '45%';
+    }
+    if (/display\s*:\s*block/.test(styleAttr) && /margin-left\s*:\s*auto/.test(styleAttr)) {
+      img.style.display = 'block'; img.style.marginLeft = 'auto'; img.style.marginRight = 'auto'; if (!img.style.maxWidth) img.style.maxWidth = '90%';
+    }
+    img.style.maxWidth = img.style.maxWidth || '100%';
+    img.style.height = img.style.height || 'auto';
+  });
+});
+
+/* ---------- In-page TOC ---------- */
+function slugify(str) {
+  return str.toLowerCase()
+    .replace(/<\/?[^>]+(>|$)/g, "")
+    .replace(/[^\w\s-]/g, '')
+    .trim().replace(/\s+/g, '-').slice(0, 64);
+}
+document.addEventListener("DOMContentLoaded", function () {
+  const content = document.querySelector(".blog-content");
+  const toc = document.getElementById("toc-list");
+  if (!content || !toc) return;
+  const headings = [...content.querySelectorAll("h2, h3")];
+  if (!headings.length) { toc.innerHTML = '<p class="text-muted small m-0">No headings</p>'; return; }
+  const ul = document.createElement("ul");
+  ul.className = "list-unstyled";
+  headings.forEach(h => {
+    if (!h.id) { h.id = slugify(h.textContent || 'section'); }
+    const li = document.createElement("li");
+    li.style.marginLeft = h.tagName === 'H3' ? "10px" : "0";
+    const a = document.createElement("a");
+    a.href = `#${h.id}`;
+    a.textContent = h.textContent;
+    a.addEventListener("click", (e) => {
+      e.preventDefault();
+      document.getElementById(h.id)?.scrollIntoView({ behavior: "smooth", block: "start" });
+      history.replaceState(null, "", `#${h.id}`);
+    });
+    li.appendChild(a); ul.appendChild(li);
+  });
+  toc.appendChild(ul);
+  // Active section highlight
+  const links = toc.querySelectorAll("a");
+  const io = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+      if (entry.isIntersecting) {
+        links.forEach(l => l.classList.toggle("active", l.getAttribute("href") === `#${entry.target.id}`));
+      }
+    });
+  }, { rootMargin: "-40% 0px -50% 0px", threshold: 0.01 });
+  headings.forEach(h => io.observe(h));
+  // Toggle for mobile
+  const toggle = document.getElementById("toc-toggle");
+  if (toggle) {
+    toggle.addEventListener("click", () => {
+      const open = toc.style.display !== "none";
+      toc.style.display = open ? "none" : "block";
+      toggle.setAttribute("aria-expanded", (!open).toString());
+    });
+    // default collapsed on small screens
+    if (window.matchMedia("(max-width: 992px)").matches) {
+      toc.style.display = "none";
+      toggle.setAttribute("aria-expanded", "false");
+    }
+  }
+});
+
+/* ---------- Like / Bookmark ---------- */
+const likeBtn = document.getElementById("like-btn");
+const likeCount = document.getElementById("like-count");
+const bookmarkBtn = document.getElementById("bookmark-btn");
+if (likeBtn) {
+  likeBtn.addEventListener("click", async () => {
+    if (!isAuth) { window.location.href = page.loginUrl; return; }
+    likeBtn.disabled = true;
+    createReactionParticles(likeBtn);
+    try {
+      const res = await fetch(page.likeUrl, {
+        method: "POST", headers: { "X-CSRFToken": csrftoken, "X-Requested-With": "XMLHttpRequest" }
+      });
+      const data = await res.json();
+      likeBtn.classList.toggle("active", !!data.liked);
+      likeBtn.setAttribute("aria-pressed", data.liked ? "true" : "false");
+      if (likeCount) likeCount.textContent = String(data.count || 0);
+    } catch (e) { console.error(e); }
+    finally { likeBtn.disabled = false; }
+  });
+}
+if (bookmarkBtn) {
+  bookmarkBtn.addEventListener("click", async () => {
+    if (!isAuth) { window.location.href = page.loginUrl; return; }
+    bookmarkBtn.disabled = true;
+    createReactionParticles(bookmarkBtn);
+    try {
+      const res = await fetch(page.bookmarkUrl, {
+        method: "POST", headers: { "X-CSRFToken": csrftoken, "X-Requested-With": "XMLHttpRequest" }
+      });
+      const data = await res.json();
+      const active = !!data.bookmarked;
+      bookmarkBtn.classList.toggle("active", active);
+      bookmarkBtn.setAttribute("aria-pressed", active ? "true" : "false");
+    } catch (e) { console.error(e); }
+    finally { bookmarkBtn.disabled = false; }
+  });
+}
+
+const followBtn = document.getElementById("follow-btn");
+if (followBtn) {
+  followBtn.addEventListener("click", async () => {
+    if (!isAuth) { window.location.href = page.loginUrl; return; }
+    followBtn.disabled = true;
+    try {
+      const res = await fetch(page.followUrl, {
+        method: "POST", headers: { "X-CSRFToken": csrftoken, "X-Requested-With": "XMLHttpRequest" }
+      });
+      const data = await res.json();
+      const active = !!data.following;
+      followBtn.classList.toggle("active", active);
+      followBtn.setAttribute("aria-pressed", active ? "true" : "false");
+      document.getElementById("follow-label").textContent = active ? "Following" : "Follow";
+    } catch (e) { console.error(e); }
+    finally { followBtn.disabled = false; }
+  });
+}
+
+/* ---------- Share ---------- */
+window.shareBlog = async function () {
+  const shareData = { title: page.title, text: "Check out this blog!", url: window.location.href };
+  if (navigator.share) { try { await navigator.share(shareData); } catch (e) { } }
+  else {
+    try {
+      await navigator.clipboard.writeText(window.location.href);
+      const btn = document.getElementById("share-btn");
+      const original = btn.innerHTML;
+      btn.innerHTML = "<span class='icon'>✅</span><span class='text'>Copied!</span>";
+      setTimeout(() => btn.innerHTML = original, 1200);
+    } catch (e) { alert("Link: " + window.location.href); }
+  }
+};
+
+// Sidebar quick shares
+const enc = encodeURIComponent;
+const url = enc(window.location.href);
+const title = enc(page.title);
+const tw = document.getElementById("share-twitter");
+const wa = document.getElementById("share-whatsapp");
+const tg = document.getElementById("share-telegram");
+if (tw) tw.href = `https://twitter.com/intent/tweet?url=${url}&text=${title}`;
+if (wa) wa.href = `https://wa.me/?text=${title}%20${url}`;
+if (tg) tg.href = `https://t.me/share/url?url=${url}&text=${title}`;
+const cpy = document.getElementById("btn-copy-link");
+if (cpy) {
+  cpy.addEventListener("click", async () => {
+    try {
+      await navigator.clipboard.writeText(window.location.href);
+      cpy.innerHTML = "<span class='icon'>✅</span><span>Copied!</span>";
+      setTimeout(() => cpy.innerHTML = "<span class='icon'>📋</span><span>Copy Link</span>", 900);
+    } catch (e) { alert(window.location.href); }
+  });
+}
+
+/* ---------- Image Zoom ---------- */
+let imageRotation = 0;
+
+window.zoomImage = function (imageSrc) {
+  const modal = document.getElementById("image-zoom-modal");
+  const zoomedImage = document.getElementById("zoomed-image");
+
+  if (modal && zoomedImage) {
+    zoomedImage.src = imageSrc;
+    imageRotation = 0;
+    zoomedImage.style.transform = `rotate(0deg)`;
+    modal.style.display = "flex";
+    document.body.style.overflow = "hidden";
+  }
+};
+
+window.closeZoomModal = function () {
+  const modal = document.getElementById("image-zoom-modal");
+  if (modal) {
+    modal.style.display = "none";
+    document.body.style.overflow = "auto";
+  }
+};
+
+window.rotateImage = function () {
+  const zoomedImage = document.getElementById("zoomed-image");
+  if (zoomedImage) {
+    imageRotation = (imageRotation + 90) % 360;
+    zoomedImage.style.transform = `rotate(${imageRotation}deg)`;
+  }
+};
+
+window.downloadImage = function (imageSrc) {
+  const link = document.createElement("a");
+  link.href = imageSrc;
+  link.download = imageSrc.split('/').pop();
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+};
+
+window.downloadZoomedImage = function () {
+  const zoomedImage = document.getElementById("zoomed-image");
+  if (zoomedImage) {
+    downloadImage(zoomedImage.src);
+  }
+};
+
+// Close modal when clicking outside the image
+document.getElementById("image-zoom-modal")?.addEventListener("click", function (e) {
+  if (e.target === this) {
+    closeZoomModal();
+  }
+});
+
+// Close modal with Escape key
+document.addEventListener("keydown", function (e) {
+  if (e.key === "Escape") {
+    closeZoomModal();
+  }
+});
+
+/* ---------- FAB Menu ---------- */
+let fabMenuOpen = false;
+
+window.toggleFabMenu = function () {
+  const fabMenu = document.querySelector(".fab-menu");
+  const mainFab = document.querySelector(".main-fab");
+
+  if (fabMenu) {
+    fabMenuOpen = !fabMenuOpen;
+    fabMenu.classList.toggle("active", fabMenuOpen);
+
+    // Rotate the main FAB icon
+    if (fabMenuOpen) {
+      mainFab.innerHTML = '<span class="icon">×</span>';
+    } else {
+      mainFab.innerHTML = '<span class="icon">+</span>';
+    }
+  }
+};
+
+window.scrollToTop = function () {
+  window.scrollTo({
+    top: 0,
+    behavior: "smooth"
+  });
+};
+
+window.toggleDarkMode = function () {
+  document.body.classList.toggle("dark-mode");
+  localStorage.setItem("darkMode", document.body.classList.contains("dark-mode"));
+};
+
+window.toggleReaderMode = function () {
+  document.body.classList.toggle("reader-mode");
+  localStorage.setItem("readerMode", document.body.classList.contains("reader-mode"));
+};
+
+// Check for saved preferences
+if (localStorage.getItem("darkMode") === "true") {
+  document.body.classList.add("dark-mode");
+}
+
+if (localStorage.getItem("readerMode") === "true") {
+  document.body.classList.add("reader-mode");
+}
+
+/* ---------- Newsletter Form ---------- */
+document.querySelector(".newsletter-form")?.addEventListener("submit", function (e) {
+  e.preventDefault();
+  const email = this.querySelector('input[type="email"]').value;
+
+  // In a real implementation, you would send this to your backend
+  alert(`Thank you for subscribing with email: ${email}`);
+  this.reset();
+});
+
+/* ---------- Comments: lazy pages, replies, AJAX posting ---------- */
+const commentList = document.querySelector(".comment-list");
+const commentCount = document.querySelector(".comment-count");
+
+function setCommentCount(n) {
+  if (commentCount) commentCount.textContent = `${n} comment${n === 1 ? "" : "s"}`;
+}
+
+async function postComment(form) {
+  const res = await fetch(commentList.dataset.commentUrl, {
+    method: "POST",
+    headers: { "X-CSRFToken": csrftoken, "X-Requested-With": "XMLHttpRequest" },
+    body: new FormData(form),
+  });
+  if (!res.ok) return null;
+  return res.json();
+}
+
+document.addEventListener("click", async function (e) {
+  const more = e.target.closest(".js-load-comments");
+  if (more) {
+    more.disabled = true;
+    const res = await fetch(more.dataset.url, { headers: { "X-Requested-With": "XMLHttpRequest" } });
+    if (res.ok) {
+      more.insertAdjacentHTML("beforebegin", await res.text());
+      more.remove();
+    } else {
+      more.disabled = false;
+    }
+    return;
+  }
+
+  const reply = e.target.closest(".js-reply");
+  if (reply) {
+    if (!isAuth) { window.location.href = page.loginUrl; return; }
+    const box = reply.closest(".comment-box").querySelector(".comment-replies");
+    let form = box.querySelector(".reply-form");
+    if (form) { form.remove(); return; }
+    form = document.createElement("form");
+    form.className = "comment-form reply-form glass mt-2";
+    form.innerHTML = `<input type="hidden" name="parent" value="${reply.dataset.parent}">
+      <textarea name="content" class="form-control rounded-3 shadow-sm" rows="2" placeholder="Write a reply..." required></textarea>
+      <button type="submit" class="btn btn-primary btn-sm fw-semibold mt-2">Reply</button>`;
+    box.prepend(form);
+    form.querySelector("textarea").focus();
+  }
+});
+
+document.addEventListener("submit", async function (e) {
+  const form = e.target.closest(".comment-form");
+  if (!form || !commentList) return;
+  e.preventDefault();
+  const button = form.querySelector("button[type=submit]");
+  if (button) button.disabled = true;
+  try {
+    const data = await postComment(form);
+    if (!data) return;
+    if (data.parent) {
+      const box = commentList.querySelector(`.comment-replies[data-parent="${data.parent}"]`);
+      (box || commentList).insertAdjacentHTML(box ? "beforeend" : "afterbegin", data.html);
+    } else {
+      commentList.querySelector(".no-comments")?.remove();
+      commentList.insertAdjacentHTML("afterbegin", data.html);
+    }
+    setCommentCount(data.comments_count);
+    if (form.classList.contains("reply-form")) form.remove(); else form.reset();
+  } finally {
+    if (button) button.disabled = false;
+  }
+});
+
+/* ---------- Initialize AOS ---------- */
+document.addEventListener("DOMContentLoaded", function () {
+  AOS.init({
+    duration: 800,
+    once: true,
+    offset: 100
+  });
+});
+}) ();
@@ -0,0 +1,122 @@
+(function () {
+  // refresh AOS (base may have initialized it already)
+  try { if (window.AOS) AOS.refresh(); } catch (e) { }
+
+  // Ripple effect
+  document.querySelectorAll('.ripple').forEach(el => {
+    el.addEventListener('click', function (e) {
+      const r = document.createElement('span');
+      r.className = 'r';
+      const rect = el.getBoundingClientRect();
+      const size = Math.max(rect.width, rect.height);
+      r.style.width = r.style.height = size + 'px';
+      r.style.left = (e.clientX - rect.left - size / 2) + 'px';
+      r.style.top = (e.clientY - rect.top - size / 2) + 'px';
+      el.appendChild(r);
+      setTimeout(() => r.remove(), 600);
+    });
+  });
+
+  // Lazy load images (.boss-lazy); <picture> sources carry data-srcset
+  function revealSources(img) {
+    if (!img.parentElement || img.parentElement.tagName !== 'PICTURE') return;
+    img.parentElement.querySelectorAll('source[data-srcset]').forEach(s => {
+      s.srcset = s.dataset.srcset;
+    });
+  }
+  const lazyImgs = Array.from(document.querySelectorAll('img.boss-lazy'));
+  if ('IntersectionObserver' in window && lazyImgs.length) {
+    const io = new IntersectionObserver((entries, obs) => {
+      entries.forEach(entry => {
+        if (entry.isIntersecting) {
+          const img = entry.target;
+          revealSources(img);
+          img.src = img.dataset.src || img.getAttribute('data-src');
+          img.onload = () => img.classList.add('loaded');
+          obs.unobserve(img);
+        }
+      });
+    }, { rootMargin: '200px' });
+    lazyImgs.forEach(i => io.observe(i));
+  } else {
+    lazyImgs.forEach(img => { revealSources(img); img.src = img.dataset.src || img.getAttribute('data-src'); img.onload = () => img.classList.add('loaded'); });
+  }
+
+  // Card tilt (subtle) - desktop only (pointer: fine and width > 768)
+  (function () {
+    const isFinePointer = window.matchMedia ? window.matchMedia('(pointer: fine)').matches : true;
+    if (!isFinePointer || window.innerWidth <= 768) return;
+
+    document.querySelectorAll('.boss-card').forEach(card => {
+      let raf = null;
+      const handle = (e) => {
+        const r = card.getBoundingClientRect();
+        const px = (e.clientX - r.left) / r.width;
+        const py = (e.clientY - r.top) / r.height;
+        const rx = (py - .5) * -6;
+        const ry = (px - .5) * 6;
+        cancelAnimationFrame(raf);
+        raf = requestAnimationFrame(() => {
+          card.style.transform = `perspective(900px) translateZ(2px) rotateX(${rx}deg) rotateY(${ry}deg) translateY(-6px)`;
+        });
+      };
+      card.addEventListener('mousemove', handle);
+      card.addEventListener('mouseleave', () => { cancelAnimationFrame(raf); card.style.transform = ''; });
+      card.addEventListener('focus', () => card.style.transform = 'translateY(-8px)');
+      card.addEventListener('blur', () => card.style.transform = '');
+    });
+  })();
+
+  // Hook hero ask AI to open assistant in base (fallback to clicking sidebar)
+  const heroAsk = document.getElementById('heroAskAI');
+  if (heroAsk) {
+    heroAsk.addEventListener('click', function (e) {
+      e.preventDefault();
+      try {
+        if (typeof openAIPopup === 'function') return openAIPopup();
+      } catch (_) { }
+      const sidebar = document.getElementById('openAI');
+      if (sidebar) sidebar.click();
+    });
+    heroAsk.addEventListener('keydown', function (e) {
+      if (e.key === 'Enter' || e.key === ' ') { e.preventDefault(); heroAsk.click(); }
+    });
+  }
+
+  // Bootstrap carousel: ensure it autoplays and pauses on hover/focus
+  try {
+    const carouselEl = document.getElementById('blogCarousel');
+    if (carouselEl && window.bootstrap && bootstrap.Carousel) {
+      const carousel = bootstrap.Carousel.getOrCreateInstance(carouselEl, { interval: 5000, pause: 'hover', ride: 'carousel' });
+      // pause on focus within carousel for accessibility
+      carouselEl.addEventListener('focusin', () => carousel.pause());
+      carouselEl.addEventListener('focusout', () => carousel.cycle());
+    }
+  } catch (e) { console.warn(e); }
+
+  // Keyboard: Enter on card opens Read More
+  document.querySelectorAll('.boss-card').forEach(c => {
+    c.addEventListener('keydown', (ev) => {
+      if (ev.key === 'Enter') {
+        const link = c.querySelector('a.read-btn, a.btn');
+        if (link) link.click();
+      }
+    });
+  });
+
+  // Make sure carousel images are accessible on small screens: on small screens, shorten interval slightly (optional)
+  window.addEventListener('resize', function () {
+    try {
+      const carouselEl = document.getElementById('blogCarousel');
+      if (carouselEl && window.bootstrap && bootstrap.Carousel) {
+        const instance = bootstrap.Carousel.getInstance(carouselEl);
+        if (instance) {
+          // smaller interval on mobile for quicker browsing
+          if (window.innerWidth <= 640) instance._config.interval = 4000;
+          else instance._config.interval = 5000;
+        }
+      }
+    } catch (e) { }
+  });
+
+})();